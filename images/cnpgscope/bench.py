@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""bench — measure cnpgscope against a synthetic CNPG fleet, no cluster needed.
+
+A generated fleet (fakekube.Fleet: Cluster CRs + pods, 10 to thousands of
+instances) answers discovery lists and df/psql execs with plausible output
+after a simulated latency, and fails or hangs a configurable fraction of them.
+Each fleet size runs in a fresh process, reporting wall time per phase
+(discover, enrich, evaluate, render, json), exec count and peak RSS.
+
+Backends:
+  * fake     (default) in-process stand-in for cnpgscope.Kubectl: probes are
+             asyncio sleeps, so the numbers are cnpgscope's own overhead plus
+             the simulated latency.
+  * kubectl  cnpgscope.Kubectl with fakekube.py as its kubectl binary: every
+             list and exec forks a process, like the real thing.
+
+Usage:
+  bench.py                                   # 10, 100, 1000, 5000 instances
+  bench.py --instances 50 500 --latency 0.1 --sigma 0.8
+  bench.py --fail-rate 0.01 --hang-rate 0.002 --exec-timeout 2
+  bench.py --workers 32 --per-node 8         # try an enrich() concurrency change
+  bench.py --backend kubectl --instances 100
+  bench.py -o json > before.json             # keep results to compare
+
+Generation is seeded (--seed), so two runs see the same fleet, the same
+latencies and the same failures.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from typing import Callable, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import cnpgscope  # noqa: E402
+from fakekube import FLEET_ENV, Fleet  # noqa: E402
+
+PHASES = ("discover", "enrich", "evaluate", "render", "json")
+FAKEKUBE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakekube.py")
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+class FakeKube:
+    """In-process stand-in for cnpgscope.Kubectl, serving a Fleet."""
+
+    def __init__(self, fleet: Fleet):
+        self.fleet = fleet
+        self.lists = 0
+        self.execs = 0
+        self.failed = 0
+        self.hung = 0
+
+    def items(self, resource: str, ns: str | None = None, selector: str | None = None,
+              fields: str | None = None) -> Iterator[dict]:
+        self.lists += 1
+        yield from self.fleet.clusters()
+
+    def pods(self, ns: str | None, selector: str) -> list[dict]:
+        self.lists += 1
+        return [cnpgscope._lean_pod(p) for p in self.fleet.pods()]
+
+    def get(self, path: str) -> dict:
+        """Only the kubelet /stats/summary proxy (--pvc-source kubelet)."""
+        self.lists += 1
+        time.sleep(self.fleet.outcome(path, "kubelet")[1])
+        return self.fleet.stats_summary(path.split("/")[4])
+
+    async def exec(self, ns: str, pod: str, script: str,
+                   timeout: float) -> tuple[bool, str]:
+        return await self._run(pod, "exec", lambda: self.fleet.df_output(pod, script),
+                               pg_sleep="pg_sleep" in script)
+
+    async def psql(self, ns: str, pod: str, sql: str | list[str], timeout: float,
+                   db: str = "") -> tuple[bool, str]:
+        text = sql if isinstance(sql, str) else " ".join(sql)
+        return await self._run(pod, "psql", lambda: self.fleet.psql_output(pod, text),
+                               pg_sleep="pg_sleep" in text)
+
+    async def _run(self, pod: str, kind: str, output: Callable[[], str],
+                   pg_sleep: bool) -> tuple[bool, str]:
+        self.execs += 1
+        result, secs = self.fleet.outcome(pod, kind)
+        if pg_sleep:
+            secs += cnpgscope.SAMPLE_WINDOW
+        if result == "hang":
+            self.hung += 1
+            await asyncio.sleep(3600)       # cancelled by ProbeEngine's timeout
+        await asyncio.sleep(secs)
+        if result == "fail":
+            self.failed += 1
+            return False, ""
+        return True, output()
+
+
+class CountingKubectl(cnpgscope.Kubectl):
+    """cnpgscope.Kubectl pointed at fakekube.py, counting the calls it forks."""
+
+    def __init__(self, binary: str):
+        super().__init__(binary, None)
+        self.lists = 0
+        self.execs = 0
+        self.failed = 0
+        self.hung = 0
+
+    def _run(self, args: list[str], timeout: int) -> str:
+        self.lists += 1
+        return super()._run(args, timeout)
+
+    async def _arun(self, args: list[str], timeout: float) -> tuple[bool, str]:
+        self.execs += 1
+        try:
+            ok, out = await super()._arun(args, timeout)
+        except asyncio.CancelledError:
+            self.hung += 1                  # ProbeEngine's timeout killed it
+            raise
+        self.failed += not ok
+        return ok, out
+
+
+# ---------------------------------------------------------------------------
+# One measured scan (runs in its own process, so peak RSS is per fleet size)
+# ---------------------------------------------------------------------------
+def _rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_one(fleet: Fleet, backend: str) -> dict:
+    base_rss = _rss_bytes()
+    if backend == "kubectl":
+        os.environ[FLEET_ENV] = json.dumps(asdict(fleet))
+        kc: FakeKube | CountingKubectl = CountingKubectl(FAKEKUBE)
+    else:
+        kc = FakeKube(fleet)
+    secs: dict[str, float] = {}
+
+    t = time.perf_counter()
+    clusters = cnpgscope.discover(kc, None, None)
+    secs["discover"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    if cnpgscope.PVC_SOURCE == "kubelet":
+        cnpgscope.fill_pvc_from_kubelet(kc, clusters)
+    cnpgscope.enrich(kc, clusters)
+    secs["enrich"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    verdicts = cnpgscope.evaluate_fleet(clusters)
+    secs["evaluate"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    cnpgscope.render(clusters, verdicts, details=False)
+    secs["render"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    with open(os.devnull, "w") as sink:
+        cnpgscope.write_json({"clusters": (cnpgscope.to_dict(c, verdicts[c.key])
+                                           for c in clusters)}, sink)
+    secs["json"] = time.perf_counter() - t
+    return {
+        "instances": fleet.instances,
+        "clusters": len(clusters),
+        "seconds": {k: round(v, 4) for k, v in secs.items()},
+        "wallSeconds": round(sum(secs.values()), 4),
+        "lists": kc.lists,
+        "execs": kc.execs,
+        "execsFailed": kc.failed,
+        "execsHung": kc.hung,
+        "verdicts": {s: sum(v == s for v in verdicts.values())
+                     for s in (cnpgscope.CRIT, cnpgscope.WARN, cnpgscope.UNKNOWN,
+                               cnpgscope.OK)},
+        "peakRssBytes": _rss_bytes(),
+        "scanRssBytes": _rss_bytes() - base_rss,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+def render_results(results: list[dict], backend: str, fleet: Fleet) -> str:
+    headers = ["INSTANCES", "CLUSTERS", *(p.upper() for p in PHASES), "WALL",
+               "EXECS", "FAILED", "HUNG", "PEAK RSS", "SCAN RSS"]
+    rows = [[str(r["instances"]), str(r["clusters"]),
+             *(f"{r['seconds'][p]:.3f}s" for p in PHASES), f"{r['wallSeconds']:.2f}s",
+             str(r["execs"]), str(r["execsFailed"]), str(r["execsHung"]),
+             cnpgscope.human_bytes(r["peakRssBytes"]),
+             cnpgscope.human_bytes(r["scanRssBytes"])]
+            for r in results]
+    widths = [max(len(h), *(len(r[i]) for r in rows)) if rows else len(h)
+              for i, h in enumerate(headers)]
+    lines = [f"cnpgscope bench — backend {backend}, exec latency median "
+             f"{fleet.latency:g}s (sigma {fleet.sigma:g}), fail {fleet.fail_rate:g}, "
+             f"hang {fleet.hang_rate:g}; workers {cnpgscope.EXEC_WORKERS}, per-node "
+             f"{cnpgscope.EXEC_PER_NODE}, per-namespace {cnpgscope.EXEC_PER_NAMESPACE}, "
+             f"timeout {cnpgscope.EXEC_TIMEOUT:g}s", ""]
+    lines.append("  ".join(h.ljust(widths[i]) for i, h in enumerate(headers)))
+    lines += ["  ".join(c.rjust(widths[i]) for i, c in enumerate(r)) for r in rows]
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# main
+# ---------------------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    ap = argparse.ArgumentParser(
+        prog="bench",
+        description="Benchmark cnpgscope against a synthetic CNPG fleet.")
+    ap.add_argument("--instances", type=int, nargs="+", default=[10, 100, 1000, 5000],
+                    help="fleet sizes to run, in instances (default: 10 100 1000 5000)")
+    ap.add_argument("--backend", choices=["fake", "kubectl"], default="fake",
+                    help="fake: in-process (default); kubectl: fork fakekube.py per call")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--latency", type=float, default=0.05,
+                    help="median simulated exec latency, seconds (default: 0.05)")
+    ap.add_argument("--sigma", type=float, default=0.5,
+                    help="lognormal spread of the exec latency (default: 0.5)")
+    ap.add_argument("--fail-rate", type=float, default=0.0,
+                    help="fraction of execs that exit non-zero")
+    ap.add_argument("--hang-rate", type=float, default=0.0,
+                    help="fraction of execs that never return (hit --exec-timeout)")
+    ap.add_argument("--down-rate", type=float, default=0.02,
+                    help="fraction of pods CrashLooping (default: 0.02)")
+    ap.add_argument("--workers", type=int, default=cnpgscope.EXEC_WORKERS)
+    ap.add_argument("--per-node", type=int, default=cnpgscope.EXEC_PER_NODE)
+    ap.add_argument("--per-namespace", type=int, default=cnpgscope.EXEC_PER_NAMESPACE)
+    ap.add_argument("--exec-timeout", type=float, default=2.0,
+                    help="cnpgscope --exec-timeout for the run (default: 2)")
+    ap.add_argument("--sample-window", type=float, default=cnpgscope.SAMPLE_WINDOW,
+                    help="cnpgscope --sample-window; adds to every sampled exec's "
+                         f"latency (default: the CLI's, {cnpgscope.SAMPLE_WINDOW:g})")
+    ap.add_argument("--pvc-source", choices=["exec", "kubelet"], default="exec",
+                    help="cnpgscope --pvc-source (kubelet: one stats call per node, "
+                         "timed under enrich)")
+    ap.add_argument("-o", "--output", choices=["text", "json"], default="text")
+    ap.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    cnpgscope.EXEC_WORKERS, cnpgscope.EXEC_PER_NODE = args.workers, args.per_node
+    cnpgscope.EXEC_PER_NAMESPACE = args.per_namespace
+    cnpgscope.EXEC_TIMEOUT, cnpgscope.SAMPLE_WINDOW = args.exec_timeout, args.sample_window
+    cnpgscope.PVC_SOURCE = args.pvc_source
+
+    def fleet(n: int) -> Fleet:
+        return Fleet(instances=n, seed=args.seed, latency=args.latency, sigma=args.sigma,
+                     fail_rate=args.fail_rate, hang_rate=args.hang_rate,
+                     down_rate=args.down_rate)
+
+    if args.one is not None:
+        # Child: one fleet size. cnpgscope's per-probe warnings are noise here.
+        sys.stderr = open(os.devnull, "w")
+        print(json.dumps(run_one(fleet(args.one), args.backend)))
+        return 0
+
+    results = []
+    for n in args.instances:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), *argv,
+                               "--one", str(n)], capture_output=True, text=True)
+        if proc.returncode:
+            print(f"error: {n} instances: {proc.stderr.strip()}", file=sys.stderr)
+            return 1
+        results.append(json.loads(proc.stdout))
+        if args.output == "text":
+            print(f"  {n} instances: {results[-1]['wallSeconds']:.2f}s", file=sys.stderr)
+    if args.output == "json":
+        print(json.dumps({"backend": args.backend, "fleet": asdict(fleet(0)),
+                          "workers": args.workers, "perNode": args.per_node,
+                          "perNamespace": args.per_namespace,
+                          "execTimeout": args.exec_timeout, "results": results}, indent=2))
+    else:
+        print(render_results(results, args.backend, fleet(0)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
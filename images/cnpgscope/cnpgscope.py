@@ -20,28 +20,83 @@ What it reports, per cluster:
     slots            (inactive slots pinning WAL are the #1 risk).
   * WAL              pg_wal size vs the instance PVC size (fill fraction).
   * PVC usage        %% full per instance PVC (WARN >75%%, CRIT >85%%).
-  * Replication lag  streaming vs lagging replicas (bytes behind primary).
-  * Backups          continuous-archiving health + last successful backup age.
+  * Replication lag  streaming vs lagging replicas (bytes behind primary),
+                     and each replica's replay delay and apply vs receive rate.
+  * Backups          continuous-archiving health + last successful backup age;
+                     WAL generated vs archived per second and the archive backlog.
+  * Postgres         long / idle-in-transaction backends, XID wraparound age,
+    internals        checkpoint pressure, worst dead-tuple ratios.
   * Verdict          OK / WARN / CRITICAL so the fleet is scannable at a glance.
 
 Data sources (all READ-ONLY — cnpgscope NEVER mutates anything):
   * `kubectl get clusters.postgresql.cnpg.io -A -o json` — desired/ready,
     primary, conditions (ContinuousArchiving, LastBackupSucceeded),
     lastSuccessfulBackup, storage size.
-  * `kubectl get pods -A -l cnpg.io/cluster -o json` — per-instance phase +
-    container readiness + role.
-  * `kubectl exec <pod> -c postgres -- df / du` — per-instance PVC fill and
-    pg_wal size (skip with --no-exec for a fast, exec-free pass).
-  * `kubectl exec <primary> -c postgres -- psql` — pg_replication_slots and
-    pg_stat_replication (retained WAL per slot, streaming lag).
+  * `kubectl get pods -A -l cnpg.io/cluster -o jsonpath=...` — per-instance
+    phase + container readiness + role + node. Both lists are scoped on the
+    server (-n → namespace, --cluster → field/label selector) and reduced to
+    lean records: only the fields read here are ever decoded or kept.
+  * `kubectl exec <pod> -c postgres -- df / psql` — per-instance PVC fill and
+    pg_wal size, the latter from `pg_ls_waldir()` (du only as a fallback, or
+    with --wal-probe du); on replicas also the receive/replay LSNs and last
+    replayed commit, whose progress since an earlier scan gives the receive
+    and apply rates (or within the exec, with --sample-window). Skip with
+    --no-exec for a fast, exec-free pass.
+  * `kubectl get --raw /api/v1/nodes/<node>/proxy/stats/summary` — with
+    --pvc-source kubelet, PVC fill for every instance on a node in one call
+    (those instances skip df; works under --no-exec too).
+  * `kubectl exec <primary> -c postgres -- psql` — pg_replication_slots,
+    pg_stat_replication, pg_stat_activity, pg_database, pg_stat_checkpointer
+    (pg_stat_bgwriter before 17), pg_stat_user_tables and pg_stat_archiver,
+    batched into one tagged, JSON-framed statement so each primary costs a
+    single exec; WAL and archive rates come from the WAL position and last
+    archived segment's progress since an earlier scan. With
+    --sql-backend direct these run instead over pooled, read-only libpq
+    connections to each cluster's -rw service (psycopg; typed rows, no exec).
+
+  Execs run concurrently on an asyncio engine, bounded fleet-wide (--workers),
+  per node (--per-node) and per namespace (--per-namespace); a probe that
+  overruns --exec-timeout is cancelled and its cluster reads UNKNOWN.
+
+  With --backend api the same reads go straight to the API server (pooled
+  HTTPS for lists, the pod `exec` subresource over WebSocket for df/du/psql)
+  instead of forking one kubectl per call; kubectl is only used once, to
+  resolve the context's credentials.
 
 Usage:
   cnpgscope.py                      # whole fleet, colored table + detail
   cnpgscope.py -n immich-prod       # one namespace
   cnpgscope.py --cluster immich-db-prod-cnpg-v3
   cnpgscope.py --no-exec            # CRD-only, no pod exec (fast / low-priv)
+  cnpgscope.py --pvc-source kubelet # PVC fill from kubelet stats, not df
   cnpgscope.py -o json              # machine-readable
+  cnpgscope.py -o ndjson            # one line per cluster as it settles + summary
+  cnpgscope.py --diff last.json     # only clusters that moved since a saved scan
   cnpgscope.py --context <ctx>      # target a specific kube-context
+  cnpgscope.py --context a --context b   # several contexts, one run
+  cnpgscope.py --all-contexts       # every context in the kubeconfig
+  cnpgscope.py --backend api        # native API client, no kubectl fan-out
+  cnpgscope.py --sql-backend direct # primary SQL over pooled libpq, not exec
+  cnpgscope.py --serve              # Prometheus exporter on :9108/metrics
+  cnpgscope.py --watch              # live top-style view (s sort, r refresh, q quit)
+  cnpgscope.py --history ~/.local/state/cnpgscope   # + growth / time-to-full
+  cnpgscope.py --thresholds limits.json   # per-namespace/cluster limits, extra rules
+  cnpgscope.py --deadline 3         # answer within 3s; stragglers → UNKNOWN
+  cnpgscope.py --refresh            # ignore the snapshot cache for this run
+  cnpgscope.py --profile            # + per-phase / per-node timing, slowest pods
+
+On a terminal, rows stream out as each cluster's probes finish (--no-stream
+for the sorted table at the end); --deadline bounds the whole run. Lists and
+probe results are cached per context for --cache-ttl seconds (probe results
+keyed by pod resourceVersion), so repeated, narrower queries during an
+incident come back without touching the cluster.
+
+With --serve it stays resident instead: the fleet is refreshed every
+--interval seconds in the background and the last snapshot is served as
+Prometheus gauges (verdict, PVC %, WAL fraction, slot retention, lag) on
+/metrics, with /healthz failing once refreshes stop succeeding. Discovery is
+list+watch there; changed pods are re-exec'd at once, everything else on an
+adaptive interval (faster near thresholds) within a per-minute exec budget.
 
 Exit code is the worst verdict found: 0 OK, 1 WARN or UNKNOWN, 2 CRITICAL (handy
 for cron / CI gating — an unprobeable fleet fails the gate too). --exit-zero
@@ -51,16 +106,46 @@ forces 0.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import base64
 import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import http.client
 import json
+import logging
+import math
+import operator
 import os
+import re
+import select
+import shutil
+import socket
+import ssl
+import string
+import struct
 import subprocess
 import sys
+import tempfile
+import threading
 import time
-from dataclasses import dataclass, field
+import urllib.parse
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Awaitable, Callable, Iterable, Iterator
+
+try:
+    import psycopg          # optional: only --sql-backend direct needs it
+    from psycopg.rows import dict_row
+except ImportError:
+    psycopg = None
+
+log = logging.getLogger("cnpgscope")
 
 # ---------------------------------------------------------------------------
-# Thresholds (all overridable via --* flags). Chosen from the Immich outage:
+# Default thresholds (the RULES limits; override per namespace / cluster with
+# --thresholds, or PVC fill with --pvc-warn/--pvc-crit). Chosen from the Immich outage:
 # a 10Gi PVC at 76% with pg_wal already 68% of the volume, pinned by a 6.5G
 # inactive slot, was minutes from the failure that took the cluster down.
 # ---------------------------------------------------------------------------
@@ -76,10 +161,44 @@ SLOT_WARN_BYTES = 512 * 1024**2       # inactive slot retaining >512Mi of WAL
 SLOT_CRIT_BYTES = 2 * 1024**3         # ...or >2Gi (or wal_status lost) => CRIT
 LAG_WARN_BYTES = 64 * 1024**2         # streaming replica >64Mi behind
 LAG_CRIT_BYTES = 512 * 1024**2        # ...or >512Mi => CRIT
+REPLAY_DELAY_WARN = 5 * 60            # replica's last replayed commit >5m old, WAL pending
+REPLAY_DELAY_CRIT = 30 * 60           # ...or >30m
+APPLY_KEEPUP_RATIO = 0.9              # replica applying <90% of the WAL rate coming in...
+APPLY_PENDING_MIN = 16 * 1024**2      # ...with at least a segment received, not yet applied
 BACKUP_WARN_AGE = 26 * 3600           # last successful backup older than ~1d
 BACKUP_CRIT_AGE = 49 * 3600           # ...or ~2d
+TTF_WARN = 24 * 3600                  # --history: volume full within a day at current growth
+TTF_CRIT = 6 * 3600                   # ...or within 6h => CRIT
+XACT_WARN_AGE = 15 * 60               # a transaction open >15m (bloat, lock pile-ups)
+XACT_CRIT_AGE = 60 * 60               # ...or >1h
+IDLE_XACT_WARN_AGE = 5 * 60           # "idle in transaction" for >5m
+XID_WARN_AGE = 1_000_000_000          # age(datfrozenxid): ~47% of the 2^31 wraparound limit
+XID_CRIT_AGE = 1_500_000_000          # ...~70% => CRIT (anti-wraparound vacuum isn't keeping up)
+CKPT_REQ_WARN = 0.5                   # >50% of checkpoints forced (max_wal_size too small)
+CKPT_MIN_COUNT = 10                   # ...judged only once this many have happened
+CKPT_SYNC_WARN = 10.0                 # mean checkpoint fsync >10s (storage can't keep up)
+DEAD_WARN_RATIO = 0.2                 # a table >20% dead tuples (autovacuum behind)
+DEAD_CRIT_RATIO = 0.5                 # ...or >50%
+DEAD_MIN_TUPLES = 10_000              # ignore tables with fewer dead tuples than this
+ARCHIVE_BACKLOG_WARN = 256 * 1024**2  # WAL segments .ready but not archived yet >256Mi
+ARCHIVE_BACKLOG_CRIT = 2 * 1024**3    # ...or >2Gi (pinned in pg_wal like a stale slot)
+ARCHIVE_KEEPUP_RATIO = 0.9            # archiving <90% of the WAL rate being written...
+ARCHIVE_KEEPUP_MIN_BACKLOG = 64 * 1024**2   # ...with at least 4 segments already waiting
 EXEC_TIMEOUT = 20                     # seconds per kubectl exec
-EXEC_WORKERS = 12                     # parallel exec fan-out
+SNAPSHOT_TTL = 60.0                   # seconds a cached fleet snapshot is reused
+EXEC_WORKERS = 12                     # parallel exec fan-out (global)
+EXEC_PER_NODE = 4                     # ...at most this many execs per kubelet
+EXEC_PER_NAMESPACE = 6                # ...and per namespace
+REFRESH_DEBOUNCE = 2.0                # --serve/--watch: min gap after a watch-triggered refresh
+PROBE_COST_GUESS = 1.0                # --serve: assumed exec seconds of a never-timed probe
+SAMPLE_WINDOW = 0.0                   # seconds between two in-exec samples (0: one sample)
+RATE_WINDOW = 600.0                   # rates across scans: against a position up to 10m old...
+RATE_MIN_SPAN = 10.0                  # ...and at least 10s old
+ARCHIVE_RATE_MIN_SPAN = 120.0         # archiving advances a segment at a time: judge it over 2m+
+
+WAL_PROBE = "sql"                     # pg_wal size: sql (pg_ls_waldir, du fallback) | du
+PVC_SOURCE = "exec"                   # PVC fill: exec (df) | kubelet (/stats/summary per node)
+SQL_DSN = "host={cluster}-rw.{namespace}.svc dbname={database}"   # --sql-backend direct
 
 PGDATA = "/var/lib/postgresql/data"
 PGWAL = f"{PGDATA}/pgdata/pg_wal"
@@ -154,6 +273,100 @@ def human_age(seconds: float | None) -> str:
     return f"{hours // 24}d"
 
 
+# ---------------------------------------------------------------------------
+# Profiling (--profile): wall time per phase, per pod and per node
+# ---------------------------------------------------------------------------
+# Report order; anything else recorded sorts after these.
+_PHASES = ["api", "decode", "build", "queue", "exec", "psql", "parse",
+           "evaluate", "render"]
+
+
+class Profiler:
+    """Wall-time samples per phase. Off unless --profile: the resident
+    exporter must not grow a sample list forever."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.start = time.monotonic()
+        self.phases: dict[str, list[float]] = {}
+        self.pods: list[tuple[float, str, str, str]] = []   # secs, phase, pod, node
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, secs: float, pod: str | None = None,
+            node: str | None = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.phases.setdefault(phase, []).append(secs)
+            if pod is not None:
+                self.pods.append((secs, phase, pod, node or ""))
+
+    @contextlib.contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(phase, time.monotonic() - start)
+
+    def report(self, top: int) -> dict:
+        order = {p: i for i, p in enumerate(_PHASES)}
+        by_node: dict[str, list[float]] = {}
+        for secs, _, _, node in self.pods:
+            by_node.setdefault(node or "?", []).append(secs)
+        return {
+            "wallSeconds": round(time.monotonic() - self.start, 4),
+            "phases": {p: _stats(v) for p, v in sorted(
+                self.phases.items(), key=lambda kv: (order.get(kv[0], len(order)), kv[0]))},
+            "nodes": {n: _stats(v) for n, v in sorted(by_node.items())},
+            "slowest": [{"pod": pod, "node": node, "phase": phase,
+                         "seconds": round(secs, 4)}
+                        for secs, phase, pod, node in sorted(self.pods, reverse=True)[:top]],
+        }
+
+
+def _stats(samples: list[float]) -> dict:
+    v = sorted(samples)
+
+    def pct(q: float) -> float:
+        # Nearest-rank: an actual observed sample, never an interpolation.
+        return round(v[max(0, math.ceil(q * len(v)) - 1)], 4)
+
+    return {"count": len(v), "totalSeconds": round(sum(v), 4),
+            "p50": pct(0.50), "p95": pct(0.95), "max": round(v[-1], 4)}
+
+
+def render_profile(rep: dict) -> str:
+    out = [_c(f"Profile  (wall {rep['wallSeconds']:.2f}s)", C.BOLD)]
+    headers = ["PHASE", "N", "TOTAL", "P50", "P95", "MAX"]
+
+    def table(rows: dict[str, dict], first: str) -> None:
+        cells = [[first] + headers[1:]] + [
+            [name, str(st["count"]), f"{st['totalSeconds']:.3f}s", f"{st['p50']:.3f}s",
+             f"{st['p95']:.3f}s", f"{st['max']:.3f}s"] for name, st in rows.items()]
+        widths = [max(len(r[i]) for r in cells) for i in range(len(headers))]
+        for n, r in enumerate(cells):
+            line = "  ".join(_pad(_c(x, C.BOLD) if n == 0 else x, widths[i])
+                             for i, x in enumerate(r))
+            out.append("  " + line.rstrip())
+
+    out.append("")
+    table(rep["phases"], "PHASE")
+    if rep["nodes"]:
+        out.append("")
+        table(rep["nodes"], "NODE (exec+psql)")
+    if rep["slowest"]:
+        out.append("")
+        out.append(_c(f"  Slowest {len(rep['slowest'])} probes", C.BOLD))
+        for s in rep["slowest"]:
+            out.append(f"  {s['seconds']:8.3f}s  {s['phase']:<4}  {s['pod']}"
+                       + (f"  on {s['node']}" if s["node"] else ""))
+    return "\n".join(out)
+
+
+PROFILE = Profiler()
+
+
 # ---------------------------------------------------------------------------
 # kubectl plumbing
 # ---------------------------------------------------------------------------
@@ -164,27 +377,59 @@ class Kubectl:
             self.base += ["--context", context]
 
     def json(self, *args: str) -> dict:
-        out = self._run(list(args), timeout=60)
-        return json.loads(out) if out else {}
+        with PROFILE.span("api"):
+            out = self._run(list(args), timeout=60)
+        with PROFILE.span("decode"):
+            return json.loads(out) if out else {}
 
-    def exec(self, ns: str, pod: str, script: str) -> tuple[bool, str]:
-        """Run a read-only shell snippet in the pod's postgres container."""
-        args = ["exec", "-n", ns, pod, "-c", "postgres", "--",
-                "bash", "-c", script]
-        try:
-            out = self._run(args, timeout=EXEC_TIMEOUT)
-            return True, out
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-            return False, ""
-
-    def psql(self, ns: str, pod: str, sql: str) -> tuple[bool, str]:
-        args = ["exec", "-n", ns, pod, "-c", "postgres", "--",
-                "psql", "-qtAF", "|", "-c", sql]
+    def list(self, resource: str, ns: str | None = None,
+             selector: str | None = None, fields: str | None = None) -> dict:
+        return self.json(*self._get_args(resource, ns, selector, fields), "-o", "json")
+
+    def items(self, resource: str, ns: str | None = None, selector: str | None = None,
+              fields: str | None = None) -> Iterator[dict]:
+        yield from self.list(resource, ns, selector, fields).get("items", [])
+
+    def pods(self, ns: str | None, selector: str) -> list[dict]:
+        """Lean pod records (see _lean_pod). kubectl projects the handful of
+        fields we read with a jsonpath template, so this process parses a few
+        short lines per pod instead of every pod's full JSON."""
+        args = self._get_args("pods", ns, selector, None)
+        with PROFILE.span("api"):
+            out = self._run(args + ["-o", f"jsonpath={_POD_JSONPATH}"], timeout=60)
+        with PROFILE.span("decode"):
+            return [_pod_from_jsonpath(ln) for ln in out.splitlines() if ln]
+
+    @staticmethod
+    def _get_args(resource: str, ns: str | None, selector: str | None,
+                  fields: str | None) -> list[str]:
+        args = ["get", resource]
+        args += ["-n", ns] if ns else ["-A"]
+        if selector:
+            args += ["-l", selector]
+        if fields:
+            args += ["--field-selector", fields]
+        return args
+
+    def get(self, path: str) -> dict:
+        return self.json("get", "--raw", path)
+
+    def stream(self, path: str) -> Iterator[bytes]:
+        """Lines of a streaming API response (a watch), via `get --raw`."""
+        proc = subprocess.Popen(self.base + ["get", "--raw", path],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         try:
-            out = self._run(args, timeout=EXEC_TIMEOUT)
-            return True, out
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-            return False, ""
+            assert proc.stdout is not None
+            yield from proc.stdout
+            proc.wait()
+            if proc.returncode:
+                err = proc.stderr.read() if proc.stderr else b""
+                raise subprocess.CalledProcessError(proc.returncode, proc.args,
+                                                    stderr=err.decode("utf-8", "replace"))
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
 
     def _run(self, args: list[str], timeout: int) -> str:
         proc = subprocess.run(
@@ -193,11 +438,476 @@ class Kubectl:
         )
         return proc.stdout
 
+    # -- exec (awaited by ProbeEngine) --------------------------------------
+    async def exec(self, ns: str, pod: str, script: str,
+                   timeout: float) -> tuple[bool, str]:
+        """Run a read-only shell snippet in the pod's postgres container."""
+        return await self._arun(["exec", "-n", ns, pod, "-c", "postgres", "--",
+                                 "bash", "-c", script], timeout)
+
+    async def psql(self, ns: str, pod: str, sql: str | list[str], timeout: float,
+                   db: str = "") -> tuple[bool, str]:
+        return await self._arun(["exec", "-n", ns, pod, "-c", "postgres", "--",
+                                 *_psql_argv(sql, db)], timeout)
+
+    async def _arun(self, args: list[str], timeout: float) -> tuple[bool, str]:
+        proc = await asyncio.create_subprocess_exec(
+            *self.base, *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        finally:
+            # Timed out (or the engine gave up on it): never leave a kubectl
+            # exec behind.
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        return proc.returncode == 0, out.decode("utf-8", "replace")
+
+
+def _psql_argv(sql: str | list[str], db: str) -> list[str]:
+    """psql argv; several statements run in order in the one session.
+
+    ON_ERROR_STOP: without it psql's exit status is that of the last -c only,
+    so a failed batch followed by a good WAL resample would read as success.
+    """
+    stmts = [sql] if isinstance(sql, str) else sql
+    return ["psql", "-qtAF", "|", "-v", "ON_ERROR_STOP=1", *(["-d", db] if db else []),
+            *(arg for st in stmts for arg in ("-c", st))]
+
+
+class KubeAPIError(RuntimeError):
+    """A non-2xx answer (or an unusable credential) from the API server."""
+
+    def __init__(self, msg: str, status: int | None = None):
+        super().__init__(msg)
+        self.status = status
+
+
+# resource name (as kubectl spells it) -> (API group path, plural)
+_API_RESOURCES = {
+    "pods": ("/api/v1", "pods"),
+    "clusters.postgresql.cnpg.io": ("/apis/postgresql.cnpg.io/v1", "clusters"),
+}
+_SA_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+WATCH_TIMEOUT = 300                   # server-side timeoutSeconds per watch
+
+
+LIST_PAGE = 500                       # items per paginated list call (--backend api)
+
+
+def api_path(resource: str, ns: str | None = None, **params: object) -> str:
+    """REST path for a list/watch of `resource` (kubectl's spelling)."""
+    group, plural = _API_RESOURCES[resource]
+    path = f"{group}/namespaces/{ns}/{plural}" if ns else f"{group}/{plural}"
+    query = {k: v for k, v in params.items() if v not in (None, "")}
+    return path + ("?" + urllib.parse.urlencode(query) if query else "")
+
+
+class KubeAPI:
+    """Native API-server backend — the same interface as `Kubectl`, no forks.
+
+    `Kubectl` spawns one process per call, and every one of them re-parses the
+    kubeconfig and does a fresh TLS handshake. At fleet scale the exec fan-out
+    is hundreds of those per scan. This backend resolves credentials ONCE
+    (in-cluster ServiceAccount, or a single `kubectl config view --raw` for the
+    selected context) and then talks HTTPS directly:
+
+      * list/get go over a keep-alive `http.client` connection (one per worker
+        thread, reused for the whole scan);
+      * exec/psql use the pod `exec` subresource over WebSocket
+        (`v4.channel.k8s.io`), resuming the cached TLS session so each stream
+        skips the full handshake.
+
+    Semantics match `Kubectl`: `exec`/`psql` return (ok, stdout) where ok means
+    "ran and exited 0"; list errors raise (here `KubeAPIError`).
+
+    Credentials don't live forever — projected ServiceAccount tokens rotate
+    (about hourly) and exec-plugin tokens expire — so a 401 re-resolves them
+    once and retries, which keeps a resident --serve / --watch authenticated.
+    """
+
+    def __init__(self, binary: str, context: str | None):
+        self._binary, self._context = binary, context
+        self.server, self.ssl_ctx, self._token = _load_credentials(binary, context)
+        self._auth_lock = threading.Lock()
+        u = urllib.parse.urlsplit(self.server)
+        if u.scheme != "https" or not u.hostname:
+            raise KubeAPIError(f"unsupported API server URL: {self.server}")
+        self.host = u.hostname
+        self.port = u.port or 443
+        self.prefix = u.path.rstrip("/")
+        self._local = threading.local()
+        self._session_lock = threading.Lock()
+        self._tls_session: ssl.SSLSession | None = None
+
+    # -- list/get -----------------------------------------------------------
+    def list(self, resource: str, ns: str | None = None,
+             selector: str | None = None, fields: str | None = None) -> dict:
+        return self.get(api_path(resource, ns, labelSelector=selector,
+                                 fieldSelector=fields))
+
+    def items(self, resource: str, ns: str | None = None, selector: str | None = None,
+              fields: str | None = None) -> Iterator[dict]:
+        """Every item, LIST_PAGE at a time: one page of full JSON is decoded
+        and let go before the next is fetched, so peak memory is a page, not
+        the fleet."""
+        token = ""
+        while True:
+            page = self.get(api_path(resource, ns, labelSelector=selector,
+                                     fieldSelector=fields, limit=LIST_PAGE,
+                                     **{"continue": token}))
+            yield from page.get("items", [])
+            token = page.get("metadata", {}).get("continue", "")
+            if not token:
+                return
+
+    def pods(self, ns: str | None, selector: str) -> list[dict]:
+        """Lean pod records (see _lean_pod), projected page by page."""
+        return [_lean_pod(p) for p in self.items("pods", ns, selector)]
+
+    def get(self, path: str) -> dict:
+        with PROFILE.span("api"):
+            body = self._request(path)
+        with PROFILE.span("decode"):
+            return json.loads(body) if body else {}
+
+    def stream(self, path: str) -> Iterator[bytes]:
+        """Lines of a streaming API response (a watch) on its own connection."""
+        token = self._token
+        conn = http.client.HTTPSConnection(self.host, self.port, context=self.ssl_ctx,
+                                           timeout=WATCH_TIMEOUT + 30)
+        try:
+            conn.request("GET", self.prefix + path,
+                         headers={"Accept": "application/json", **self._auth_headers()})
+            resp = conn.getresponse()
+            if resp.status == 401:
+                self._reauth(token)       # the watch loop relists, then resumes
+            if resp.status != 200:
+                raise KubeAPIError(f"GET {path}: {resp.status} {resp.reason}", resp.status)
+            while True:
+                line = resp.readline()
+                if not line:
+                    return
+                yield line
+        finally:
+            conn.close()
+
+    def _request(self, path: str) -> bytes:
+        # One retry on a dropped keep-alive connection (server idle timeout),
+        # and one on a 401 after re-resolving the credentials.
+        dropped = reauthed = False
+        while True:
+            token = self._token
+            headers = {"Accept": "application/json", **self._auth_headers()}
+            conn = self._conn()
+            try:
+                conn.request("GET", self.prefix + path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                self._local.conn = None
+                if dropped:
+                    raise
+                dropped = True
+                continue
+            if resp.status == 401 and not reauthed and self._reauth(token):
+                reauthed = True
+                continue
+            if resp.status != 200:
+                raise KubeAPIError(f"GET {path}: {resp.status} {resp.reason}: "
+                                   f"{body[:200].decode('utf-8', 'replace')}", resp.status)
+            return body
+
+    def _conn(self) -> http.client.HTTPSConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPSConnection(self.host, self.port,
+                                               context=self.ssl_ctx, timeout=60)
+            self._local.conn = conn
+        return conn
+
+    def _auth_headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self._token}"} if self._token else {}
+
+    def _reauth(self, stale: str | None) -> bool:
+        """Re-resolve credentials after a 401 made with token `stale`; True
+        if the caller should retry. Concurrent 401s refresh only once."""
+        with self._auth_lock:
+            if self._token != stale:
+                return True               # another thread already refreshed
+            try:
+                _, ctx, token = _load_credentials(self._binary, self._context)
+            except (subprocess.SubprocessError, OSError, ValueError, KubeAPIError) as exc:
+                log.warning("re-reading API credentials failed: %s", exc)
+                return False
+            # A new context may carry a renewed client cert: drop the pooled
+            # connections and TLS session made with the old one.
+            self.ssl_ctx, self._token = ctx, token
+            self._local = threading.local()
+            with self._session_lock:
+                self._tls_session = None
+            return True
+
+    # -- exec ---------------------------------------------------------------
+    async def exec(self, ns: str, pod: str, script: str,
+                   timeout: float) -> tuple[bool, str]:
+        """Run a read-only shell snippet in the pod's postgres container.
+
+        The WebSocket exec is blocking socket I/O bounded by `timeout` (a
+        thread can't be cancelled, so the socket deadline is what ends it);
+        it runs on the event loop's worker pool, sized by ProbeEngine."""
+        return await asyncio.to_thread(self._exec_ok, ns, pod,
+                                       ["bash", "-c", script], timeout)
+
+    async def psql(self, ns: str, pod: str, sql: str | list[str], timeout: float,
+                   db: str = "") -> tuple[bool, str]:
+        return await asyncio.to_thread(self._exec_ok, ns, pod, _psql_argv(sql, db), timeout)
+
+    def _exec_ok(self, ns: str, pod: str, command: list[str],
+                 timeout: float) -> tuple[bool, str]:
+        for attempt in (0, 1):
+            token = self._token
+            try:
+                code, out = self._ws_exec(ns, pod, command, timeout)
+            except KubeAPIError as exc:
+                if exc.status == 401 and not attempt and self._reauth(token):
+                    continue
+                return False, ""
+            except (OSError, ValueError):
+                return False, ""
+            return code == 0, out if code == 0 else ""
+        return False, ""
+
+    def _ws_exec(self, ns: str, pod: str, command: list[str],
+                 timeout: float) -> tuple[int | None, str]:
+        deadline = time.monotonic() + timeout
+        query = urllib.parse.urlencode(
+            [("container", "postgres"), ("stdout", "true"), ("stderr", "true")]
+            + [("command", arg) for arg in command])
+        path = (f"{self.prefix}/api/v1/namespaces/{ns}/pods/{pod}/exec?{query}")
+        raw = socket.create_connection((self.host, self.port), timeout=timeout)
+        with self._session_lock:
+            session = self._tls_session
+        try:
+            sock = self.ssl_ctx.wrap_socket(raw, server_hostname=self.host,
+                                            session=session)
+        except ssl.SSLError:
+            # A stale/rejected session ticket must not fail the probe.
+            raw.close()
+            raw = socket.create_connection((self.host, self.port), timeout=timeout)
+            sock = self.ssl_ctx.wrap_socket(raw, server_hostname=self.host)
+        with sock:
+            key = base64.b64encode(os.urandom(16)).decode()
+            lines = [
+                f"GET {path} HTTP/1.1",
+                f"Host: {self.host}:{self.port}",
+                "Upgrade: websocket",
+                "Connection: Upgrade",
+                f"Sec-WebSocket-Key: {key}",
+                "Sec-WebSocket-Version: 13",
+                "Sec-WebSocket-Protocol: v4.channel.k8s.io",
+            ] + [f"{k}: {v}" for k, v in self._auth_headers().items()]
+            sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode())
+            rf = sock.makefile("rb")
+            status = rf.readline().decode("latin-1").split(" ", 2)
+            hdrs: dict[str, str] = {}
+            while True:
+                ln = rf.readline().decode("latin-1").strip()
+                if not ln:
+                    break
+                k, _, v = ln.partition(":")
+                hdrs[k.strip().lower()] = v.strip()
+            if len(status) < 2 or status[1] != "101":
+                raise KubeAPIError(f"exec {ns}/{pod}: upgrade refused "
+                                   f"({' '.join(status).strip()})",
+                                   _int_or_none(status[1]) if len(status) > 1 else None)
+            accept = base64.b64encode(hashlib.sha1(
+                (key + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()).digest()).decode()
+            if hdrs.get("sec-websocket-accept") != accept:
+                raise KubeAPIError(f"exec {ns}/{pod}: bad Sec-WebSocket-Accept")
+            stdout: list[bytes] = []
+            err_status = b""
+            while True:
+                sock.settimeout(max(0.1, deadline - time.monotonic()))
+                opcode, payload = _ws_read_frame(rf)
+                if opcode == 0x8:                         # close
+                    break
+                if opcode == 0x9:                         # ping -> pong
+                    sock.sendall(_ws_frame(0xA, payload))
+                    continue
+                if opcode not in (0x1, 0x2) or not payload:
+                    continue
+                channel, data = payload[0], payload[1:]
+                if channel == 1:
+                    stdout.append(data)
+                elif channel == 3:
+                    err_status += data
+            with self._session_lock:
+                self._tls_session = sock.session
+        return _exec_exit_code(err_status), b"".join(stdout).decode("utf-8", "replace")
+
+
+def _ws_read_frame(rf) -> tuple[int, bytes]:
+    """Read one (possibly fragmented) server->client WebSocket message."""
+    opcode, chunks = None, []
+    while True:
+        head = _read_exact(rf, 2)
+        fin, op = head[0] & 0x80, head[0] & 0x0F
+        n = head[1] & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", _read_exact(rf, 2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", _read_exact(rf, 8))[0]
+        mask = _read_exact(rf, 4) if head[1] & 0x80 else b""
+        data = _read_exact(rf, n)
+        if mask:
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        if op >= 0x8:                 # control frames are never fragmented
+            return op, data
+        if opcode is None:
+            opcode = op
+        chunks.append(data)
+        if fin:
+            return opcode, b"".join(chunks)
+
+
+def _read_exact(rf, n: int) -> bytes:
+    data = rf.read(n)
+    if data is None or len(data) < n:
+        raise ConnectionError("websocket stream closed mid-frame")
+    return data
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    """A masked (client->server) single-frame message."""
+    mask = os.urandom(4)
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, 0x80 | n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, n)
+    return head + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def _exec_exit_code(status: bytes) -> int | None:
+    """Exit code from the exec error channel's metav1.Status (None = unknown)."""
+    if not status:
+        return None
+    try:
+        st = json.loads(status)
+    except ValueError:
+        return None
+    if st.get("status") == "Success":
+        return 0
+    for cause in (st.get("details") or {}).get("causes") or []:
+        if cause.get("reason") == "ExitCode":
+            return _int_or_none(cause.get("message"))
+    return None
+
+
+def _load_credentials(binary: str, context: str | None
+                      ) -> tuple[str, ssl.SSLContext, str | None]:
+    """(server URL, SSL context, bearer token) for the target cluster.
+
+    In-cluster (no --context, ServiceAccount mounted) this reads the projected
+    token + CA directly. Otherwise it asks kubectl ONCE for the flattened,
+    minified kubeconfig of the selected context — kubeconfig is YAML and the
+    stdlib has no YAML parser, and this keeps every auth mode kubectl already
+    resolves (context merging, file refs) without reimplementing it.
+    """
+    token_file = os.path.join(_SA_DIR, "token")
+    if (not context and os.environ.get("KUBERNETES_SERVICE_HOST")
+            and os.path.exists(token_file)):
+        host = os.environ["KUBERNETES_SERVICE_HOST"]
+        port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+        if ":" in host:
+            host = f"[{host}]"
+        ctx = ssl.create_default_context(cafile=os.path.join(_SA_DIR, "ca.crt"))
+        with open(token_file) as fh:
+            return f"https://{host}:{port}", ctx, fh.read().strip()
+
+    args = [binary, "config", "view", "--raw", "--minify", "--flatten", "-o", "json"]
+    if context:
+        args += ["--context", context]
+    proc = subprocess.run(args, capture_output=True, text=True, timeout=30, check=True)
+    cfg = json.loads(proc.stdout)
+    cluster = (cfg.get("clusters") or [{}])[0].get("cluster") or {}
+    user = (cfg.get("users") or [{}])[0].get("user") or {}
+    server = cluster.get("server", "")
+    if not server:
+        raise KubeAPIError("kubeconfig has no server for the selected context")
+
+    if cluster.get("insecure-skip-tls-verify"):
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    elif cluster.get("certificate-authority-data"):
+        ctx = ssl.create_default_context(cadata=base64.b64decode(
+            cluster["certificate-authority-data"]).decode())
+    else:
+        ctx = ssl.create_default_context()
+    if cluster.get("tls-server-name"):
+        raise KubeAPIError("tls-server-name is not supported by --backend api")
+
+    token = user.get("token")
+    cert = user.get("client-certificate-data")
+    key = user.get("client-key-data")
+    if not token and user.get("tokenFile"):
+        with open(user["tokenFile"]) as fh:
+            token = fh.read().strip()
+    if not (token or cert) and user.get("exec"):
+        cred = _exec_credential(user["exec"])
+        token = cred.get("token")
+        if cred.get("clientCertificateData"):
+            cert = base64.b64encode(cred["clientCertificateData"].encode()).decode()
+            key = base64.b64encode(cred.get("clientKeyData", "").encode()).decode()
+    if cert and key:
+        _load_client_cert(ctx, base64.b64decode(cert), base64.b64decode(key))
+    if not (token or cert):
+        raise KubeAPIError("no usable credential (token, client cert or exec "
+                           "plugin) in kubeconfig — use --backend kubectl")
+    return server, ctx, token
+
+
+def _exec_credential(spec: dict) -> dict:
+    """Run a client-go exec credential plugin and return its status block."""
+    env = dict(os.environ)
+    for e in spec.get("env") or []:
+        env[e["name"]] = e["value"]
+    proc = subprocess.run([spec["command"], *(spec.get("args") or [])],
+                          capture_output=True, text=True, timeout=60,
+                          check=True, env=env)
+    return json.loads(proc.stdout).get("status") or {}
+
+
+def _load_client_cert(ctx: ssl.SSLContext, cert: bytes, key: bytes) -> None:
+    # ssl only loads a client cert from files: stage it in 0600 temp files that
+    # are unlinked as soon as the context has read them.
+    paths = []
+    try:
+        for blob in (cert, key):
+            fd, path = tempfile.mkstemp(prefix="cnpgscope-")
+            paths.append(path)
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(blob)
+        ctx.load_cert_chain(paths[0], paths[1])
+    finally:
+        for path in paths:
+            os.unlink(path)
+
 
 # ---------------------------------------------------------------------------
 # Data model
 # ---------------------------------------------------------------------------
-@dataclass
+# Slotted throughout: a long-running --serve holds one of these per instance
+# and rebuilds them every refresh, so no per-object __dict__. The leaf records
+# are built once from a probe row and never changed, hence frozen; Instance
+# and Cluster are filled in place as their probes settle.
+@dataclass(frozen=True, slots=True)
 class Slot:
     name: str
     active: bool
@@ -205,17 +915,30 @@ class Slot:
     wal_status: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Instance:
     name: str
     role: str = "?"          # primary | replica | ?
     phase: str = "?"         # Running | Pending | ...
     ready: bool = False
     reason: str = ""         # CrashLoopBackOff, etc.
+    node: str = ""           # spec.nodeName
+    rv: str = ""             # pod resourceVersion (snapshot-cache key)
+    ip: str = ""             # status.podIP ({pod_ip} in --sql-dsn)
     pvc_size_bytes: int | None = None
     pvc_used_bytes: int | None = None
     pvc_pct: float | None = None
     wal_bytes: int | None = None
+    probe_secs: float | None = None   # wall time of the last df/du exec
+    replay: Replay | None = None      # replicas only
+    pvc_from_kubelet: bool = False    # pvc_* came from --pvc-source kubelet: no df
+    # Growth (bytes/s) and time-to-full (s) from --history; None = no fit.
+    pvc_rate: float | None = None
+    wal_rate: float | None = None
+    slot_rate: float | None = None
+    pvc_ttf: float | None = None
+    wal_ttf: float | None = None
+    slot_ttf: float | None = None
 
     @property
     def wal_frac(self) -> float | None:
@@ -223,18 +946,122 @@ class Instance:
             return None
         return 100.0 * self.wal_bytes / self.pvc_size_bytes
 
+    @property
+    def forecast(self) -> tuple[float, str, float] | None:
+        return _min_ttf(self)
 
-@dataclass
+    @property
+    def ttf(self) -> float | None:
+        """Soonest time-to-full over PVC, pg_wal and slot growth (--history)."""
+        m = _min_ttf(self)
+        return m[0] if m is not None else None
+
+
+@dataclass(frozen=True, slots=True)
 class ReplicaLag:
     app: str
     state: str
     lag_bytes: int | None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class Replay:
+    """Replica-side view of the same stream: how stale its data is and how fast
+    it applies, from the LSNs' progress since an earlier scan (RateSamples) or
+    across --sample-window."""
+    delay_secs: float | None            # since the last replayed commit; 0 = caught up
+    pending_bytes: int | None           # received but not yet replayed
+    receive_rate: float | None = None   # bytes/s arriving (None: no earlier sample)
+    apply_rate: float | None = None     # bytes/s replayed
+    receive_lsn: int | None = None      # the last sample, for the next scan's rates
+    replay_lsn: int | None = None
+    sampled_at: float | None = None     # server clock_timestamp() of that sample
+
+
+@dataclass(frozen=True, slots=True)
+class Backend:
+    """A client backend with an open transaction (pg_stat_activity)."""
+    pid: int
+    db: str
+    user: str
+    state: str
+    xact_age: float | None           # seconds since xact_start
+    state_age: float | None          # seconds in the current state
+
+    @property
+    def idle_in_xact(self) -> bool:
+        return self.state.startswith("idle in transaction")
+
+
+@dataclass(frozen=True, slots=True)
+class Checkpoints:
+    """Cumulative checkpointer stats since stats_reset (pg_stat_checkpointer
+    on PostgreSQL 17+, pg_stat_bgwriter before)."""
+    timed: int
+    requested: int
+    write_ms: float
+    sync_ms: float
+    buffers: int
+
+    @property
+    def total(self) -> int:
+        return self.timed + self.requested
+
+    @property
+    def requested_ratio(self) -> float | None:
+        total = self.timed + self.requested
+        return self.requested / total if total else None
+
+    @property
+    def mean_sync_secs(self) -> float | None:
+        total = self.timed + self.requested
+        return self.sync_ms / 1000 / total if total else None
+
+
+@dataclass(frozen=True, slots=True)
+class DeadTuples:
+    table: str                        # schema.table
+    live: int
+    dead: int
+    since_vacuum: float | None        # seconds since the last (auto)vacuum
+
+    @property
+    def ratio(self) -> float:
+        return self.dead / (self.live + self.dead) if self.live + self.dead else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class WalStats:
+    """WAL written vs archived on the primary (pg_current_wal_lsn, pg_stat_archiver),
+    rates from the progress since an earlier scan (RateSamples)."""
+    segment_bytes: int
+    ready_segments: int               # .ready in archive_status: waiting for archive_command
+    failing: bool                     # last archive failure is newer than the last success
+    failed_count: int
+    last_archived_age: float | None
+    gen_rate: float | None = None     # bytes/s (None: no earlier sample)
+    archive_rate: float | None = None # bytes/s, over >= ARCHIVE_RATE_MIN_SPAN
+    lsn: int | None = None            # the last sample, for the next scan's rates
+    archived_lsn: int | None = None   # end of the last archived segment
+    sampled_at: float | None = None   # server clock_timestamp() of that sample
+
+    @property
+    def backlog_bytes(self) -> int:
+        return self.ready_segments * self.segment_bytes
+
+    @property
+    def archive_keepup(self) -> float | None:
+        """Archived / generated over the same span; None until both are known."""
+        if self.archive_rate is None or not self.gen_rate:
+            return None
+        return self.archive_rate / self.gen_rate
+
+
+@dataclass(slots=True)
 class Cluster:
     namespace: str
     name: str
+    context: str = ""             # kube-context, set only in multi-context scans
     desired: int = 0
     ready: int = 0
     primary: str = ""
@@ -248,13 +1075,32 @@ class Cluster:
     instances: list[Instance] = field(default_factory=list)
     slots: list[Slot] = field(default_factory=list)
     lags: list[ReplicaLag] = field(default_factory=list)
+    xacts: list[Backend] = field(default_factory=list)   # oldest open transactions
+    xid_age: int | None = None     # max age(datfrozenxid) over databases
+    xid_db: str = ""               # ...and which database
+    checkpoints: Checkpoints | None = None
+    dead_tuples: list[DeadTuples] = field(default_factory=list)
+    wal: WalStats | None = None
+    database: str = "app"          # the app database (bootstrap), for per-db probes
+    sql_rows: dict[str, list[dict]] = field(default_factory=dict)  # raw batch, by tag
     notes: list[tuple[str, str]] = field(default_factory=list)   # (severity, text)
     exec_ok: bool = True
+    late: bool = False            # probes still outstanding at --deadline
+    sql_ok: bool = False          # the primary's SQL batch ran this refresh
+    sql_secs: float | None = None  # wall time of the primary's SQL batch exec
+    limits: dict[str, tuple] = field(default_factory=dict)   # rule -> (warn, crit) overrides
 
     @property
     def key(self) -> str:
+        if self.context:
+            return f"{self.context}:{self.namespace}/{self.name}"
         return f"{self.namespace}/{self.name}"
 
+    @property
+    def xid_wraparound(self) -> float | None:
+        """xid_age as a fraction of the 2^31 wraparound limit."""
+        return self.xid_age / 2**31 if self.xid_age is not None else None
+
     @property
     def primary_instance(self) -> Instance | None:
         for inst in self.instances:
@@ -266,16 +1112,182 @@ class Cluster:
 # ---------------------------------------------------------------------------
 # Discovery (CRD + pods) — cheap, no exec
 # ---------------------------------------------------------------------------
-def discover(kc: Kubectl, ns: str | None, name: str | None) -> list[Cluster]:
-    if ns:
-        cl = kc.json("get", "clusters.postgresql.cnpg.io", "-n", ns, "-o", "json")
-    else:
-        cl = kc.json("get", "clusters.postgresql.cnpg.io", "-A", "-o", "json")
-    items = cl.get("items", [])
+def discover(kc: Kubectl | KubeAPI, ns: str | None, name: str | None) -> list[Cluster]:
+    items, pods = list_fleet(kc, ns, name)
+    with PROFILE.span("build"):
+        return build_clusters(items, pods, name)
+
+
+def list_fleet(kc: Kubectl | KubeAPI, ns: str | None,
+               name: str | None = None) -> tuple[list[dict], list[dict]]:
+    """Lean Cluster CRs and CNPG pods, scoped on the server.
+
+    -n narrows both lists to the namespace, --cluster narrows the CRs by
+    field selector and the pods by their `cnpg.io/cluster=<name>` label, so
+    nothing outside the query is sent, let alone decoded.
+    """
+    clusters = [_lean_cluster(it) for it in kc.items(
+        "clusters.postgresql.cnpg.io", ns, None, f"metadata.name={name}" if name else None)]
+    pods = kc.pods(ns, _pod_selector(name))
+    return clusters, pods
+
+
+def _pod_selector(name: str | None) -> str:
+    return f"cnpg.io/cluster={name}" if name else "cnpg.io/cluster"
+
+
+# -- lean records -----------------------------------------------------------
+# Discovery keeps only what Cluster/Instance/pod_fingerprint read, in the
+# API's own shape, so every consumer takes a lean record or a full object
+# alike. A full pod is ~5-10 KiB of JSON; its lean record is a few hundred
+# bytes — which is what the watch mirror and the snapshot cache hold.
+def _lean_pod(p: dict) -> dict:
+    meta = p.get("metadata", {})
+    labels = meta.get("labels", {}) or {}
+    spec = p.get("spec", {}) or {}
+    st = p.get("status", {}) or {}
+    return {
+        "metadata": {
+            "namespace": meta.get("namespace", ""), "name": meta.get("name", ""),
+            "uid": meta.get("uid", ""), "resourceVersion": meta.get("resourceVersion", ""),
+            "labels": {k: labels[k] for k in _POD_LABELS if k in labels},
+        },
+        "spec": {
+            "nodeName": spec.get("nodeName", ""),
+            "volumes": [{"persistentVolumeClaim": {"claimName": v["persistentVolumeClaim"]
+                                                   .get("claimName", "")}}
+                        for v in spec.get("volumes") or [] if v.get("persistentVolumeClaim")],
+        },
+        "status": {
+            "phase": st.get("phase", "?"), "podIP": st.get("podIP", ""),
+            "containerStatuses": [
+                {"ready": bool(cs.get("ready")), "restartCount": cs.get("restartCount", 0),
+                 "state": {"waiting": {"reason": ((cs.get("state") or {}).get("waiting")
+                                                  or {}).get("reason", "")}}}
+                for cs in st.get("containerStatuses") or []],
+        },
+    }
+
+
+def _lean_cluster(it: dict) -> dict:
+    meta = it.get("metadata", {})
+    spec = it.get("spec", {}) or {}
+    st = it.get("status", {}) or {}
+    return {
+        "metadata": {"namespace": meta.get("namespace", ""), "name": meta.get("name", ""),
+                     "resourceVersion": meta.get("resourceVersion", "")},
+        "spec": {"instances": spec.get("instances", 0),
+                 "bootstrap": {m: {"database": b["database"]}
+                               for m, b in (spec.get("bootstrap") or {}).items()
+                               if isinstance(b, dict) and b.get("database")},
+                 "storage": {"size": (spec.get("storage") or {}).get("size", "")},
+                 "backup": bool(spec.get("backup"))},
+        "status": {k: st[k] for k in ("readyInstances", "currentPrimary", "phase",
+                                      "lastSuccessfulBackup") if k in st}
+                  | {"conditions": [{"type": c.get("type"), "status": c.get("status")}
+                                    for c in st.get("conditions") or []]},
+    }
+
+
+_LEAN = {"clusters.postgresql.cnpg.io": _lean_cluster, "pods": _lean_pod}
+_POD_LABELS = ("cnpg.io/cluster", "cnpg.io/instanceRole", "role")
+
+# One tab-separated line per pod; container statuses and volumes as nested
+# ranges ("ready,restarts,waitingReason;" and "claimName,").
+_POD_JSONPATH = (
+    '{range .items[*]}'
+    '{.metadata.namespace}{"\\t"}{.metadata.name}{"\\t"}{.metadata.uid}{"\\t"}'
+    '{.metadata.resourceVersion}{"\\t"}{.metadata.labels.cnpg\\.io/cluster}{"\\t"}'
+    '{.metadata.labels.cnpg\\.io/instanceRole}{"\\t"}{.metadata.labels.role}{"\\t"}'
+    '{.status.phase}{"\\t"}{.spec.nodeName}{"\\t"}{.status.podIP}{"\\t"}'
+    '{range .status.containerStatuses[*]}{.ready},{.restartCount},'
+    '{.state.waiting.reason};{end}{"\\t"}'
+    '{range .spec.volumes[*]}{.persistentVolumeClaim.claimName},{end}'
+    '{"\\n"}{end}'
+)
+
+
+def _pod_from_jsonpath(line: str) -> dict:
+    """One _POD_JSONPATH line -> the same lean record _lean_pod builds."""
+    f = line.split("\t")
+    f += [""] * (12 - len(f))
+    labels = dict(zip(_POD_LABELS, f[4:7]))
+    statuses = []
+    for cs in filter(None, f[10].split(";")):
+        ready, restarts, reason = (cs.split(",") + ["", ""])[:3]
+        statuses.append({"ready": ready == "true", "restartCount": int(restarts or 0),
+                         "state": {"waiting": {"reason": reason}}})
+    return {
+        "metadata": {"namespace": f[0], "name": f[1], "uid": f[2], "resourceVersion": f[3],
+                     "labels": {k: v for k, v in labels.items() if v}},
+        "spec": {"nodeName": f[8],
+                 "volumes": [{"persistentVolumeClaim": {"claimName": c}}
+                             for c in f[11].split(",") if c]},
+        "status": {"phase": f[7] or "?", "podIP": f[9], "containerStatuses": statuses},
+    }
+
+
+def kube_contexts(binary: str) -> list[str]:
+    """Every context in the kubeconfig (for --all-contexts)."""
+    proc = subprocess.run([binary, "config", "get-contexts", "-o", "name"],
+                          capture_output=True, text=True, timeout=30, check=True)
+    return [ln.strip() for ln in proc.stdout.splitlines() if ln.strip()]
+
+
+def discover_contexts(backends: dict[str, Callable[[], Kubectl | KubeAPI]],
+                      ns: str | None, name: str | None,
+                      caches: dict[str, SnapshotCache] | None = None
+                      ) -> tuple[dict[str, Kubectl | KubeAPI], list[Cluster],
+                                 dict[str, str]]:
+    """Connect to + discover every context in parallel.
+
+    Returns (backend per context, merged clusters tagged with their context,
+    error per context that failed). One unreachable context is reported, not
+    fatal: the rest of the fleet still gets scanned.
+    """
+    kcs: dict[str, Kubectl | KubeAPI] = {}
+    clusters: list[Cluster] = []
+    failed: dict[str, str] = {}
+
+    def one(ctx: str) -> list[Cluster]:
+        kcs[ctx] = backends[ctx]()
+        found = (caches[ctx].discover(kcs[ctx], ns, name) if caches
+                 else discover(kcs[ctx], ns, name))
+        for c in found:
+            c.context = ctx
+        return found
 
-    pods = kc.json("get", "pods", "-A", "-l", "cnpg.io/cluster", "-o", "json")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(backends)) as pool:
+        futs = {ctx: pool.submit(one, ctx) for ctx in backends}
+        for ctx, fut in futs.items():
+            try:
+                clusters += fut.result()
+            except Exception as exc:  # noqa: BLE001
+                # Intentionally broad: one context must not sink the rest.
+                failed[ctx] = describe_error(exc)
+                print(f"error: context {ctx}: {failed[ctx]}", file=sys.stderr)
+    clusters.sort(key=lambda c: c.key)
+    return kcs, clusters, failed
+
+
+def describe_error(exc: BaseException) -> str:
+    """One line for a backend/discovery failure, as main() reports it."""
+    if isinstance(exc, FileNotFoundError):
+        return f"kubectl binary not found: {exc.filename}"
+    if isinstance(exc, subprocess.CalledProcessError):
+        return f"kubectl failed: {(exc.stderr or str(exc)).strip()}"
+    if isinstance(exc, json.JSONDecodeError):
+        return "could not parse kubectl JSON output"
+    if isinstance(exc, (KubeAPIError, OSError)):
+        return f"API server request failed: {exc}"
+    return f"{type(exc).__name__}: {exc}"
+
+
+def build_clusters(items: Iterable[dict], pod_items: Iterable[dict],
+                   name: str | None = None) -> list[Cluster]:
+    """Cluster CRs + CNPG pods (raw API objects) -> sorted Cluster models."""
     pods_by_cluster: dict[tuple[str, str], list[dict]] = {}
-    for p in pods.get("items", []):
+    for p in pod_items:
         meta = p.get("metadata", {})
         labels = meta.get("labels", {})
         ckey = (meta.get("namespace", ""), labels.get("cnpg.io/cluster", ""))
@@ -285,58 +1297,12 @@ def discover(kc: Kubectl, ns: str | None, name: str | None) -> list[Cluster]:
     clusters: list[Cluster] = []
     for it in items:
         meta = it.get("metadata", {})
-        spec = it.get("spec", {})
-        status = it.get("status", {})
-        cname = meta.get("name", "")
-        cns = meta.get("namespace", "")
-        if name and cname != name:
+        if name and meta.get("name", "") != name:
             continue
-
-        conds = {c.get("type"): c.get("status") for c in status.get("conditions", [])}
-        backup = spec.get("backup") or {}
-        c = Cluster(
-            namespace=cns,
-            name=cname,
-            desired=int(spec.get("instances", 0) or 0),
-            ready=int(status.get("readyInstances", 0) or 0),
-            primary=status.get("currentPrimary", "") or "",
-            phase=status.get("phase", "") or "",
-            storage_size=spec.get("storage", {}).get("size", "") or "",
-            continuous_archiving=conds.get("ContinuousArchiving"),
-            last_backup_succeeded=conds.get("LastBackupSucceeded"),
-            backup_configured=bool(backup),
-        )
-        lb = status.get("lastSuccessfulBackup")
-        if lb:
-            ts = _parse_ts(lb)
-            if ts is not None:
-                c.last_backup_age = now - ts
-            else:
-                # Present-but-unparseable timestamp: DON'T render age~0 ("fresh"),
-                # which would mask a genuinely stale backup. Surface it instead.
-                c.backup_ts_bad = True
-
+        c = _cluster_from_item(it, now)
         # Instances from pods (authoritative for phase/readiness/role).
-        for p in pods_by_cluster.get((cns, cname), []):
-            pmeta = p.get("metadata", {})
-            pstat = p.get("status", {})
-            labels = pmeta.get("labels", {})
-            role = labels.get("cnpg.io/instanceRole") or labels.get("role") or "?"
-            cstatuses = pstat.get("containerStatuses", []) or []
-            ready = all(cs.get("ready") for cs in cstatuses) and bool(cstatuses)
-            reason = ""
-            for cs in cstatuses:
-                waiting = (cs.get("state", {}) or {}).get("waiting")
-                if waiting and waiting.get("reason"):
-                    reason = waiting["reason"]
-                    break
-            c.instances.append(Instance(
-                name=pmeta.get("name", ""),
-                role=role,
-                phase=pstat.get("phase", "?"),
-                ready=ready,
-                reason=reason,
-            ))
+        for p in pods_by_cluster.get((c.namespace, c.name), []):
+            c.instances.append(_instance_from_pod(p))
         c.instances.sort(key=lambda i: i.name)
         clusters.append(c)
 
@@ -344,6 +1310,88 @@ def discover(kc: Kubectl, ns: str | None, name: str | None) -> list[Cluster]:
     return clusters
 
 
+def _cluster_from_item(it: dict, now: float) -> Cluster:
+    meta = it.get("metadata", {})
+    spec = it.get("spec", {})
+    status = it.get("status", {})
+    conds = {c.get("type"): c.get("status") for c in status.get("conditions", [])}
+    backup = spec.get("backup") or {}
+    c = Cluster(
+        namespace=meta.get("namespace", ""),
+        name=meta.get("name", ""),
+        desired=int(spec.get("instances", 0) or 0),
+        ready=int(status.get("readyInstances", 0) or 0),
+        primary=status.get("currentPrimary", "") or "",
+        phase=status.get("phase", "") or "",
+        storage_size=spec.get("storage", {}).get("size", "") or "",
+        continuous_archiving=conds.get("ContinuousArchiving"),
+        last_backup_succeeded=conds.get("LastBackupSucceeded"),
+        backup_configured=bool(backup),
+    )
+    # initdb / recovery / pg_basebackup all name the app database; CNPG's
+    # default is "app".
+    for method in (spec.get("bootstrap") or {}).values():
+        if isinstance(method, dict) and method.get("database"):
+            c.database = method["database"]
+            break
+    lb = status.get("lastSuccessfulBackup")
+    if lb:
+        ts = _parse_ts(lb)
+        if ts is not None:
+            c.last_backup_age = now - ts
+        else:
+            # Present-but-unparseable timestamp: DON'T render age~0 ("fresh"),
+            # which would mask a genuinely stale backup. Surface it instead.
+            c.backup_ts_bad = True
+    return c
+
+
+def _instance_from_pod(p: dict) -> Instance:
+    pmeta = p.get("metadata", {})
+    pstat = p.get("status", {})
+    labels = pmeta.get("labels", {})
+    role = labels.get("cnpg.io/instanceRole") or labels.get("role") or "?"
+    cstatuses = pstat.get("containerStatuses", []) or []
+    ready = all(cs.get("ready") for cs in cstatuses) and bool(cstatuses)
+    reason = ""
+    for cs in cstatuses:
+        waiting = (cs.get("state", {}) or {}).get("waiting")
+        if waiting and waiting.get("reason"):
+            reason = waiting["reason"]
+            break
+    return Instance(
+        name=pmeta.get("name", ""),
+        role=role,
+        phase=pstat.get("phase", "?"),
+        ready=ready,
+        reason=reason,
+        node=(p.get("spec") or {}).get("nodeName", "") or "",
+        rv=pmeta.get("resourceVersion", ""),
+        ip=pstat.get("podIP", "") or "",
+    )
+
+
+def pod_fingerprint(p: dict) -> tuple:
+    """What makes cached probe results for a pod stale: a new pod (uid), a
+    restart, a role flip, a readiness/phase change, or a different PVC set."""
+    meta = p.get("metadata", {})
+    labels = meta.get("labels", {})
+    pstat = p.get("status", {})
+    cstatuses = pstat.get("containerStatuses", []) or []
+    claims = sorted(
+        (v.get("persistentVolumeClaim") or {}).get("claimName", "")
+        for v in (p.get("spec", {}).get("volumes") or [])
+        if v.get("persistentVolumeClaim"))
+    return (
+        meta.get("uid", ""),
+        labels.get("cnpg.io/instanceRole") or labels.get("role") or "?",
+        pstat.get("phase", "?"),
+        tuple(bool(cs.get("ready")) for cs in cstatuses),
+        sum(int(cs.get("restartCount", 0) or 0) for cs in cstatuses),
+        tuple(claims),
+    )
+
+
 def _parse_ts(ts: str) -> float | None:
     # CNPG timestamps: "2026-07-09T05:23:01Z" or with offset.
     # Returns None on an unrecognized format — the caller must treat a missing
@@ -363,224 +1411,1538 @@ def _parse_ts(ts: str) -> float | None:
 # ---------------------------------------------------------------------------
 # Enrichment (exec) — per-instance df/du + per-primary psql
 # ---------------------------------------------------------------------------
-_DF_DU = (
-    f"df -B1 --output=size,used,pcent {PGDATA} | tail -1; "
-    f"du -sb {PGWAL} 2>/dev/null | cut -f1"
+_DF = f"df -B1 --output=size,used,pcent {PGDATA} | tail -1"
+_DU_WAL = f"du -sb {PGWAL} 2>/dev/null | cut -f1"
+# pg_wal size from the catalog: the server lists its own WAL dir (one readdir,
+# no recursive walk, no extra du process). Falls back to du when SQL is
+# unavailable (instance still starting, auth trouble, ...).
+_SQL_WAL = ("psql -qtAX -c 'SELECT coalesce(sum(size), 0) FROM pg_ls_waldir()' "
+            "2>/dev/null")
+
+
+# Replica replay position, tagged so it can't be mistaken for the df/WAL lines.
+# now() - last replayed commit is only a delay while WAL is pending: on an idle
+# primary it grows with nothing to replay.
+_REPLAY_SQL = (
+    "SELECT 'replay', pg_last_wal_receive_lsn(), pg_last_wal_replay_lsn(), "
+    "coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), -1), "
+    "extract(epoch FROM clock_timestamp())"
 )
 
+
+def instance_script(role: str = "primary", df: bool = True) -> str:
+    """The per-instance shell probe: df line, then the pg_wal size line.
+
+    On a replica it also samples the replay position: once, or twice
+    --sample-window apart in the same psql session (the exec holds its slot
+    for the window, so that is opt-in). With df=False (PVC fill already known
+    from the kubelet) the df line is a stub."""
+    head = _DF if df else "echo -"
+    script = f"{head}; {_DU_WAL}" if WAL_PROBE == "du" else f"{head}; {_SQL_WAL} || {_DU_WAL}"
+    if role == "primary":
+        return script
+    sample = f'-c "{_REPLAY_SQL}"'
+    if SAMPLE_WINDOW > 0:
+        sample += f' -c "SELECT pg_sleep({SAMPLE_WINDOW:g})" {sample}'
+    # `|| true`: a replica refusing SQL (still starting, recovery-only auth)
+    # must not fail the exec and lose the df / pg_wal lines already printed;
+    # no `replay` line just means the replay position wasn't sampled.
+    return f"{script}; psql -qtAX -F ' ' {sample} 2>/dev/null || true"
+
+
 _SLOTS_SQL = (
-    "SELECT slot_name, active, "
-    "pg_wal_lsn_diff(pg_current_wal_lsn(), restart_lsn)::bigint, "
-    "coalesce(wal_status,'') "
+    "SELECT slot_name AS name, active, "
+    "pg_wal_lsn_diff(pg_current_wal_lsn(), restart_lsn)::bigint AS retained, "
+    "coalesce(wal_status,'') AS wal_status "
     "FROM pg_replication_slots ORDER BY active, slot_name"
 )
 _LAG_SQL = (
-    "SELECT application_name, state, "
-    "pg_wal_lsn_diff(pg_current_wal_lsn(), replay_lsn)::bigint "
+    "SELECT application_name AS app, state, "
+    "pg_wal_lsn_diff(pg_current_wal_lsn(), replay_lsn)::bigint AS lag "
     "FROM pg_stat_replication ORDER BY application_name"
 )
 
 
-def enrich(kc: Kubectl, clusters: list[Cluster]) -> None:
-    inst_jobs: list[tuple[Cluster, Instance]] = []
-    for c in clusters:
-        for inst in c.instances:
-            if inst.phase == "Running":
-                inst_jobs.append((c, inst))
+@dataclass
+class SqlProbe:
+    """One catalog probe in the per-primary batch.
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=EXEC_WORKERS) as ex:
-        list(ex.map(lambda j: _enrich_instance_safe(kc, *j), inst_jobs))
-        prim_jobs = [c for c in clusters if c.primary_instance
-                     and c.primary_instance.phase == "Running"]
-        list(ex.map(lambda c: _enrich_primary_safe(kc, c), prim_jobs))
+    `sql` is a single SELECT; every row it returns is shipped back as a JSON
+    object (column name -> value) tagged with `tag`, and `apply` folds those
+    rows into the Cluster. Adding a probe is a registry entry, not another exec.
+    `always` marks probes that return a row whenever the batch ran at all: if
+    one is missing, the batch failed and nothing in it can be trusted.
+    """
+    tag: str
+    sql: str
+    apply: Callable[[Cluster, list[dict]], None]
+    always: bool = False
 
 
-def _enrich_instance_safe(kc: Kubectl, c: Cluster, inst: Instance) -> None:
-    # A worker exception (unexpected output shape, kube-client edge case) must
-    # NOT abort the whole fleet scan via ex.map re-raising — degrade this one
-    # instance to a failed probe and keep going.
-    try:
-        _enrich_instance(kc, c, inst)
-    except Exception as exc:  # noqa: BLE001 — intentional: never abort the fleet
-        c.exec_ok = False
-        print(f"warn: probe failed for {c.key}/{inst.name}: {exc}", file=sys.stderr)
+# Cluster-wide views answer from any database; pg_stat_user_tables is per
+# database, which is why the batch runs in the cluster's app database.
+_XACT_SQL = (
+    "SELECT pid, coalesce(datname,'') AS db, coalesce(usename,'') AS usr, state, "
+    "extract(epoch FROM now() - xact_start)::float8 AS xact_age, "
+    "extract(epoch FROM now() - state_change)::float8 AS state_age "
+    "FROM pg_stat_activity WHERE backend_type = 'client backend' "
+    "AND xact_start < now() - interval '60 seconds' AND pid <> pg_backend_pid() "
+    "ORDER BY xact_start LIMIT 5"
+)
+_XID_SQL = (
+    "SELECT datname AS db, age(datfrozenxid)::bigint AS age "
+    "FROM pg_database WHERE datallowconn ORDER BY 2 DESC LIMIT 1"
+)
+# pg_stat_checkpointer only exists on 17+, and naming a missing view would fail
+# the whole batch at parse time — so the version-appropriate query runs through
+# query_to_xml and comes back as one JSON text value.
+_CKPT_SQL = (
+    "SELECT (xpath('/row/s/text()', query_to_xml(CASE "
+    "WHEN current_setting('server_version_num')::int >= 170000 THEN "
+    "'SELECT json_build_object(''timed'', num_timed, ''requested'', num_requested, "
+    "''write_ms'', write_time, ''sync_ms'', sync_time, ''buffers'', buffers_written"
+    ")::text AS s FROM pg_stat_checkpointer' "
+    "ELSE 'SELECT json_build_object(''timed'', checkpoints_timed, "
+    "''requested'', checkpoints_req, ''write_ms'', checkpoint_write_time, "
+    "''sync_ms'', checkpoint_sync_time, ''buffers'', buffers_checkpoint"
+    ")::text AS s FROM pg_stat_bgwriter' END, false, true, '')))[1]::text AS stats"
+)
+_DEAD_SQL = (
+    "SELECT schemaname || '.' || relname AS tbl, n_live_tup AS live, n_dead_tup AS dead, "
+    "extract(epoch FROM now() - greatest(last_autovacuum, last_vacuum))::float8 AS vac_age "
+    f"FROM pg_stat_user_tables WHERE n_dead_tup >= {DEAD_MIN_TUPLES} "
+    "ORDER BY n_dead_tup::float8 / greatest(n_live_tup + n_dead_tup, 1) DESC LIMIT 5"
+)
+# Positions for rates across scans (see RateSamples); sampled twice per
+# primary exec with --sample-window.
+_WAL_SQL = (
+    "SELECT pg_current_wal_lsn()::text AS lsn, "
+    "extract(epoch FROM clock_timestamp())::float8 AS t, "
+    "(SELECT setting::bigint FROM pg_settings WHERE name = 'wal_segment_size') AS seg, "
+    "a.last_archived_wal AS archived_wal, a.failed_count AS failed, "
+    "coalesce(a.last_failed_time > coalesce(a.last_archived_time, '-infinity'), false) "
+    "AS failing, "
+    "extract(epoch FROM now() - a.last_archived_time)::float8 AS archived_age, "
+    "(SELECT count(*) FROM pg_ls_archive_statusdir() WHERE name LIKE '%.ready') AS ready "
+    "FROM pg_stat_archiver a"
+)
 
 
-def _enrich_primary_safe(kc: Kubectl, c: Cluster) -> None:
-    try:
-        _enrich_primary(kc, c)
-    except Exception as exc:  # noqa: BLE001 — intentional: never abort the fleet
-        c.exec_ok = False
-        print(f"warn: primary probe failed for {c.key}: {exc}", file=sys.stderr)
+def _apply_slots(c: Cluster, rows: list[dict]) -> None:
+    for r in rows:
+        c.slots.append(Slot(
+            name=str(r.get("name") or ""),
+            active=bool(r.get("active")),
+            retained_bytes=_int_or_none(r.get("retained")),
+            wal_status=str(r.get("wal_status") or ""),
+        ))
 
 
-def _enrich_instance(kc: Kubectl, c: Cluster, inst: Instance) -> None:
-    ok, out = kc.exec(c.namespace, inst.name, _DF_DU)
-    if not ok:
-        c.exec_ok = False
-        return
-    lines = [ln for ln in out.splitlines() if ln.strip()]
-    parts = lines[0].split() if lines else []
-    if len(parts) >= 3:
-        try:
-            inst.pvc_size_bytes = int(parts[0])
-            inst.pvc_used_bytes = int(parts[1])
-            inst.pvc_pct = float(parts[2].rstrip("%"))
-        except ValueError:
-            pass
-    if len(lines) >= 2:
+def _apply_lags(c: Cluster, rows: list[dict]) -> None:
+    for r in rows:
+        c.lags.append(ReplicaLag(app=str(r.get("app") or ""),
+                                 state=str(r.get("state") or ""),
+                                 lag_bytes=_int_or_none(r.get("lag"))))
+
+
+def _apply_xacts(c: Cluster, rows: list[dict]) -> None:
+    for r in rows:
+        c.xacts.append(Backend(pid=_int_or_none(r.get("pid")) or 0,
+                               db=str(r.get("db") or ""), user=str(r.get("usr") or ""),
+                               state=str(r.get("state") or ""),
+                               xact_age=_float_or_none(r.get("xact_age")),
+                               state_age=_float_or_none(r.get("state_age"))))
+
+
+def _apply_xid(c: Cluster, rows: list[dict]) -> None:
+    for r in rows[:1]:
+        c.xid_age = _int_or_none(r.get("age"))
+        c.xid_db = str(r.get("db") or "")
+
+
+def _apply_checkpoints(c: Cluster, rows: list[dict]) -> None:
+    for r in rows[:1]:
         try:
-            inst.wal_bytes = int(lines[1].strip())
-        except ValueError:
+            st = json.loads(r.get("stats") or "")
+            c.checkpoints = Checkpoints(
+                timed=int(st["timed"]), requested=int(st["requested"]),
+                write_ms=float(st["write_ms"]), sync_ms=float(st["sync_ms"]),
+                buffers=int(st["buffers"]))
+        except (TypeError, ValueError, KeyError):
             pass
-    if inst.pvc_pct is None:
-        # The exec SUCCEEDED but produced no usable df output — an unexpected pod
-        # layout (PGDATA elsewhere) or empty result. Surface it as a failed probe
-        # so the cluster degrades to UNKNOWN with a note, rather than silently
-        # rendering "?" and reading as healthy.
-        c.exec_ok = False
 
 
-def _enrich_primary(kc: Kubectl, c: Cluster) -> None:
-    prim = c.primary_instance
-    if prim is None:
+def _apply_dead_tuples(c: Cluster, rows: list[dict]) -> None:
+    for r in rows:
+        c.dead_tuples.append(DeadTuples(table=str(r.get("tbl") or ""),
+                                        live=_int_or_none(r.get("live")) or 0,
+                                        dead=_int_or_none(r.get("dead")) or 0,
+                                        since_vacuum=_float_or_none(r.get("vac_age"))))
+
+
+def _apply_wal(c: Cluster, rows: list[dict]) -> None:
+    if not rows:
         return
-    ok, out = kc.psql(c.namespace, prim.name, _SLOTS_SQL)
-    if ok:
-        for ln in out.splitlines():
-            if not ln.strip():
-                continue
-            f = ln.split("|")
-            if len(f) < 4:
-                continue
-            c.slots.append(Slot(
-                name=f[0],
-                active=(f[1] == "t"),
-                retained_bytes=_int_or_none(f[2]),
-                wal_status=f[3],
-            ))
-    else:
-        c.exec_ok = False
-    ok, out = kc.psql(c.namespace, prim.name, _LAG_SQL)
-    if ok:
-        for ln in out.splitlines():
-            if not ln.strip():
-                continue
-            f = ln.split("|")
-            if len(f) < 3:
-                continue
-            c.lags.append(ReplicaLag(app=f[0], state=f[1], lag_bytes=_int_or_none(f[2])))
+    last = rows[-1]
+    seg = _int_or_none(last.get("seg")) or 16 * 1024**2
+    t1, lsn1 = _float_or_none(last.get("t")), _lsn(str(last.get("lsn") or ""))
+    gen_rate = None
+    if len(rows) >= 2:
+        # The archive rate is left to RateSamples: over a --sample-window
+        # it could only read 0 or a whole segment per window.
+        first = rows[0]
+        t0, lsn0 = _float_or_none(first.get("t")), _lsn(str(first.get("lsn") or ""))
+        if (t0 is not None and t1 is not None and t1 > t0
+                and lsn0 is not None and lsn1 is not None):
+            gen_rate = (lsn1 - lsn0) / (t1 - t0)
+    c.wal = WalStats(segment_bytes=seg,
+                     ready_segments=_int_or_none(last.get("ready")) or 0,
+                     failing=bool(last.get("failing")),
+                     failed_count=_int_or_none(last.get("failed")) or 0,
+                     last_archived_age=_float_or_none(last.get("archived_age")),
+                     gen_rate=gen_rate, lsn=lsn1,
+                     archived_lsn=_walfile_end(str(last.get("archived_wal") or ""), seg),
+                     sampled_at=t1)
 
 
-def _int_or_none(s: str) -> int | None:
+def _walfile_end(name: str, seg: int) -> int | None:
+    """The LSN just past WAL segment file `name` (timeline, log and segment
+    number as 8 hex digits each); None for a .history file or no name."""
     try:
-        return int(s)
+        log_id, segno = int(name[8:16], 16), int(name[16:24], 16)
+    except ValueError:
+        return None
+    return (log_id << 32) + (segno + 1) * seg
+
+
+PRIMARY_PROBES: list[SqlProbe] = [
+    SqlProbe("slots", _SLOTS_SQL, _apply_slots),
+    SqlProbe("lag", _LAG_SQL, _apply_lags),
+    SqlProbe("xact", _XACT_SQL, _apply_xacts),
+    SqlProbe("xid", _XID_SQL, _apply_xid, always=True),
+    SqlProbe("ckpt", _CKPT_SQL, _apply_checkpoints, always=True),
+    SqlProbe("dead", _DEAD_SQL, _apply_dead_tuples),
+    SqlProbe("wal", _WAL_SQL, _apply_wal, always=True),
+]
+
+
+def apply_primary(c: Cluster, rows: dict[str, list[dict]]) -> None:
+    """Fold one primary SQL batch (fresh or cached raw rows) into the Cluster."""
+    c.sql_rows = rows
+    c.slots, c.lags, c.xacts, c.dead_tuples = [], [], [], []
+    c.xid_age, c.xid_db, c.checkpoints, c.wal = None, "", None, None
+    for probe in PRIMARY_PROBES:
+        probe.apply(c, rows.get(probe.tag, []))
+    # An empty slots/lag list is normal; an empty always-one-row probe means
+    # the batch errored (old server, permissions, statement_timeout).
+    c.sql_ok = all(rows.get(p.tag) for p in PRIMARY_PROBES if p.always)
+
+
+def batch_sql(probes: list[SqlProbe]) -> str:
+    """All probes as ONE statement: a tagged, JSON-framed UNION ALL.
+
+    Each probe's rows come back as `<tag>|<row_to_json>` lines, so probes with
+    different column shapes share a single result set (and a single psql exec),
+    and values containing `|` or newlines can't break the framing.
+    """
+    return " UNION ALL ".join(
+        f"(SELECT '{p.tag}', row_to_json(q)::text FROM ({p.sql}) q)"
+        for p in probes)
+
+
+def primary_statements() -> list[str]:
+    """The primary's psql commands: the batch, then (with --sample-window, so
+    opt-in: the exec holds its slot for the window) a pg_sleep and a second
+    WAL sample — one session, one exec."""
+    stmts = [batch_sql(PRIMARY_PROBES)]
+    if SAMPLE_WINDOW > 0:
+        stmts += [f"SELECT pg_sleep({SAMPLE_WINDOW:g})",
+                  batch_sql([p for p in PRIMARY_PROBES if p.tag == "wal"])]
+    return stmts
+
+
+def parse_batch(out: str) -> dict[str, list[dict]]:
+    rows: dict[str, list[dict]] = {}
+    for ln in out.splitlines():
+        tag, sep, body = ln.partition("|")
+        if not sep:
+            continue
+        try:
+            rows.setdefault(tag, []).append(json.loads(body))
+        except ValueError:
+            continue
+    return rows
+
+
+def enrich(kc: Kubectl | KubeAPI | dict[str, Kubectl | KubeAPI], clusters: list[Cluster],
+           inst_jobs: list[tuple[Cluster, Instance]] | None = None,
+           prim_jobs: list[Cluster] | None = None,
+           deadline: float | None = None,
+           on_done: Callable[[Cluster], None] | None = None) -> None:
+    """Probe every Running instance + primary, or only the given jobs (the
+    daemon passes just the ones its ProbeScheduler picked).
+
+    `deadline` (time.monotonic()) bounds the whole pass: whatever is still
+    running then is abandoned and its cluster marked `late`. `on_done` is
+    called once per cluster as soon as its last probe settles — clusters with
+    nothing to probe first — so callers can stream results.
+
+    `kc` is one backend, or one per context for a multi-context scan: all of
+    them share this one engine, so --workers bounds the whole run."""
+    if inst_jobs is None:
+        inst_jobs = running_instances(clusters)
+    if prim_jobs is None:
+        prim_jobs = running_primaries(clusters)
+
+    def backend(c: Cluster) -> Kubectl | KubeAPI:
+        return kc[c.context] if isinstance(kc, dict) else kc
+
+    jobs = [ProbeJob(c, inst.node, f"{c.key}/{inst.name}",
+                     functools.partial(_probe_instance, backend(c), c, inst))
+            for c, inst in inst_jobs]
+    jobs += [ProbeJob(c, c.primary_instance.node if c.primary_instance else "",
+                      f"{c.key} (primary)",
+                      functools.partial(_probe_primary, backend(c), c))
+             for c in prim_jobs]
+    if on_done is not None:
+        probed = {id(j.cluster) for j in jobs}
+        for c in clusters:
+            if id(c) not in probed:
+                on_done(c)
+    engine = ProbeEngine(EXEC_WORKERS, EXEC_PER_NODE, EXEC_PER_NAMESPACE, EXEC_TIMEOUT)
+    asyncio.run(engine.run(jobs, deadline, on_done))
+
+
+def running_instances(clusters: list[Cluster]) -> list[tuple[Cluster, Instance]]:
+    return [(c, inst) for c in clusters for inst in c.instances
+            if inst.phase == "Running"]
+
+
+def running_primaries(clusters: list[Cluster]) -> list[Cluster]:
+    return [c for c in clusters
+            if c.primary_instance and c.primary_instance.phase == "Running"]
+
+
+@dataclass
+class ProbeJob:
+    cluster: Cluster
+    node: str                                 # kubelet the exec lands on
+    label: str                                # for warnings
+    run: Callable[[float], Awaitable[None]]   # called with its time allowance
+
+
+class ProbeEngine:
+    """asyncio exec fan-out with global, per-node and per-namespace limits.
+
+    A probe takes its namespace slot, then its node slot, then a global slot
+    (namespaces and nodes are per kube-context),
+    so it never holds a global worker while queued behind a busy node or
+    namespace — one namespace full of slow pods can't starve the rest, and
+    one kubelet never sees more than `per_node` concurrent execs. Jobs are
+    queued round-robin across namespaces so the FIFO semaphores interleave
+    them. Each probe gets `timeout` seconds of execution (queueing excluded)
+    and is cancelled past it, killing its kubectl, so the worst case is
+    bounded by ceil(jobs / workers) x timeout — or by `deadline`, which caps
+    every allowance to the time left and marks whatever it cuts off `late`.
+    """
+
+    def __init__(self, workers: int, per_node: int, per_namespace: int, timeout: float):
+        self.workers = max(1, workers)
+        self.per_node = max(1, per_node)
+        self.per_namespace = max(1, per_namespace)
+        self.timeout = timeout
+
+    async def run(self, jobs: list[ProbeJob], deadline: float | None = None,
+                  on_done: Callable[[Cluster], None] | None = None) -> None:
+        # KubeAPI's blocking exec runs via asyncio.to_thread: size the pool to
+        # the global limit so threads are never the hidden bottleneck.
+        asyncio.get_running_loop().set_default_executor(
+            concurrent.futures.ThreadPoolExecutor(max_workers=self.workers))
+        glob = asyncio.Semaphore(self.workers)
+        nodes: dict[str, asyncio.Semaphore] = {}          # by context:node
+        namespaces: dict[str, asyncio.Semaphore] = {}     # by context:namespace
+        pending: dict[int, int] = {}
+        for j in jobs:
+            pending[id(j.cluster)] = pending.get(id(j.cluster), 0) + 1
+        late = 0
+
+        async def one(job: ProbeJob) -> None:
+            nonlocal late
+            ns_sem = namespaces.setdefault(
+                f"{job.cluster.context}:{job.cluster.namespace}",
+                asyncio.Semaphore(self.per_namespace))
+            node_sem = nodes.setdefault(f"{job.cluster.context}:{job.node}",
+                                        asyncio.Semaphore(self.per_node))
+            queued = time.monotonic()
+            try:
+                async with ns_sem, node_sem, glob:
+                    PROFILE.add("queue", time.monotonic() - queued)
+                    allowance = self.timeout
+                    if deadline is not None:
+                        allowance = min(allowance, deadline - time.monotonic())
+                    try:
+                        if allowance <= 0:
+                            raise asyncio.TimeoutError
+                        await asyncio.wait_for(job.run(allowance), allowance)
+                    except asyncio.TimeoutError:
+                        job.cluster.exec_ok = False
+                        if deadline is not None and time.monotonic() >= deadline - 0.05:
+                            job.cluster.late = True
+                            late += 1
+                        else:
+                            print(f"warn: probe timed out for {job.label} "
+                                  f"after {allowance:g}s", file=sys.stderr)
+                    except Exception as exc:  # noqa: BLE001 — intentional: never abort the fleet
+                        # A worker exception (unexpected output shape, kube-client
+                        # edge case) degrades this one probe, not the whole scan.
+                        job.cluster.exec_ok = False
+                        print(f"warn: probe failed for {job.label}: {exc}", file=sys.stderr)
+            finally:
+                pending[id(job.cluster)] -= 1
+                if pending[id(job.cluster)] == 0 and on_done is not None:
+                    on_done(job.cluster)
+
+        await asyncio.gather(*(one(j) for j in _round_robin(jobs)))
+        if late:
+            print(f"warn: {late} probe(s) still running at the deadline — "
+                  "reported as UNKNOWN", file=sys.stderr)
+
+
+def _round_robin(jobs: list[ProbeJob]) -> list[ProbeJob]:
+    by_ns: dict[str, list[ProbeJob]] = {}
+    for j in jobs:
+        by_ns.setdefault(f"{j.cluster.context}:{j.cluster.namespace}", []).append(j)
+    queues = list(by_ns.values())
+    out: list[ProbeJob] = []
+    for i in range(max((len(q) for q in queues), default=0)):
+        out.extend(q[i] for q in queues if i < len(q))
+    return out
+
+
+async def _probe_instance(kc: Kubectl | KubeAPI, c: Cluster, inst: Instance,
+                          timeout: float) -> None:
+    script = instance_script(inst.role, df=not inst.pvc_from_kubelet)
+    start = time.monotonic()
+    ok, out = await kc.exec(c.namespace, inst.name, script, timeout)
+    inst.probe_secs = time.monotonic() - start
+    PROFILE.add("exec", inst.probe_secs, f"{c.namespace}/{inst.name}", inst.node)
+    if not ok:
+        c.exec_ok = False
+        return
+    with PROFILE.span("parse"):
+        _apply_instance_output(c, inst, out)
+
+
+def _apply_instance_output(c: Cluster, inst: Instance, out: str) -> None:
+    lines = [ln for ln in out.splitlines() if ln.strip()]
+    samples = [ln.split(" ")[1:] for ln in lines if ln.startswith("replay ")]
+    lines = [ln for ln in lines if not ln.startswith("replay ")]
+    inst.replay = _replay_from_samples(samples)
+    parts = lines[0].split() if lines else []
+    if len(parts) >= 3:
+        try:
+            inst.pvc_size_bytes = int(parts[0])
+            inst.pvc_used_bytes = int(parts[1])
+            inst.pvc_pct = float(parts[2].rstrip("%"))
+        except ValueError:
+            pass
+    if len(lines) >= 2:
+        try:
+            inst.wal_bytes = int(lines[1].strip())
+        except ValueError:
+            pass
+    if inst.pvc_pct is None:
+        # The exec SUCCEEDED but produced no usable df output — an unexpected pod
+        # layout (PGDATA elsewhere) or empty result. Surface it as a failed probe
+        # so the cluster degrades to UNKNOWN with a note, rather than silently
+        # rendering "?" and reading as healthy.
+        c.exec_ok = False
+
+
+def instance_values(inst: Instance) -> list:
+    """An instance's probe results as a JSON-able row (cache / scheduler)."""
+    r = inst.replay
+    return [inst.pvc_size_bytes, inst.pvc_used_bytes, inst.pvc_pct, inst.wal_bytes,
+            None if r is None else [r.delay_secs, r.pending_bytes, r.receive_rate,
+                                    r.apply_rate, r.receive_lsn, r.replay_lsn,
+                                    r.sampled_at]]
+
+
+def restore_instance_values(inst: Instance, v: object) -> bool:
+    """Inverse of instance_values; False for a row in an older layout."""
+    if not isinstance(v, (list, tuple)) or len(v) != 5:
+        return False
+    inst.pvc_size_bytes, inst.pvc_used_bytes, inst.pvc_pct, inst.wal_bytes, r = v
+    inst.replay = Replay(*r) if r else None
+    return True
+
+
+def _lsn(text: str) -> int | None:
+    """pg_lsn text ("16/B374D848") as a byte position."""
+    hi, sep, lo = text.partition("/")
+    try:
+        return int(hi, 16) << 32 | int(lo, 16) if sep else None
+    except ValueError:
+        return None
+
+
+def _replay_from_samples(samples: list[list[str]]) -> Replay | None:
+    """Fold the replica's (receive, replay, delay, clock) samples into a Replay."""
+    pts = []
+    for f in samples:
+        if len(f) >= 4:
+            pts.append((_lsn(f[0]), _lsn(f[1]), _float_or_none(f[2]), _float_or_none(f[3])))
+    if not pts:
+        return None
+    recv, replay, delay, t = pts[-1]
+    pending = recv - replay if recv is not None and replay is not None else None
+    if delay is not None and delay < 0:
+        delay = None                    # nothing replayed since startup
+    if pending is not None and pending <= 0:
+        delay, pending = 0.0, 0         # caught up: the age is primary idleness
+    receive_rate = apply_rate = None
+    if len(pts) >= 2:
+        recv0, replay0, _, t0 = pts[0]
+        if t is not None and t0 is not None and t > t0:
+            if recv is not None and recv0 is not None:
+                receive_rate = (recv - recv0) / (t - t0)
+            if replay is not None and replay0 is not None:
+                apply_rate = (replay - replay0) / (t - t0)
+    return Replay(delay, pending, receive_rate, apply_rate, recv, replay, t)
+
+
+async def _probe_primary(kc: Kubectl | KubeAPI, c: Cluster, timeout: float) -> None:
+    prim = c.primary_instance
+    if prim is None:
+        return
+    start = time.monotonic()
+    if SQL_POOL is not None:
+        ok, rows = await SQL_POOL.query(c, timeout)
+        c.sql_secs = time.monotonic() - start
+        PROFILE.add("psql", c.sql_secs, f"{c.namespace}/{prim.name}", prim.node)
+        if not ok:
+            c.exec_ok = False
+            return
+        apply_primary(c, rows)
+        if not c.sql_ok:
+            c.exec_ok = False
+        return
+    ok, out = await kc.psql(c.namespace, prim.name, primary_statements(), timeout,
+                            c.database)
+    c.sql_secs = time.monotonic() - start
+    PROFILE.add("psql", c.sql_secs, f"{c.namespace}/{prim.name}", prim.node)
+    if not ok:
+        c.exec_ok = False
+        return
+    with PROFILE.span("parse"):
+        apply_primary(c, parse_batch(out))
+    if not c.sql_ok:
+        c.exec_ok = False
+
+
+def _float_or_none(s: object) -> float | None:
+    try:
+        return float(s)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+
+
+def _int_or_none(s: object) -> int | None:
+    try:
+        return int(s)  # type: ignore[arg-type]
     except (ValueError, TypeError):
         return None
 
 
 # ---------------------------------------------------------------------------
-# Verdict
+# Kubelet volume stats (--pvc-source kubelet): PVC fill without exec
 # ---------------------------------------------------------------------------
-def evaluate(c: Cluster) -> str:
-    sev = OK
+def kubelet_volumes(summary: dict) -> dict[tuple[str, str], tuple[int, int]]:
+    """(namespace, pvc) -> (capacity, used) bytes from one kubelet /stats/summary."""
+    out: dict[tuple[str, str], tuple[int, int]] = {}
+    for pod in summary.get("pods") or []:
+        for v in pod.get("volume") or []:
+            ref = v.get("pvcRef")
+            cap = _int_or_none(v.get("capacityBytes"))
+            if ref and cap:
+                out[(ref.get("namespace", ""), ref.get("name", ""))] = (
+                    cap, _int_or_none(v.get("usedBytes")) or 0)
+    return out
+
+
+def fill_pvc_from_kubelet(kc: Kubectl | KubeAPI | dict[str, Kubectl | KubeAPI],
+                          clusters: list[Cluster]) -> int:
+    """Fill Instance.pvc_* from each node's kubelet; returns how many were filled.
+
+    One `/api/v1/nodes/<node>/proxy/stats/summary` call per node (through the
+    API server, so it needs `nodes/proxy` get, not `pods/exec`) reports every
+    PVC mounted there, so PVC fill costs O(nodes) requests instead of one
+    exec per instance. CNPG names an instance's PGDATA PVC after its pod.
+    Filled instances skip df in their exec; the rest keep it as the fallback.
+    """
+    want: dict[tuple[str, str], list[Instance]] = {}     # (context, node) -> instances
+    for c in clusters:
+        for inst in c.instances:
+            if inst.node and inst.phase == "Running":
+                want.setdefault((c.context, inst.node), []).append(inst)
+    if not want:
+        return 0
+    namespace = {id(inst): c.namespace for c in clusters for inst in c.instances}
+
+    def fetch(key: tuple[str, str]) -> dict:
+        backend = kc[key[0]] if isinstance(kc, dict) else kc
+        return backend.get(f"/api/v1/nodes/{urllib.parse.quote(key[1])}/proxy/stats/summary")
+
+    filled = 0
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(EXEC_WORKERS, len(want))) as pool:
+        futures = {pool.submit(fetch, key): key for key in want}
+        for fut in concurrent.futures.as_completed(futures):
+            ctx, node = futures[fut]
+            try:
+                vols = kubelet_volumes(fut.result())
+            except (subprocess.SubprocessError, KubeAPIError, OSError, ValueError) as exc:
+                print(f"warn: kubelet stats for node {node}: {describe_error(exc)}",
+                      file=sys.stderr)
+                continue
+            for inst in want[(ctx, node)]:
+                v = vols.get((namespace[id(inst)], inst.name))
+                if v is None:
+                    continue
+                inst.pvc_size_bytes, inst.pvc_used_bytes = v
+                inst.pvc_pct = 100.0 * v[1] / v[0]
+                inst.pvc_from_kubelet = True
+                filled += 1
+    return filled
+
+
+# ---------------------------------------------------------------------------
+# Direct SQL (--sql-backend direct): pooled libpq connections to the primaries
+# ---------------------------------------------------------------------------
+class SqlPool:
+    """Persistent, read-only libpq connections for the primary SQL batch.
+
+    Instead of `kubectl exec ... psql` per primary (a process in the pod, an
+    exec stream, `tag|json` text to parse), each probe runs as its own
+    statement over a kept-alive connection to the cluster's `-rw` service (or
+    whatever --sql-dsn names), pipelined so the batch is still one round trip,
+    and rows come back typed. Idle connections are kept per DSN, so under
+    --serve a refresh costs a few milliseconds of SQL per cluster.
+
+    Credentials come from libpq's environment (PGUSER, PGPASSWORD, PGPASSFILE,
+    PGSSLMODE, ...): a role with `pg_monitor` is enough. Every session sets
+    default_transaction_read_only and a statement_timeout of --exec-timeout.
+    """
 
-    # Instances: primary present + ready == desired.
+    IDLE_PER_DSN = 2
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._idle: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._warned: set[str] = set()
+
+    def conninfo(self, c: Cluster) -> str:
+        prim = c.primary_instance
+        return self.dsn.format(cluster=c.name, namespace=c.namespace, database=c.database,
+                               pod=c.primary, pod_ip=prim.ip if prim else "")
+
+    async def query(self, c: Cluster, timeout: float) -> tuple[bool, dict[str, list[dict]]]:
+        """(ok, rows by tag) — the same shape parse_batch gives the exec path.
+
+        Blocking libpq I/O on the loop's worker pool, like KubeAPI's exec: the
+        statement_timeout, not cancellation, is what bounds a stuck query."""
+        return await asyncio.to_thread(self._query, c, timeout)
+
+    def _query(self, c: Cluster, timeout: float) -> tuple[bool, dict[str, list[dict]]]:
+        key, conn = self.conninfo(c), None
+        try:
+            conn, pooled = self._take(key, timeout)
+            try:
+                rows = self._batch(conn, PRIMARY_PROBES)
+            except psycopg.OperationalError:
+                # An idle connection can go stale behind our back (primary
+                # switchover, server restart, a NAT dropping it): that is not
+                # the cluster failing, so retry once on a fresh connection.
+                if not pooled:
+                    raise
+                conn.close()
+                conn, pooled = self._take(key, timeout, fresh=True)
+                rows = self._batch(conn, PRIMARY_PROBES)
+            if SAMPLE_WINDOW > 0:
+                time.sleep(SAMPLE_WINDOW)
+                again = self._batch(conn, [p for p in PRIMARY_PROBES if p.tag == "wal"])
+                rows.setdefault("wal", []).extend(again.get("wal", []))
+        except psycopg.Error as exc:
+            msg = str(exc).strip().splitlines()[0] if str(exc).strip() else type(exc).__name__
+            if msg not in self._warned:
+                self._warned.add(msg)
+                print(f"warn: direct SQL to {c.key}: {msg}", file=sys.stderr)
+            if conn is not None:
+                conn.close()
+            return False, {}
+        self._give(key, conn)
+        return True, rows
+
+    @staticmethod
+    def _batch(conn, probes: list[SqlProbe]) -> dict[str, list[dict]]:
+        with conn.pipeline():
+            curs = [(p.tag, conn.execute(p.sql)) for p in probes]
+        return {tag: cur.fetchall() for tag, cur in curs}
+
+    def _take(self, key: str, timeout: float, fresh: bool = False):
+        """(connection, whether it came from the idle pool)."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if fresh and idle:
+                # Its siblings were opened against the same server: if one
+                # went stale, assume they all did.
+                for conn in idle:
+                    conn.close()
+                idle.clear()
+            while idle:
+                conn = idle.pop()
+                if not conn.closed:
+                    return conn, True
+        ms = int(timeout * 1000)
+        return psycopg.connect(
+            key, autocommit=True, row_factory=dict_row,
+            connect_timeout=max(1, math.ceil(timeout)),
+            application_name="cnpgscope", client_encoding="utf8",
+            options=f"-c default_transaction_read_only=on -c statement_timeout={ms}"), False
+
+    def _give(self, key: str, conn) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.IDLE_PER_DSN:
+                idle.append(conn)
+                return
+        conn.close()
+
+
+SQL_POOL: SqlPool | None = None       # set by main for --sql-backend direct
+
+
+# ---------------------------------------------------------------------------
+# History (--history): per-instance time series + growth forecasting
+# ---------------------------------------------------------------------------
+# ts, pvc_used, pvc_size, wal_bytes, slot_retained — -1 for "not measured".
+_REC = struct.Struct("<dqqqq")
+HISTORY_FIT_WINDOW = 6 * 3600         # growth is fitted over the last 6h...
+HISTORY_MIN_SPAN = 600                # ...once >=10min and 3 points are on record
+HISTORY_COMPACT_BYTES = 256 * 1024    # rewrite (downsample) a series past this size
+# (max age, bucket seconds): raw for 6h, 5-minute buckets to 2d, hourly after.
+_HISTORY_TIERS = ((6 * 3600, 0), (48 * 3600, 300))
+
+
+class History:
+    """Append-only local time series, one fixed-width file per instance.
+
+    Layout: <root>/<context>/<namespace>/<cluster>/<instance>.ts, each a flat
+    run of `_REC` records in time order. Fixed width makes a time-window read
+    a bisect over file offsets, not a parse of the whole file. Appends are a
+    single O_APPEND write; once a file passes HISTORY_COMPACT_BYTES it is
+    rewritten with older points downsampled (raw 6h, 5min to 2d, hourly to
+    `retention`) and anything older than `retention` dropped.
+    """
+
+    def __init__(self, root: str, context: str | None, retention: float):
+        self.root = os.path.expanduser(root)
+        # For clusters not tagged with one; "default" only when no kubeconfig
+        # context can be resolved (in-cluster ServiceAccount).
+        self.context = context or "default"
+        self.retention = retention
+
+    def path(self, c: Cluster, inst: Instance) -> str:
+        return os.path.join(self.root, c.context or self.context, c.namespace,
+                            c.name, inst.name + ".ts")
+
+    def record(self, clusters: list[Cluster], now: float | None = None) -> None:
+        """Append this scan's fresh measurements (cached results are skipped:
+        re-recording an old value at a new time would flatten the slope)."""
+        now = time.time() if now is None else now
+        for c in clusters:
+            slot = -1
+            if c.sql_ok and c.sql_secs is not None:
+                slot = max((s.retained_bytes or 0 for s in c.slots), default=0)
+            for inst in c.instances:
+                fresh = inst.probe_secs is not None and inst.pvc_pct is not None
+                islot = slot if inst.name == c.primary else -1
+                if not fresh and islot < 0:
+                    continue
+                rec = _REC.pack(now,
+                                _or_neg(inst.pvc_used_bytes if fresh else None),
+                                _or_neg(inst.pvc_size_bytes if fresh else None),
+                                _or_neg(inst.wal_bytes if fresh else None),
+                                islot)
+                try:
+                    self._append(self.path(c, inst), rec, now)
+                except OSError as exc:
+                    log.warning("history: cannot write %s: %s", self.path(c, inst), exc)
+
+    def forecast(self, clusters: list[Cluster], now: float | None = None) -> None:
+        """Fill Instance growth rates + time-to-full from the recorded series."""
+        now = time.time() if now is None else now
+        for c in clusters:
+            for inst in c.instances:
+                try:
+                    recs = self.read(self.path(c, inst), now - HISTORY_FIT_WINDOW)
+                except OSError:
+                    continue
+                inst.pvc_rate = _slope([(r[0], r[1]) for r in recs if r[1] >= 0])
+                inst.wal_rate = _slope([(r[0], r[3]) for r in recs if r[3] >= 0])
+                inst.slot_rate = _slope([(r[0], r[4]) for r in recs if r[4] >= 0])
+                if inst.pvc_size_bytes is None or inst.pvc_used_bytes is None:
+                    continue
+                free = max(0, inst.pvc_size_bytes - inst.pvc_used_bytes)
+                inst.pvc_ttf = _ttf(free, inst.pvc_rate)
+                inst.wal_ttf = _ttf(free, inst.wal_rate)
+                inst.slot_ttf = _ttf(free, inst.slot_rate)
+
+    def read(self, path: str, since: float) -> list[tuple]:
+        with open(path, "rb") as fh:
+            n = os.fstat(fh.fileno()).st_size // _REC.size
+            lo, hi = 0, n
+            while lo < hi:                      # first record with ts >= since
+                mid = (lo + hi) // 2
+                fh.seek(mid * _REC.size)
+                if _REC.unpack(fh.read(_REC.size))[0] < since:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            fh.seek(lo * _REC.size)
+            data = fh.read((n - lo) * _REC.size)
+        return list(_REC.iter_unpack(data))
+
+    def _append(self, path: str, rec: bytes, now: float) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, rec)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        if size > HISTORY_COMPACT_BYTES:
+            self._compact(path, now)
+
+    def _compact(self, path: str, now: float) -> None:
+        keep: dict[tuple[int, int], tuple] = {}
+        for r in self.read(path, now - self.retention):
+            age = now - r[0]
+            bucket = next((b for max_age, b in _HISTORY_TIERS if age < max_age), 3600)
+            # Last record per bucket wins: these are levels, not counters.
+            keep[(bucket, int(r[0] // bucket) if bucket else len(keep))] = r
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(b"".join(_REC.pack(*r) for r in sorted(keep.values())))
+        os.replace(tmp, path)
+
+
+def _or_neg(v: int | None) -> int:
+    return -1 if v is None else int(v)
+
+
+def _slope(points: list[tuple[float, int]]) -> float | None:
+    """Least-squares growth rate (units/s), or None without enough history."""
+    if len(points) < 3 or points[-1][0] - points[0][0] < HISTORY_MIN_SPAN:
+        return None
+    n = len(points)
+    mt = sum(t for t, _ in points) / n
+    mv = sum(v for _, v in points) / n
+    den = sum((t - mt) ** 2 for t, _ in points)
+    if not den:
+        return None
+    return sum((t - mt) * (v - mv) for t, v in points) / den
+
+
+def _ttf(free: int, rate: float | None) -> float | None:
+    return free / rate if rate and rate > 0 else None
+
+
+def _min_ttf(inst: Instance) -> tuple[float, str, float] | None:
+    """(time-to-full, what is growing, its rate) for the soonest-full signal."""
+    ttfs = [(t, what, rate) for t, what, rate in (
+                (inst.pvc_ttf, "PVC", inst.pvc_rate),
+                (inst.wal_ttf, "pg_wal", inst.wal_rate),
+                (inst.slot_ttf, "slot-retained WAL", inst.slot_rate))
+            if t is not None and rate is not None]
+    return min(ttfs) if ttfs else None
+
+
+def human_rate(bps: float | None) -> str:
+    if bps is None:
+        return "?"
+    sign = "+" if bps >= 0 else "-"
+    return f"{sign}{human_bytes(abs(bps) * 3600)}/h"
+
+
+# ---------------------------------------------------------------------------
+# Rates across scans: WAL positions remembered from one scan to the next
+# ---------------------------------------------------------------------------
+class RateSamples:
+    """Recent WAL positions per replica and primary, so receive/apply and
+    WAL/archive rates come from successive scans instead of a sleep inside
+    every exec.
+
+    Each key keeps a few (server time, position, position) points over the
+    last RATE_WINDOW, a new one at most every RATE_WINDOW/10; a rate is
+    taken against the oldest, so it spans as much as the recent scans allow
+    (at least RATE_MIN_SPAN). A position that went backwards (replica
+    re-cloned, restore) starts the key over. --serve and --watch keep this
+    in memory; one-shot runs keep it in the snapshot cache file.
+    """
+
+    def __init__(self, points: object = None):
+        self.points: dict[str, list[list]] = points if isinstance(points, dict) else {}
+
+    def observe(self, key: str, t: float, a: int | None, b: int | None
+                ) -> tuple[float | None, float | None, float]:
+        """Record a sample; (rate of a, rate of b, span) against the oldest
+        point in the window, rates None without one."""
+        pts = [p for p in self.points.get(key, ())
+               if isinstance(p, list) and len(p) == 3 and t - RATE_WINDOW <= p[0] <= t]
+        rates: list[float | None] = [None, None]
+        span = t - pts[0][0] if pts else 0.0
+        if pts and any(v is not None and v0 is not None and v < v0
+                       for v, v0 in zip((a, b), pts[0][1:])):
+            pts, span = [], 0.0
+        elif span >= RATE_MIN_SPAN:
+            for i, (v, v0) in enumerate(zip((a, b), pts[0][1:])):
+                if v is not None and v0 is not None:
+                    rates[i] = (v - v0) / span
+        if not pts or t - pts[-1][0] >= RATE_WINDOW / 10:
+            pts.append([t, a, b])
+        self.points[key] = pts
+        return rates[0], rates[1], span
+
+    def fill(self, c: Cluster) -> None:
+        """Record this scan's positions and fill in the rates a single-sample
+        probe left unset."""
+        for inst in c.instances:
+            r = inst.replay
+            if r is None or r.sampled_at is None:
+                continue
+            recv, apply, _ = self.observe(f"{c.key}/{inst.name}", r.sampled_at,
+                                          r.receive_lsn, r.replay_lsn)
+            inst.replay = replace(
+                r, receive_rate=r.receive_rate if r.receive_rate is not None else recv,
+                apply_rate=r.apply_rate if r.apply_rate is not None else apply)
+        w = c.wal
+        if w is None or w.sampled_at is None:
+            return
+        gen, archived, span = self.observe(c.key, w.sampled_at, w.lsn, w.archived_lsn)
+        if span >= ARCHIVE_RATE_MIN_SPAN:
+            # Long enough for whole-segment archiving to average out; judge it
+            # against generation over the same span.
+            c.wal = replace(w, gen_rate=gen if gen is not None else w.gen_rate,
+                            archive_rate=archived)
+        elif w.gen_rate is None:
+            c.wal = replace(w, gen_rate=gen)
+
+    def prune(self, now: float) -> None:
+        """Forget keys not sampled within the window (pods gone, scopes unused)."""
+        for key in [k for k, pts in self.points.items()
+                    if not pts or now - pts[-1][0] > RATE_WINDOW]:
+            del self.points[key]
+
+
+# ---------------------------------------------------------------------------
+# Snapshot cache: repeat invocations reuse discovery + probe results
+# ---------------------------------------------------------------------------
+def cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "cnpgscope")
+
+
+def kube_current_context(binary: str) -> str | None:
+    """The kubeconfig's current context, so a cache never outlives a switch."""
+    try:
+        proc = subprocess.run([binary, "config", "current-context"],
+                              capture_output=True, text=True, timeout=10, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return proc.stdout.strip() or None
+
+
+class SnapshotCache:
+    """On-disk snapshot of one context's fleet, reused for `ttl` seconds.
+
+    One JSON file per context holds:
+      * lists  — the lean Cluster CRs + CNPG pods, per scope: "*" (whole
+                 fleet), "ns:<name>" or "ns:<name>/cluster:<name>". A fresh "*"
+                 snapshot answers any -n/--cluster query with no API call.
+      * probes — df/WAL results keyed "<ns>/<pod>@<resourceVersion>" and the
+                 primary SQL batch keyed "<ns>/<cluster>@<primary's rv>", so a
+                 pod that changed in any way (restart, role flip, reschedule)
+                 is never answered from an old result, even under a fresh list.
+      * samples — the RateSamples behind receive/apply rates, kept for
+                 RATE_WINDOW whatever the ttl (and read even with --refresh).
+    Only successful probes are stored. Reused results leave probe_secs /
+    sql_secs unset, so --history never re-records them as new samples.
+    """
+
+    def __init__(self, root: str, context: str | None, ttl: float, refresh: bool):
+        name = (context or "default").replace(os.sep, "_")
+        self.path = os.path.join(os.path.expanduser(root), name + ".json")
+        self.ttl = ttl
+        self.age: float | None = None     # age of the list snapshot we served
+        self.reused = 0                   # probe results answered from cache
+        self.data: dict = {"lists": {}, "probes": {}}
+        data = None
+        try:
+            with open(self.path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            pass
+        if not isinstance(data, dict):
+            data = {}
+        if not refresh:
+            self.data["lists"] = data.get("lists") or {}
+            self.data["probes"] = data.get("probes") or {}
+        self.rates = RateSamples(data.get("samples"))
+
+    def _fresh(self, entry: dict | None, now: float) -> bool:
+        return bool(entry) and now - entry.get("taken", 0) < self.ttl
+
+    def discover(self, kc: Kubectl | KubeAPI, ns: str | None,
+                 name: str | None) -> list[Cluster]:
+        now = time.time()
+        lists = self.data["lists"]
+        # Widest first: a fresh whole-fleet (or whole-namespace) snapshot
+        # answers any narrower query.
+        scopes = ["*"] + ([f"ns:{ns}"] if ns else [])
+        if name:
+            scopes.append(f"ns:{ns or '*'}/cluster:{name}")
+        snap = next((lists[sc] for sc in scopes if self._fresh(lists.get(sc), now)), None)
+        if snap is None:
+            items, pods = list_fleet(kc, ns, name)
+            snap = {"taken": now, "clusters": items, "pods": pods}
+            lists[scopes[-1]] = snap
+        else:
+            self.age = now - snap["taken"]
+        items = [it for it in snap["clusters"]
+                 if ns is None or it.get("metadata", {}).get("namespace") == ns]
+        with PROFILE.span("build"):
+            return build_clusters(items, snap["pods"], name)
+
+    def reuse(self, clusters: list[Cluster]
+              ) -> tuple[list[tuple[Cluster, Instance]], list[Cluster]]:
+        """Fill in cached probe results; return the (instance, primary) jobs
+        that still need an exec."""
+        now = time.time()
+        probes = self.data["probes"]
+        inst_jobs: list[tuple[Cluster, Instance]] = []
+        for c, inst in running_instances(clusters):
+            rec = probes.get(_inst_cache_key(c, inst))
+            if not self._fresh(rec, now) or not restore_instance_values(inst, rec["v"]):
+                inst_jobs.append((c, inst))
+                continue
+            self.reused += 1
+        prim_jobs: list[Cluster] = []
+        for c in running_primaries(clusters):
+            rec = probes.get(_prim_cache_key(c))
+            if not self._fresh(rec, now) or not isinstance(rec.get("rows"), dict):
+                prim_jobs.append(c)
+                continue
+            apply_primary(c, rec["rows"])
+            if not c.sql_ok:            # a failed batch cached before the check
+                prim_jobs.append(c)
+                continue
+            self.reused += 1
+        return inst_jobs, prim_jobs
+
+    def store(self, clusters: list[Cluster]) -> None:
+        """Record this run's fresh probe results, drop expired entries, and
+        rewrite the file atomically."""
+        now = time.time()
+        probes = self.data["probes"]
+        for c in clusters:
+            for inst in c.instances:
+                if inst.probe_secs is not None and inst.pvc_pct is not None:
+                    probes[_inst_cache_key(c, inst)] = {
+                        "taken": now,
+                        "v": instance_values(inst)}
+            if c.sql_ok and c.sql_secs is not None:
+                probes[_prim_cache_key(c)] = {"taken": now, "rows": c.sql_rows}
+        for section in self.data.values():
+            for k in [k for k, e in section.items() if not self._fresh(e, now)]:
+                del section[k]
+        self.rates.prune(now)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w") as fh:
+                json.dump({**self.data, "samples": self.rates.points}, fh,
+                          separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            print(f"warn: snapshot cache not written ({self.path}): {exc}",
+                  file=sys.stderr)
+
+
+def _inst_cache_key(c: Cluster, inst: Instance) -> str:
+    return f"{c.namespace}/{inst.name}@{inst.rv}"
+
+
+def _prim_cache_key(c: Cluster) -> str:
+    prim = c.primary_instance
+    return f"{c.namespace}/{c.name}@{prim.rv if prim else ''}"
+
+
+# ---------------------------------------------------------------------------
+# Verdict: a table of rules, evaluated rule by rule across the whole fleet
+# ---------------------------------------------------------------------------
+Limits = tuple[float | str | None, float | str | None]   # (warn, crit); None = off
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """One threshold check: `metric` (an attribute path on each subject in
+    `scope`) against warn/crit limits, with a note rendered from `message`.
+
+    `message` is a str.format template over the subject's attributes, plus
+    `{value}` (the metric) and `{c}` (the cluster). Format specs `bytes`,
+    `age`, `ago`, `rate` and `count` humanize a value; None renders as "?"
+    (`bytes0`: as 0B). A `?text` spec is an optional part: `text` (with %s
+    replaced by the value; it may hold fields of its own) when the value is
+    set, nothing when it is None or "".
+    `where` lists attribute paths that must be truthy ("!path": falsy;
+    "path>=N": a bound) for a subject to be judged at all. Rules sharing a
+    `group` don't repeat each other: once one fires on a subject, a later
+    one adds its note only if it rates the subject worse.
+    Adding a rule is a RULES entry, or a "rules" entry in --thresholds.
+    """
+    name: str
+    scope: str                          # cluster | instance | slot | lag | xact | table
+    metric: str
+    warn: float | str | None = None
+    crit: float | str | None = None
+    message: str = "{metric} is {value}"
+    op: str = ">="                      # >= | > | < | <= | ==
+    where: tuple[str, ...] = ()
+    group: str = ""
+    crit_message: str = ""              # the note at CRIT, if it should differ
+
+    @classmethod
+    def from_dict(cls, d: dict) -> Rule:
+        try:
+            rule = cls(**{**d, "where": tuple(d.get("where") or ()),
+                          "warn": _limit_value(d.get("warn")),
+                          "crit": _limit_value(d.get("crit"))})
+        except TypeError as exc:
+            raise ValueError(f"rule {d.get('name', '?')!r}: {exc}") from None
+        if rule.scope not in _SCOPES:
+            raise ValueError(f"rule {rule.name!r}: unknown scope {rule.scope!r} "
+                             f"(one of {', '.join(_SCOPES)})")
+        if rule.op not in _OPS:
+            raise ValueError(f"rule {rule.name!r}: unknown op {rule.op!r}")
+        kind = _SCOPES[rule.scope][1]
+        for path in (rule.metric, *(_parse_where(w)[1] for w in rule.where)):
+            if not hasattr(kind, path.split(".")[0]):
+                raise ValueError(f"rule {rule.name!r}: {kind.__name__} has no "
+                                 f"{path.split('.')[0]!r}")
+        return rule
+
+    def evaluate(self, clusters: list[Cluster], claimed: dict[str, dict[int, str]]) -> None:
+        """Judge every subject in the fleet: build the metric column in one
+        pass, then compare it against each cluster's limits."""
+        get = operator.attrgetter(self.metric)
+        where = [_parse_where(w) for w in self.where]
+        rows = [(c, s) for c in clusters for s in _SCOPES[self.scope][0](c)
+                if all(_holds(s, *w) for w in where)]
+        column = [_get_or_none(get, s) for _, s in rows]
+        cmp = _OPS[self.op]
+        taken = claimed.setdefault(self.group, {}) if self.group else None
+        for (c, s), v in zip(rows, column):
+            if v is None:
+                continue
+            warn, crit = c.limits.get(self.name, (self.warn, self.crit))
+            level = (CRIT if crit is not None and cmp(v, crit)
+                     else WARN if warn is not None and cmp(v, warn) else None)
+            if level is None:
+                continue
+            if taken is not None:
+                if _SEV_RANK[level] <= _SEV_RANK[taken.get(id(s), OK)]:
+                    continue
+                taken[id(s)] = level
+            template = self.crit_message if level == CRIT and self.crit_message else self.message
+            c.notes.append((level, _NOTE_FMT.vformat(template, (),
+                                                     _NoteFields(s, c, v, self.metric))))
+
+
+def _get_or_none(get: Callable[[object], object], s: object) -> object:
+    try:
+        return get(s)
+    except AttributeError:              # a None along the path: not measured
+        return None
+
+
+_OPS: dict[str, Callable[[object, object], bool]] = {
+    ">=": operator.ge, ">": operator.gt, "<": operator.lt, "<=": operator.le,
+    "==": operator.eq,
+}
+_WHERE = re.compile(r"^(!?)([\w.]+)\s*(?:(>=|<=|==|>|<)\s*(\S+))?$")
+
+
+def _parse_where(w: str) -> tuple[bool, str, str, float | None]:
+    m = _WHERE.match(w.strip())
+    if not m:
+        raise ValueError(f"bad where clause {w!r}")
+    neg, path, op, bound = m.groups()
+    return bool(neg), path, op or "", float(bound) if bound is not None else None
+
+
+def _holds(s: object, neg: bool, path: str, op: str, bound: float | None) -> bool:
+    v = _get_or_none(operator.attrgetter(path), s)
+    ok = bool(v) if not op else v is not None and _OPS[op](v, bound)
+    return ok != neg
+
+
+class _NoteFields(dict):
+    """Template namespace: the subject's attributes, plus value / c / metric."""
+
+    def __init__(self, subject: object, c: Cluster, value: object, metric: str):
+        super().__init__(value=value, c=c, metric=metric)
+        self.subject = subject
+
+    def __missing__(self, key: str) -> object:
+        return getattr(self.subject, key)
+
+
+class _NoteFormatter(string.Formatter):
+    _SPECS: dict[str, Callable[[object], str]] = {
+        "bytes": lambda v: human_bytes(v),                      # type: ignore[arg-type]
+        "age": lambda v: human_age(v),                          # type: ignore[arg-type]
+        "ago": lambda v: f"{human_age(v)} ago",                 # type: ignore[arg-type]
+        "rate": lambda v: human_rate(v),                        # type: ignore[arg-type]
+        "count": lambda v: _human_count(v),                     # type: ignore[arg-type]
+    }
+
+    def format_field(self, value: object, format_spec: str) -> str:
+        if format_spec.startswith("?"):
+            return "" if value is None or value == "" else format_spec[1:].replace("%s", str(value))
+        if format_spec == "bytes0":
+            return human_bytes(value or 0)                      # type: ignore[arg-type]
+        if format_spec == "ago" and value is None:
+            return "never"
+        if value is None:
+            return "?"
+        fn = self._SPECS.get(format_spec)
+        return fn(value) if fn else format(value, format_spec)
+
+
+_NOTE_FMT = _NoteFormatter()
+
+
+def _human_count(n: float) -> str:
+    for div, unit in ((1e9, "B"), (1e6, "M"), (1e3, "k")):
+        if abs(n) >= div:
+            return f"{n / div:.2f}{unit}"
+    return f"{n:g}"
+
+
+_SCOPES: dict[str, tuple[Callable[[Cluster], Iterable], type]] = {
+    "cluster": (lambda c: (c,), Cluster),
+    "instance": (lambda c: c.instances, Instance),
+    "slot": (lambda c: c.slots, Slot),
+    "lag": (lambda c: c.lags, ReplicaLag),
+    "xact": (lambda c: c.xacts, Backend),
+    "table": (lambda c: c.dead_tuples, DeadTuples),
+}
+
+
+# Checks that aren't one metric against a threshold: pod state, flags, and
+# the replica keep-up comparison. They sit in RULES between the table rules
+# so notes keep a stable, signal-by-signal order.
+def check_instances(c: Cluster) -> None:
+    """Primary present + ready == desired, and each pod's own state."""
     if c.desired and c.ready < c.desired:
         short = c.desired - c.ready
         prim = c.primary_instance
         if c.ready == 0 or (prim is not None and not prim.ready):
-            sev = worst(sev, CRIT)
             c.notes.append((CRIT, f"{c.ready}/{c.desired} instances ready — primary not ready"))
         else:
-            sev = worst(sev, WARN)
             c.notes.append((WARN, f"{c.ready}/{c.desired} instances ready ({short} missing)"))
     for inst in c.instances:
         if inst.reason and "CrashLoop" in inst.reason:
-            sev = worst(sev, CRIT)
             c.notes.append((CRIT, f"{inst.name}: {inst.reason}"))
         elif inst.phase == "Running" and not inst.ready:
-            sev = worst(sev, WARN)
             c.notes.append((WARN, f"{inst.name}: Running but NotReady"))
         elif inst.phase not in ("Running", "?"):
-            sev = worst(sev, WARN)
             c.notes.append((WARN, f"{inst.name}: {inst.phase}"
                                   + (f" ({inst.reason})" if inst.reason else "")))
 
-    # Inactive replication slots pinning WAL — the smoking gun.
-    for s in c.slots:
-        if s.active:
-            continue
-        rb = s.retained_bytes or 0
-        if (s.wal_status == "lost") or rb >= SLOT_CRIT_BYTES:
-            sev = worst(sev, CRIT)
-            c.notes.append((CRIT, f"inactive slot {s.name} pinning "
-                                  f"{human_bytes(rb)} of WAL"
-                                  + (f" (wal_status={s.wal_status})" if s.wal_status else "")))
-        elif rb >= SLOT_WARN_BYTES:
-            sev = worst(sev, WARN)
-            c.notes.append((WARN, f"inactive slot {s.name} pinning {human_bytes(rb)} of WAL"))
-
-    # PVC fill + WAL fraction, per instance.
+
+def check_apply_keepup(c: Cluster) -> None:
+    """Replay falling behind the WAL arriving: compared against the primary's
+    WAL generation rate when it was sampled, the replica's receive rate
+    otherwise, once at least APPLY_PENDING_MIN is waiting."""
+    gen = c.wal.gen_rate if c.wal is not None and c.wal.gen_rate else None
     for inst in c.instances:
-        if inst.pvc_pct is not None:
-            if inst.pvc_pct >= PVC_CRIT:
-                sev = worst(sev, CRIT)
-                c.notes.append((CRIT, f"{inst.name} PVC {inst.pvc_pct:.0f}% full"))
-            elif inst.pvc_pct >= PVC_WARN:
-                sev = worst(sev, WARN)
-                c.notes.append((WARN, f"{inst.name} PVC {inst.pvc_pct:.0f}% full"))
-        # WAL fraction is a WARN-only supporting signal (see threshold comment):
-        # it never escalates the verdict to CRIT on its own.
-        wf = inst.wal_frac
-        if wf is not None and wf >= WAL_FRAC_WARN:
-            sev = worst(sev, WARN)
-            c.notes.append((WARN, f"{inst.name} pg_wal is {wf:.0f}% of the volume "
-                                  f"({human_bytes(inst.wal_bytes)}) — limited headroom"))
-
-    # Replication lag on streaming replicas.
-    for lag in c.lags:
-        lb = lag.lag_bytes or 0
-        if lb >= LAG_CRIT_BYTES:
-            sev = worst(sev, CRIT)
-            c.notes.append((CRIT, f"replica {lag.app} {human_bytes(lb)} behind primary"))
-        elif lb >= LAG_WARN_BYTES:
-            sev = worst(sev, WARN)
-            c.notes.append((WARN, f"replica {lag.app} {human_bytes(lb)} behind primary"))
-
-    # Backups / continuous archiving.
+        r = inst.replay
+        if r is None:
+            continue
+        src, what = (gen, "primary writing") if gen else (r.receive_rate, "receiving")
+        if (r.apply_rate is not None and src
+                and (r.pending_bytes or 0) >= APPLY_PENDING_MIN
+                and r.apply_rate < APPLY_KEEPUP_RATIO * src):
+            c.notes.append((WARN, f"replica {inst.name} applying "
+                                  f"{human_bytes(r.apply_rate)}/s, {what} "
+                                  f"{human_bytes(src)}/s — replay falling behind "
+                                  f"({human_bytes(r.pending_bytes)} pending)"))
+
+
+def check_archiving(c: Cluster) -> None:
     if c.continuous_archiving == "False":
-        sev = worst(sev, WARN)
         c.notes.append((WARN, "continuous archiving unhealthy (ContinuousArchiving=False)"))
+
+
+def check_archive_command(c: Cluster) -> None:
+    w = c.wal
+    if w is not None and w.failing and c.continuous_archiving != "False":
+        last = (f"{human_age(w.last_archived_age)} ago" if w.last_archived_age is not None
+                else "never")
+        c.notes.append((WARN, f"archive_command failing ({w.failed_count} failures, "
+                              f"last success {last})"))
     if c.last_backup_succeeded == "False":
-        sev = worst(sev, WARN)
         c.notes.append((WARN, "last backup failed (LastBackupSucceeded=False)"))
-    if c.backup_configured and c.last_backup_age is not None:
-        if c.last_backup_age >= BACKUP_CRIT_AGE:
-            sev = worst(sev, CRIT)
-            c.notes.append((CRIT, f"last successful backup {human_age(c.last_backup_age)} ago"))
-        elif c.last_backup_age >= BACKUP_WARN_AGE:
-            sev = worst(sev, WARN)
-            c.notes.append((WARN, f"last successful backup {human_age(c.last_backup_age)} ago"))
 
+
+def check_backup_timestamp(c: Cluster) -> None:
     if c.backup_configured and c.backup_ts_bad:
-        sev = worst(sev, WARN)
         c.notes.append((WARN, "last-backup timestamp unparseable — backup age unknown"))
 
-    # A failed probe is ALWAYS surfaced (raised to at least UNKNOWN, note added),
-    # regardless of the verdict from the signals that DID land. Previously this
-    # only fired when the verdict was still OK, so a WARN/CRIT cluster could hide
-    # that its PVC/WAL/slot data was never actually collected.
-    if not c.exec_ok:
-        sev = worst(sev, UNKNOWN)
+
+def check_probes(c: Cluster) -> None:
+    """A failed probe is ALWAYS surfaced (at least UNKNOWN, with a note),
+    whatever the signals that DID land say, so a WARN/CRIT cluster can't hide
+    that its PVC/WAL/slot data was never actually collected."""
+    if c.late:
+        c.notes.append((UNKNOWN, "probes still running at the --deadline — data partial"))
+    elif not c.exec_ok:
         c.notes.append((UNKNOWN, "some instance probes failed (exec) — data partial"))
 
-    return sev
+
+RULES: list[Rule | Callable[[Cluster], None]] = [
+    check_instances,
+    # Inactive replication slots pinning WAL — the smoking gun.
+    Rule("slot-lost", "slot", "wal_status", crit="lost", op="==", where=("!active",),
+         group="slot", message="inactive slot {name} pinning {retained_bytes:bytes0} "
+                               "of WAL (wal_status=lost)"),
+    Rule("slot", "slot", "retained_bytes", SLOT_WARN_BYTES, SLOT_CRIT_BYTES,
+         where=("!active",), group="slot",
+         message="inactive slot {name} pinning {value:bytes} of WAL",
+         crit_message="inactive slot {name} pinning {value:bytes} of WAL"
+                      "{wal_status:? (wal_status=%s)}"),
+    Rule("pvc", "instance", "pvc_pct", PVC_WARN, PVC_CRIT,
+         message="{name} PVC {value:.0f}% full"),
+    # WARN-only supporting signal (see WAL_FRAC_WARN).
+    Rule("wal-frac", "instance", "wal_frac", WAL_FRAC_WARN,
+         message="{name} pg_wal is {value:.0f}% of the volume ({wal_bytes:bytes}) "
+                 "— limited headroom"),
+    # --history: the volume fills at the current growth rate.
+    Rule("ttf", "instance", "ttf", TTF_WARN, TTF_CRIT, op="<",
+         message="{name} volume full in ~{value:age} at the current {forecast[1]} "
+                 "growth ({forecast[2]:rate})"),
+    Rule("lag", "lag", "lag_bytes", LAG_WARN_BYTES, LAG_CRIT_BYTES,
+         message="replica {app} {value:bytes} behind primary"),
+    # The replica's own view: how old its data is (only while WAL is pending).
+    Rule("replay-delay", "instance", "replay.delay_secs", REPLAY_DELAY_WARN,
+         REPLAY_DELAY_CRIT,
+         message="replica {name} replay {value:age} behind "
+                 "({replay.pending_bytes:bytes} received, not applied)"),
+    check_apply_keepup,
+    # Transactions held open pin the xmin horizon (vacuum can't reclaim
+    # anything newer, so every table bloats) and hold their locks.
+    # Same group: an idle session still gets xact-age's CRIT once the
+    # transaction is old enough — idle in transaction is the worse case.
+    Rule("idle-xact", "xact", "state_age", IDLE_XACT_WARN_AGE, where=("idle_in_xact",),
+         group="xact", message="pid {pid} ({user}@{db}) idle in transaction for {value:age}"),
+    Rule("xact-age", "xact", "xact_age", XACT_WARN_AGE, XACT_CRIT_AGE, group="xact",
+         message="pid {pid} ({user}@{db}) transaction open for {value:age}"),
+    Rule("xid-age", "cluster", "xid_age", XID_WARN_AGE, XID_CRIT_AGE,
+         message="database {xid_db} xid age {value:count} "
+                 "({xid_wraparound:.0%} of wraparound)"),
+    Rule("ckpt-forced", "cluster", "checkpoints.requested_ratio", CKPT_REQ_WARN, op=">",
+         where=(f"checkpoints.total>={CKPT_MIN_COUNT}",),
+         message="{value:.0%} of checkpoints forced by WAL volume "
+                 "(max_wal_size too small for the write rate)"),
+    Rule("ckpt-sync", "cluster", "checkpoints.mean_sync_secs", CKPT_SYNC_WARN, op=">",
+         where=(f"checkpoints.total>={CKPT_MIN_COUNT}",),
+         message="checkpoint fsync averages {value:.1f}s — storage is slow to flush"),
+    # Dead-tuple bloat (autovacuum falling behind) in the app database.
+    Rule("dead-tuples", "table", "ratio", DEAD_WARN_RATIO, DEAD_CRIT_RATIO,
+         message="{c.database}.{table} {value:.0%} dead tuples ({dead:,} rows, "
+                 "last vacuum {since_vacuum:ago})"),
+    check_archiving,
+    # Segments waiting for archive_command stay pinned in pg_wal, like WAL
+    # behind a stale slot.
+    Rule("archive-backlog", "cluster", "wal.backlog_bytes", ARCHIVE_BACKLOG_WARN,
+         ARCHIVE_BACKLOG_CRIT,
+         message="archive backlog {value:bytes} ({wal.ready_segments} WAL segments "
+                 "waiting{wal.gen_rate:?; writing {wal.gen_rate:bytes}/s, archiving "
+                 "{wal.archive_rate:bytes}/s})"),
+    # Throughput, not just the pile: archive_command trailing generation
+    # grows the backlog before it reaches the limits above.
+    Rule("archive-keepup", "cluster", "wal.archive_keepup", ARCHIVE_KEEPUP_RATIO, op="<",
+         where=(f"wal.backlog_bytes>={ARCHIVE_KEEPUP_MIN_BACKLOG}",),
+         message="archiving {wal.archive_rate:bytes}/s, {value:.0%} of the "
+                 "{wal.gen_rate:bytes}/s written — archive_command falling behind "
+                 "({wal.backlog_bytes:bytes} waiting)"),
+    check_archive_command,
+    Rule("backup-age", "cluster", "last_backup_age", BACKUP_WARN_AGE, BACKUP_CRIT_AGE,
+         where=("backup_configured",),
+         message="last successful backup {value:age} ago"),
+    check_backup_timestamp,
+    check_probes,
+]
+RULE_DEFAULTS: dict[str, Limits] = {r.name: (r.warn, r.crit) for r in RULES
+                                    if isinstance(r, Rule)}
+
+
+def limits(c: Cluster, rule: str) -> Limits:
+    """The (warn, crit) a cluster is judged by for `rule` (cells, scheduler)."""
+    return c.limits.get(rule, RULE_DEFAULTS[rule])
+
+
+def level(value: float | None, lim: Limits, op: str = ">=") -> str:
+    """OK / WARN / CRIT for one value against (warn, crit)."""
+    warn, crit = lim
+    if value is None:
+        return OK
+    if crit is not None and _OPS[op](value, crit):
+        return CRIT
+    if warn is not None and _OPS[op](value, warn):
+        return WARN
+    return OK
+
+
+def evaluate_fleet(clusters: list[Cluster],
+                   rules: list[Rule | Callable[[Cluster], None]] | None = None
+                   ) -> dict[str, str]:
+    """Run the rule table over every cluster; the verdict is the worst note.
+
+    Table rules go column-wise (one rule over the whole fleet, then the
+    next), so a rule's metric getter and where clauses are set up once per
+    run rather than once per cluster. Check functions run per cluster in
+    their table position."""
+    claimed: dict[str, dict[int, str]] = {}
+    for rule in RULES if rules is None else rules:
+        if isinstance(rule, Rule):
+            rule.evaluate(clusters, claimed)
+        else:
+            for c in clusters:
+                rule(c)
+    return {c.key: worst(OK, *(sev for sev, _ in c.notes)) for c in clusters}
+
+
+def evaluate(c: Cluster, rules: list[Rule | Callable[[Cluster], None]] | None = None) -> str:
+    return evaluate_fleet([c], rules)[c.key]
+
+
+# ---------------------------------------------------------------------------
+# Thresholds (--thresholds): per-namespace / per-cluster limits, extra rules
+# ---------------------------------------------------------------------------
+_QUANTITY = re.compile(r"^\s*([\d.]+)\s*(Ki|Mi|Gi|Ti|s|m|h|d)?\s*$")
+_UNITS = {"Ki": 1024, "Mi": 1024**2, "Gi": 1024**3, "Ti": 1024**4,
+          "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _limit_value(v: object) -> float | str | None:
+    """A limit from JSON: a number, a byte size ("512Mi") or a duration ("15m")."""
+    if v is None or isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v
+    if isinstance(v, str):
+        m = _QUANTITY.match(v)
+        if m:
+            return float(m.group(1)) * _UNITS.get(m.group(2) or "", 1)
+        return v                        # an == rule's literal (e.g. "lost")
+    raise ValueError(f"bad limit {v!r}")
+
+
+class Thresholds:
+    """The rule table plus its limits, layered per cluster:
+
+        rule default < "defaults" < "namespaces"[ns] < "clusters"["ns/name"]
+
+    Each layer maps rule name -> {"warn": x, "crit": y} (either may be left
+    out to inherit; null turns the rule off there). Limits are resolved once
+    per cluster and stored on Cluster.limits, which evaluate, the table
+    colors and the --serve scheduler all read — nothing is module-global.
+    """
+
+    def __init__(self, spec: dict | None = None, overrides: dict | None = None):
+        spec = spec or {}
+        if not isinstance(spec, dict):
+            raise ValueError("expected a JSON object")
+        self.rules: list[Rule | Callable[[Cluster], None]] = list(RULES)
+        extra = [Rule.from_dict(d) for d in spec.get("rules") or []]
+        names = set(RULE_DEFAULTS)
+        for r in extra:
+            if r.name in names:
+                raise ValueError(f"rule {r.name!r} defined twice")
+            names.add(r.name)
+        # New rules go before the probe-state check, so UNKNOWN stays last.
+        self.rules[-1:-1] = extra
+        self.base = {**RULE_DEFAULTS, **{r.name: (r.warn, r.crit) for r in extra}}
+        self.base = self._layer(self.base, spec.get("defaults"), "defaults")
+        self.base = self._layer(self.base, overrides, "flags")     # --pvc-warn etc.
+        self.namespaces = {ns: self._check(v, f"namespaces.{ns}")
+                           for ns, v in (spec.get("namespaces") or {}).items()}
+        self.clusters = {k: self._check(v, f"clusters.{k}")
+                         for k, v in (spec.get("clusters") or {}).items()}
+
+    @classmethod
+    def load(cls, path: str, overrides: dict | None = None) -> Thresholds:
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh), overrides)
+
+    def for_cluster(self, c: Cluster) -> dict[str, Limits]:
+        lim = self.base
+        for key, layers in ((c.namespace, self.namespaces),
+                            (f"{c.namespace}/{c.name}", self.clusters),
+                            (c.key, self.clusters)):
+            if key in layers and not (layers is self.clusters and key == c.key
+                                      and not c.context):
+                lim = self._layer(lim, layers[key], key)
+        return lim
+
+    def assign(self, clusters: list[Cluster]) -> None:
+        for c in clusters:
+            c.limits = self.for_cluster(c)
+
+    def _check(self, layer: object, where: str) -> dict:
+        self._layer(self.base, layer, where)     # validate once, at load
+        return layer  # type: ignore[return-value]
+
+    def _layer(self, lim: dict[str, Limits], layer: object, where: str) -> dict[str, Limits]:
+        if layer is None:
+            return lim
+        if not isinstance(layer, dict):
+            raise ValueError(f"{where}: expected an object of rule -> limits")
+        out = dict(lim)
+        for name, v in layer.items():
+            if name not in lim:
+                raise ValueError(f"{where}: unknown rule {name!r} "
+                                 f"(one of {', '.join(sorted(lim))})")
+            if v is None:
+                out[name] = (None, None)
+            elif isinstance(v, dict) and set(v) <= {"warn", "crit"}:
+                warn, crit = lim[name]
+                out[name] = (_limit_value(v["warn"]) if "warn" in v else warn,
+                             _limit_value(v["crit"]) if "crit" in v else crit)
+            else:
+                raise ValueError(f"{where}.{name}: expected {{\"warn\": .., \"crit\": ..}} "
+                                 "or null")
+        return out
 
 
 # ---------------------------------------------------------------------------
 # Rendering
 # ---------------------------------------------------------------------------
+_SEV_CODE = {OK: "", UNKNOWN: "", WARN: C.YELLOW, CRIT: C.RED}
+
+
 def _slots_cell(c: Cluster) -> str:
     if not c.slots:
         return _c("-", C.DIM)
@@ -589,7 +2951,7 @@ def _slots_cell(c: Cluster) -> str:
     if not inactive:
         return f"{active}a"
     pinned = max((s.retained_bytes or 0) for s in inactive)
-    code = C.RED if pinned >= SLOT_CRIT_BYTES else C.YELLOW
+    code = C.RED if level(pinned, limits(c, "slot")) == CRIT else C.YELLOW
     return _c(f"{len(inactive)}!{human_bytes(pinned)}", code)
 
 
@@ -598,7 +2960,7 @@ def _pvc_cell(c: Cluster) -> str:
     if not pcts:
         return _c("?", C.DIM)
     p = max(pcts)
-    code = C.RED if p >= PVC_CRIT else (C.YELLOW if p >= PVC_WARN else "")
+    code = _SEV_CODE[level(p, limits(c, "pvc"))]
     return _c(f"{p:.0f}%", code) if code else f"{p:.0f}%"
 
 
@@ -607,7 +2969,7 @@ def _wal_cell(c: Cluster) -> str:
     if not fracs:
         return _c("?", C.DIM)
     p = max(fracs)
-    code = C.YELLOW if p >= WAL_FRAC_WARN else ""
+    code = _SEV_CODE[level(p, limits(c, "wal-frac"))]
     return _c(f"{p:.0f}%", code) if code else f"{p:.0f}%"
 
 
@@ -615,15 +2977,24 @@ def _lag_cell(c: Cluster) -> str:
     if not c.lags:
         return _c("-", C.DIM)
     m = max((lag.lag_bytes or 0) for lag in c.lags)
-    code = C.RED if m >= LAG_CRIT_BYTES else (C.YELLOW if m >= LAG_WARN_BYTES else "")
+    code = _SEV_CODE[level(m, limits(c, "lag"))]
     return _c(human_bytes(m), code) if code else human_bytes(m)
 
 
+def _walrate_cell(c: Cluster) -> str:
+    """WAL generated per second, colored by the archive backlog behind it."""
+    w = c.wal
+    if w is None or w.gen_rate is None:
+        return _c("-", C.DIM)
+    code = _SEV_CODE[level(w.backlog_bytes, limits(c, "archive-backlog"))]
+    text = human_bytes(w.gen_rate)
+    return _c(text, code) if code else text
+
+
 def _backup_cell(c: Cluster) -> str:
     if c.last_backup_age is not None:
         age = human_age(c.last_backup_age)
-        code = (C.RED if c.last_backup_age >= BACKUP_CRIT_AGE
-                else C.YELLOW if c.last_backup_age >= BACKUP_WARN_AGE else "")
+        code = _SEV_CODE[level(c.last_backup_age, limits(c, "backup-age"))]
         return _c(age, code) if code else age
     if c.continuous_archiving == "True":
         return _c("arch", C.GREEN)
@@ -632,6 +3003,22 @@ def _backup_cell(c: Cluster) -> str:
     return _c("none", C.DIM)
 
 
+def _growth_cell(c: Cluster) -> str:
+    rates = [i.pvc_rate for i in c.instances if i.pvc_rate is not None]
+    if not rates:
+        return _c("?", C.DIM)
+    return human_rate(max(rates))
+
+
+def _ttf_cell(c: Cluster) -> str:
+    ttfs = [m[0] for m in map(_min_ttf, c.instances) if m is not None]
+    if not ttfs:
+        return _c("-", C.DIM)
+    t = min(ttfs)
+    code = _SEV_CODE[level(t, limits(c, "ttf"), "<")]
+    return _c(human_age(t), code) if code else human_age(t)
+
+
 def _inst_cell(c: Cluster) -> str:
     txt = f"{c.ready}/{c.desired}"
     if c.desired and c.ready < c.desired:
@@ -655,20 +3042,35 @@ def _pad(s: str, width: int) -> str:
     return s + " " * max(0, width - _visible_len(s))
 
 
+def _table_headers(forecast: bool) -> list[str]:
+    headers = ["CLUSTER", "INST", "PVC", "WAL", "SLOTS", "LAG", "WAL/S", "BACKUP", "VERDICT"]
+    if forecast:
+        headers[3:3] = ["GROWTH", "TTF"]
+    return headers
+
+
+def _table_row(c: Cluster, verdict: str, forecast: bool) -> list[str]:
+    row = [
+        c.key,
+        _inst_cell(c),
+        _pvc_cell(c),
+        _wal_cell(c),
+        _slots_cell(c),
+        _lag_cell(c),
+        _walrate_cell(c),
+        _backup_cell(c),
+        paint_sev(verdict),
+    ]
+    if forecast:
+        row[3:3] = [_growth_cell(c), _ttf_cell(c)]
+    return row
+
+
 def render_table(clusters: list[Cluster], verdicts: dict[str, str]) -> str:
-    headers = ["CLUSTER", "INST", "PVC", "WAL", "SLOTS", "LAG", "BACKUP", "VERDICT"]
-    rows = []
-    for c in clusters:
-        rows.append([
-            c.key,
-            _inst_cell(c),
-            _pvc_cell(c),
-            _wal_cell(c),
-            _slots_cell(c),
-            _lag_cell(c),
-            _backup_cell(c),
-            paint_sev(verdicts[c.key]),
-        ])
+    # GROWTH/TTF only once --history has produced a fit for something.
+    forecast = any(i.pvc_rate is not None for c in clusters for i in c.instances)
+    headers = _table_headers(forecast)
+    rows = [_table_row(c, verdicts[c.key], forecast) for c in clusters]
     widths = [len(h) for h in headers]
     for r in rows:
         for i, cell in enumerate(r):
@@ -680,26 +3082,49 @@ def render_table(clusters: list[Cluster], verdicts: dict[str, str]) -> str:
     return "\n".join(lines)
 
 
-def render(clusters: list[Cluster], verdicts: dict[str, str], details: bool) -> str:
-    counts = {OK: 0, WARN: 0, CRIT: 0, UNKNOWN: 0}
-    for v in verdicts.values():
-        counts[v] = counts.get(v, 0) + 1
+# Streamed rows can't be measured up front: size each column for its typical
+# widest value (cluster keys are known after discovery) and let outliers push.
+_STREAM_WIDTHS = {"INST": 4, "PVC": 4, "WAL": 4, "SLOTS": 7, "LAG": 6, "WAL/S": 5,
+                  "BACKUP": 6, "GROWTH": 9, "TTF": 5, "VERDICT": 7}
 
+
+class StreamTable:
+    """The fleet table, one row at a time, in the order clusters finish."""
+
+    def __init__(self, clusters: list[Cluster], forecast: bool):
+        self.forecast = forecast
+        self.headers = _table_headers(forecast)
+        key_w = max((len(c.key) for c in clusters), default=0)
+        self.widths = [max(len(h), key_w if h == "CLUSTER" else _STREAM_WIDTHS[h])
+                       for h in self.headers]
+
+    def header(self, n: int) -> str:
+        title = _c("cnpgscope", C.BOLD, C.CYAN)
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        cols = "  ".join(_pad(_c(h, C.BOLD), self.widths[i])
+                         for i, h in enumerate(self.headers))
+        return (f"{title} — CloudNativePG fleet health @ {stamp}  ({n} clusters)"
+                f"\n\n{cols}")
+
+    def row(self, c: Cluster, verdict: str) -> str:
+        cells = _table_row(c, verdict, self.forecast)
+        return "  ".join(_pad(cell, self.widths[i]) for i, cell in enumerate(cells))
+
+
+def render(clusters: list[Cluster], verdicts: dict[str, str], details: bool,
+           table: bool = True) -> str:
+    """The full report; with table=False only what follows the table (the
+    streaming path has already printed the header and rows)."""
     out = []
-    header = _c("cnpgscope", C.BOLD, C.CYAN)
-    stamp = time.strftime("%Y-%m-%dT%H:%M:%S%z")
-    out.append(f"{header} — CloudNativePG fleet health @ {stamp}  "
-               f"({len(clusters)} clusters)")
-    out.append("")
-    out.append(render_table(clusters, verdicts))
+    if table:
+        header = _c("cnpgscope", C.BOLD, C.CYAN)
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        out.append(f"{header} — CloudNativePG fleet health @ {stamp}  "
+                   f"({len(clusters)} clusters)")
+        out.append("")
+        out.append(render_table(clusters, verdicts))
     out.append("")
-
-    summary = (f"Fleet: {_c(str(counts[CRIT]) + ' CRITICAL', C.BOLD, C.RED)}, "
-               f"{_c(str(counts[WARN]) + ' WARN', C.BOLD, C.YELLOW)}, "
-               f"{_c(str(counts[OK]) + ' OK', C.BOLD, C.GREEN)}")
-    if counts[UNKNOWN]:
-        summary += f", {_c(str(counts[UNKNOWN]) + ' UNKNOWN', C.DIM)}"
-    out.append(summary)
+    out.append(_fleet_summary(verdicts))
 
     # Detail: why each non-OK cluster is flagged (all clusters with --details).
     targets = clusters if details else [c for c in clusters if verdicts[c.key] != OK]
@@ -714,8 +3139,21 @@ def render(clusters: list[Cluster], verdicts: dict[str, str], details: bool) ->
     return "\n".join(out)
 
 
+def _fleet_summary(verdicts: dict[str, str]) -> str:
+    counts = {OK: 0, WARN: 0, CRIT: 0, UNKNOWN: 0}
+    for v in verdicts.values():
+        counts[v] = counts.get(v, 0) + 1
+    summary = (f"Fleet: {_c(str(counts[CRIT]) + ' CRITICAL', C.BOLD, C.RED)}, "
+               f"{_c(str(counts[WARN]) + ' WARN', C.BOLD, C.YELLOW)}, "
+               f"{_c(str(counts[OK]) + ' OK', C.BOLD, C.GREEN)}")
+    if counts[UNKNOWN]:
+        summary += f", {_c(str(counts[UNKNOWN]) + ' UNKNOWN', C.DIM)}"
+    return summary
+
+
 def to_dict(c: Cluster, verdict: str) -> dict:
     return {
+        **({"context": c.context} if c.context else {}),
         "namespace": c.namespace,
         "name": c.name,
         "verdict": verdict,
@@ -730,9 +3168,21 @@ def to_dict(c: Cluster, verdict: str) -> dict:
         "instances": [
             {
                 "name": i.name, "role": i.role, "phase": i.phase, "ready": i.ready,
-                "reason": i.reason, "pvcPct": i.pvc_pct,
+                "reason": i.reason, "node": i.node, "pvcPct": i.pvc_pct,
                 "pvcSizeBytes": i.pvc_size_bytes, "walBytes": i.wal_bytes,
                 "walFracPct": i.wal_frac,
+                "pvcGrowthBytesPerSec": i.pvc_rate,
+                "walGrowthBytesPerSec": i.wal_rate,
+                "slotRetainedGrowthBytesPerSec": i.slot_rate,
+                "pvcTimeToFullSeconds": i.pvc_ttf,
+                "walTimeToFullSeconds": i.wal_ttf,
+                "slotTimeToFullSeconds": i.slot_ttf,
+                "replay": None if i.replay is None else {
+                    "delaySeconds": i.replay.delay_secs,
+                    "pendingBytes": i.replay.pending_bytes,
+                    "receiveBytesPerSec": i.replay.receive_rate,
+                    "applyBytesPerSec": i.replay.apply_rate,
+                },
             }
             for i in c.instances
         ],
@@ -745,75 +3195,1377 @@ def to_dict(c: Cluster, verdict: str) -> dict:
             {"app": lag.app, "state": lag.state, "lagBytes": lag.lag_bytes}
             for lag in c.lags
         ],
+        "openTransactions": [
+            {"pid": b.pid, "db": b.db, "user": b.user, "state": b.state,
+             "xactAgeSeconds": b.xact_age, "stateAgeSeconds": b.state_age}
+            for b in c.xacts
+        ],
+        "xidAge": c.xid_age,
+        "xidAgeDatabase": c.xid_db or None,
+        "checkpoints": None if c.checkpoints is None else {
+            "timed": c.checkpoints.timed, "requested": c.checkpoints.requested,
+            "writeMs": c.checkpoints.write_ms, "syncMs": c.checkpoints.sync_ms,
+            "buffers": c.checkpoints.buffers,
+        },
+        "wal": None if c.wal is None else {
+            "generatedBytesPerSec": c.wal.gen_rate,
+            "archivedBytesPerSec": c.wal.archive_rate,
+            "archiveBacklogBytes": c.wal.backlog_bytes,
+            "archiveReadySegments": c.wal.ready_segments,
+            "archiveFailing": c.wal.failing,
+            "archiveFailedCount": c.wal.failed_count,
+            "lastArchivedAgeSeconds": c.wal.last_archived_age,
+        },
+        "deadTuples": [
+            {"table": t.table, "live": t.live, "dead": t.dead, "ratio": round(t.ratio, 4),
+             "sinceVacuumSeconds": t.since_vacuum}
+            for t in c.dead_tuples
+        ],
         "notes": [{"severity": s, "text": t} for s, t in c.notes],
     }
 
 
+def ndjson_line(record: dict) -> str:
+    """One -o ndjson record: compact, single-line JSON."""
+    return json.dumps(record, separators=(",", ":"))
+
+
+def write_json(v: object, out: IO[str], level: int = 0) -> None:
+    """`json.dumps(v, indent=2)`, written to `out` a record at a time.
+
+    Iterators inside `v` (a generator of to_dict records) are drained one
+    element at a time, each encoded and written before the next is built, so
+    the -o json document never exists as a whole-fleet dict tree or string:
+    peak memory is one cluster's record, whatever the fleet size."""
+    pad = "  " * level
+    if isinstance(v, Iterator):
+        n = 0
+        for n, item in enumerate(v, 1):
+            out.write(f"{'[' if n == 1 else ','}\n{pad}  ")
+            write_json(item, out, level + 1)
+        out.write(f"\n{pad}]" if n else "[]")
+    elif isinstance(v, dict) and _has_iterator(v):
+        out.write("{")
+        for n, (k, item) in enumerate(v.items()):
+            out.write(f"{',' if n else ''}\n{pad}  {json.dumps(k)}: ")
+            write_json(item, out, level + 1)
+        out.write(f"\n{pad}}}")
+    else:
+        # Escaped strings never contain a raw newline: only the layout's do.
+        out.write(json.dumps(v, indent=2).replace("\n", "\n" + pad))
+
+
+def _has_iterator(d: dict) -> bool:
+    return any(isinstance(v, Iterator) or isinstance(v, dict) and _has_iterator(v)
+               for v in d.values())
+
+
+# ---------------------------------------------------------------------------
+# Differential mode (--diff): only what moved since a saved scan
+# ---------------------------------------------------------------------------
+def _max_of(values: Iterable[float | None]) -> float | None:
+    return max((v for v in values if v is not None), default=None)
+
+
+# Key metrics --diff compares, read off to_dict() records (so a saved -o json
+# works as the baseline), each with the smallest move worth reporting.
+DIFF_METRICS: dict[str, tuple[Callable[[dict], float | None], float]] = {
+    "ready": (lambda d: d.get("ready"), 1),
+    "pvcPct": (lambda d: _max_of(i.get("pvcPct") for i in d.get("instances", [])), 5.0),
+    "walFracPct": (lambda d: _max_of(i.get("walFracPct") for i in d.get("instances", [])),
+                   5.0),
+    "inactiveSlotBytes": (lambda d: _max_of(s.get("retainedBytes") for s in d.get("slots", [])
+                                            if not s.get("active")), SLOT_WARN_BYTES / 2),
+    "lagBytes": (lambda d: _max_of(lg.get("lagBytes") for lg in d.get("replicationLag", [])),
+                 LAG_WARN_BYTES),
+    "archiveBacklogBytes": (lambda d: (d.get("wal") or {}).get("archiveBacklogBytes"),
+                            ARCHIVE_BACKLOG_WARN),
+    "xidAge": (lambda d: d.get("xidAge"), 100_000_000),
+}
+
+
+@dataclass
+class Change:
+    """One cluster's difference from the baseline scan."""
+    key: str
+    kind: str                                # changed | new | gone
+    verdict: tuple[str, str]                 # (before, now); "" on the missing side
+    added: list[str] = field(default_factory=list)       # notes that appeared
+    resolved: list[str] = field(default_factory=list)    # notes that went away
+    moved: dict[str, tuple[float, float]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {"cluster": self.key, "kind": self.kind,
+                "verdict": {"before": self.verdict[0] or None,
+                            "now": self.verdict[1] or None},
+                "notesAdded": self.added, "notesResolved": self.resolved,
+                "metrics": {k: {"before": a, "now": b} for k, (a, b) in self.moved.items()}}
+
+
+def _record_key(d: dict) -> str:
+    key = f"{d.get('namespace', '')}/{d.get('name', '')}"
+    return f"{d['context']}:{key}" if d.get("context") else key
+
+
+def load_baseline(path: str) -> tuple[str, dict[str, dict]]:
+    """A previous -o json document or -o ndjson stream: (generated, key -> cluster)."""
+    with open(path) as fh:
+        text = fh.read()
+    try:
+        docs = [json.loads(text)]
+    except ValueError:
+        docs = [json.loads(ln) for ln in text.splitlines() if ln.strip()]
+    generated, records = "", []
+    for doc in docs:
+        if not isinstance(doc, dict):
+            raise ValueError("not a cnpgscope -o json / -o ndjson document")
+        generated = doc.get("generated") or generated
+        if doc.get("record") == "cluster":
+            records.append(doc)
+        records += doc.get("clusters", [])
+        for ctx in (doc.get("contexts") or {}).values():
+            records += ctx.get("clusters", [])
+    return generated, {_record_key(d): d for d in records}
+
+
+def _note_shape(text: str) -> str:
+    """A note with its numbers masked, so "6m behind" -> "7m behind" is the same
+    finding (the metrics carry the size of the move)."""
+    return re.sub(r"\d[\d.,]*", "#", text)
+
+
+def diff_fleet(before: dict[str, dict], now: dict[str, dict]) -> list[Change]:
+    """Clusters whose verdict, notes or DIFF_METRICS moved, plus new and gone ones."""
+    changes: list[Change] = []
+    for key, cur in now.items():
+        prev = before.get(key)
+        if prev is None:
+            changes.append(Change(key, "new", ("", cur.get("verdict", "")),
+                                  added=[n.get("text", "") for n in cur.get("notes", [])]))
+            continue
+        ch = Change(key, "changed", (prev.get("verdict", ""), cur.get("verdict", "")))
+        old = {_note_shape(n.get("text", "")) for n in prev.get("notes", [])}
+        new = {_note_shape(n.get("text", "")) for n in cur.get("notes", [])}
+        ch.added = [n.get("text", "") for n in cur.get("notes", [])
+                    if _note_shape(n.get("text", "")) not in old]
+        ch.resolved = [n.get("text", "") for n in prev.get("notes", [])
+                       if _note_shape(n.get("text", "")) not in new]
+        for name, (read, delta) in DIFF_METRICS.items():
+            a, b = read(prev), read(cur)
+            if a is not None and b is not None and abs(b - a) >= delta:
+                ch.moved[name] = (a, b)
+        if ch.verdict[0] != ch.verdict[1] or ch.added or ch.resolved or ch.moved:
+            changes.append(ch)
+    changes += [Change(key, "gone", (prev.get("verdict", ""), ""))
+                for key, prev in before.items() if key not in now]
+    return changes
+
+
+def _fmt_metric(name: str, v: float) -> str:
+    if name.endswith("Bytes"):
+        return human_bytes(v)
+    if name.endswith("Pct"):
+        return f"{v:.0f}%"
+    if name == "xidAge":
+        return f"{v / 1e9:.2f}B"
+    return f"{v:g}"
+
+
+def render_diff(clusters: list[Cluster], verdicts: dict[str, str],
+                changes: list[Change], since: str) -> str:
+    """Only the clusters that moved: their table rows, then a changelog."""
+    kinds = {k: sum(ch.kind == k for ch in changes) for k in ("changed", "new", "gone")}
+    header = _c("cnpgscope", C.BOLD, C.CYAN)
+    out = [f"{header} — changes since {since or 'the baseline'}: "
+           f"{kinds['changed']} changed, {kinds['new']} new, {kinds['gone']} gone "
+           f"({len(clusters)} clusters)"]
+    keys = {ch.key for ch in changes}
+    shown = [c for c in clusters if c.key in keys]
+    if shown:
+        out += ["", render_table(shown, verdicts)]
+    if changes:
+        out.append("")
+    for ch in changes:
+        before, now = ch.verdict
+        if ch.kind == "new":
+            what = f"new ({paint_sev(now)})"
+        elif ch.kind == "gone":
+            what = f"gone (was {paint_sev(before)})"
+        elif before != now:
+            what = f"{paint_sev(before)} → {paint_sev(now)}"
+        else:
+            what = paint_sev(now)
+        out.append(f"{_c(ch.key, C.BOLD)}  {what}")
+        out += [f"    {_c('+', C.RED)} {t}" for t in ch.added]
+        out += [f"    {_c('-', C.GREEN)} {t}" for t in ch.resolved]
+        out += [f"    ~ {name} {_fmt_metric(name, a)} → {_fmt_metric(name, b)}"
+                for name, (a, b) in ch.moved.items()]
+    out += ["", _fleet_summary(verdicts)]
+    return "\n".join(out)
+
+
+# ---------------------------------------------------------------------------
+# Incremental discovery (--serve): list+watch mirror + probe-result cache
+# ---------------------------------------------------------------------------
+class Inventory:
+    """List+watch mirror of the Cluster CRs and CNPG pods.
+
+    Each resource is listed once and then followed with a watch from the
+    list's resourceVersion (bookmarks keep it current); events patch the
+    mirror in place and set `changed`. A watch that ends normally resumes from
+    the last resourceVersion; a 410 Gone or stream error falls back to a fresh
+    list. API-server load therefore scales with churn, not fleet size.
+    """
+
+    RESOURCES = ("clusters.postgresql.cnpg.io", "pods")
+
+    def __init__(self, kc: Kubectl | KubeAPI, ns: str | None, name: str | None = None):
+        self.kc = kc
+        self.ns = ns
+        # Scoped like list_fleet: --cluster narrows the CRs by field selector
+        # and the pods by label, on the server.
+        self._selectors = {
+            "clusters.postgresql.cnpg.io": {"fieldSelector": f"metadata.name={name}"
+                                            if name else None},
+            "pods": {"labelSelector": _pod_selector(name)},
+        }
+        self.changed = threading.Event()
+        self.lists = 0
+        self.events = 0
+        self._lock = threading.Lock()
+        self._objs: dict[str, dict[tuple[str, str], dict]] = {r: {} for r in self.RESOURCES}
+        self._fps: dict[tuple[str, str], tuple] = {}
+        self._synced = {r: threading.Event() for r in self.RESOURCES}
+
+    def start(self) -> None:
+        for resource in self.RESOURCES:
+            threading.Thread(target=self._run, args=(resource,),
+                             daemon=True, name=f"watch-{resource.split('.')[0]}").start()
+
+    def wait_synced(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        return all(ev.wait(max(0.0, deadline - time.monotonic()))
+                   for ev in self._synced.values())
+
+    def build(self, name: str | None) -> list[Cluster]:
+        with self._lock:
+            items = list(self._objs["clusters.postgresql.cnpg.io"].values())
+            pods = list(self._objs["pods"].values())
+        return build_clusters(items, pods, name)
+
+    def fingerprint(self, ns: str, pod: str) -> tuple | None:
+        with self._lock:
+            return self._fps.get((ns, pod))
+
+    def collect(self, m: _Metrics) -> None:
+        m.add("cnpgscope_discovery_lists_total",
+              "Full list calls made by the watch-based discovery", self.lists, kind="counter")
+        m.add("cnpgscope_discovery_watch_events_total",
+              "Watch events applied to the in-memory inventory", self.events, kind="counter")
+
+    def _run(self, resource: str) -> None:
+        rv = ""
+        sel = self._selectors[resource]
+        while True:
+            try:
+                if not rv:
+                    rv = self._relist(resource)
+                path = api_path(resource, self.ns, **sel, watch=1,
+                                resourceVersion=rv, allowWatchBookmarks="true",
+                                timeoutSeconds=WATCH_TIMEOUT)
+                for line in self.kc.stream(path):
+                    if not line.strip():
+                        continue
+                    ev = json.loads(line)
+                    obj = ev.get("object") or {}
+                    if ev.get("type") not in _WATCH_EVENTS:
+                        continue
+                    if ev.get("type") == "ERROR":
+                        # Almost always 410 Gone: our resourceVersion was
+                        # compacted away. Only a fresh list recovers.
+                        rv = ""
+                        break
+                    if ev.get("type") != "BOOKMARK":
+                        self._apply(resource, ev.get("type", ""), _LEAN[resource](obj))
+                    rv = obj.get("metadata", {}).get("resourceVersion") or rv
+            except Exception as exc:  # noqa: BLE001 — keep watching; relist after a pause
+                log.warning("watch %s failed: %s", resource, exc)
+                rv = ""
+                time.sleep(5)
+
+    def _relist(self, resource: str) -> str:
+        lst = self.kc.get(api_path(resource, self.ns, **self._selectors[resource]))
+        lean = _LEAN[resource]
+        fresh = {_obj_key(o): o for o in map(lean, lst.pop("items", None) or [])}
+        with self._lock:
+            old = self._objs[resource]
+            if {k: _obj_rv(o) for k, o in old.items()} != {k: _obj_rv(o) for k, o in fresh.items()}:
+                self.changed.set()
+            self._objs[resource] = fresh
+            if resource == "pods":
+                self._fps = {k: pod_fingerprint(o) for k, o in fresh.items()}
+            self.lists += 1
+        self._synced[resource].set()
+        return lst.get("metadata", {}).get("resourceVersion", "")
+
+    def _apply(self, resource: str, typ: str, obj: dict) -> None:
+        key = _obj_key(obj)
+        with self._lock:
+            if typ == "DELETED":
+                self._objs[resource].pop(key, None)
+                if resource == "pods":
+                    self._fps.pop(key, None)
+            else:
+                self._objs[resource][key] = obj
+                if resource == "pods":
+                    self._fps[key] = pod_fingerprint(obj)
+            self.events += 1
+        self.changed.set()
+
+
+_WATCH_EVENTS = ("ADDED", "MODIFIED", "DELETED", "BOOKMARK", "ERROR")
+
+
+def _obj_key(o: dict) -> tuple[str, str]:
+    meta = o.get("metadata", {})
+    return meta.get("namespace", ""), meta.get("name", "")
+
+
+def _obj_rv(o: dict) -> str:
+    return o.get("metadata", {}).get("resourceVersion", "")
+
+
+@dataclass(slots=True)
+class _Sched:
+    """Scheduler state for one probe target (an instance's df/du, or a
+    cluster's primary SQL batch)."""
+    fingerprint: tuple | None
+    taken: float          # monotonic time of the last good probe
+    values: tuple | dict  # the cached result (df tuple / raw SQL rows), re-applied between probes
+    cost: float           # EWMA of the probe's measured exec wall time (s)
+    interval: float       # current adaptive re-probe interval (s)
+
+
+class ProbeScheduler:
+    """Adaptive, cost-budgeted re-probing for the --serve refresh loop.
+
+    Results are cached per target and re-applied between probes. A target is
+    probed again when:
+
+      * its pod changed (new uid, restart, role flip, readiness/PVC change) or
+        it was never probed — always, regardless of budget (churn-driven);
+      * its adaptive interval elapsed. The interval slides geometrically from
+        `max_interval` (stable, far from every threshold) down to
+        `min_interval` as it gets "urgent": PVC / pg_wal fill approaching WARN,
+        PVC fill moving fast, inactive slots retaining WAL, lag present or
+        growing.
+
+    Interval-driven probes draw on a token bucket of `budget` exec-seconds
+    per minute, charged with each target's measured cost, most-overdue and
+    most-urgent first; what doesn't fit waits (its last result stays served),
+    so exec pressure on the control plane stays bounded as the fleet grows.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, budget: float):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.budget = budget
+        self.tokens = budget
+        self.probed = 0
+        self.reused = 0
+        self.deferred = 0
+        self.exec_seconds = 0.0
+        self._refilled = time.monotonic()
+        self._inst: dict[tuple[str, str], _Sched] = {}
+        self._prim: dict[str, _Sched] = {}
+
+    def plan(self, clusters: list[Cluster],
+             fingerprint: Callable[[str, str], tuple | None]
+             ) -> tuple[list[tuple[Cluster, Instance]], list[Cluster]]:
+        """Fill cached results in place; return the jobs to probe now."""
+        now = time.monotonic()
+        self._refill(now)
+        self._prune(clusters)
+        forced: list[tuple[str, object]] = []
+        due: list[tuple[float, float, str, object]] = []   # (priority, cost, kind, job)
+
+        for c, inst in running_instances(clusters):
+            e = self._inst.get((c.namespace, inst.name))
+            if e is None or e.fingerprint != fingerprint(c.namespace, inst.name):
+                self.tokens -= e.cost if e else PROBE_COST_GUESS
+                forced.append(("inst", (c, inst)))
+                continue
+            restore_instance_values(inst, e.values)
+            if now - e.taken >= e.interval:
+                due.append(((now - e.taken) / e.interval, e.cost, "inst", (c, inst)))
+            else:
+                self.reused += 1
+        for c in running_primaries(clusters):
+            e = self._prim.get(c.key)
+            if e is None or e.fingerprint != (c.primary, fingerprint(c.namespace, c.primary)):
+                self.tokens -= e.cost if e else PROBE_COST_GUESS
+                forced.append(("prim", c))
+                continue
+            apply_primary(c, e.values)
+            if now - e.taken >= e.interval:
+                due.append(((now - e.taken) / e.interval, e.cost, "prim", c))
+            else:
+                self.reused += 1
+
+        admitted = list(forced)
+        for _, cost, kind, job in sorted(due, key=lambda d: d[0], reverse=True):
+            if self.tokens <= 0:
+                self.deferred += 1
+                self.reused += 1
+                continue
+            self.tokens -= cost
+            admitted.append((kind, job))
+        inst_jobs = [job for kind, job in admitted if kind == "inst"]
+        prim_jobs = [job for kind, job in admitted if kind == "prim"]
+        self.probed += len(admitted)
+        return inst_jobs, prim_jobs  # type: ignore[return-value]
+
+    def store(self, inst_jobs: list[tuple[Cluster, Instance]], prim_jobs: list[Cluster],
+              fingerprint: Callable[[str, str], tuple | None]) -> None:
+        now = time.monotonic()
+        for c, inst in inst_jobs:
+            key = (c.namespace, inst.name)
+            prev = self._inst.get(key)
+            cost = self._charge(prev, inst.probe_secs)
+            if inst.pvc_pct is None:      # failed probe: keep the old entry, retry next refresh
+                continue
+            self._inst[key] = _Sched(
+                fingerprint(c.namespace, inst.name), now,
+                instance_values(inst),
+                cost, self._interval(_instance_urgency(c, inst, prev, now)))
+        for c in prim_jobs:
+            prev = self._prim.get(c.key)
+            cost = self._charge(prev, c.sql_secs)
+            if not c.sql_ok:
+                continue
+            self._prim[c.key] = _Sched(
+                (c.primary, fingerprint(c.namespace, c.primary)), now,
+                c.sql_rows, cost, self._interval(_primary_urgency(c, prev)))
+
+    def collect(self, m: _Metrics) -> None:
+        m.add("cnpgscope_probes_total", "Exec probes actually run", self.probed, kind="counter")
+        m.add("cnpgscope_probes_reused_total",
+              "Targets served their cached result instead of a probe", self.reused,
+              kind="counter")
+        m.add("cnpgscope_probes_deferred_total",
+              "Due probes postponed because the exec budget was spent", self.deferred,
+              kind="counter")
+        m.add("cnpgscope_probe_exec_seconds_total", "Measured exec wall time of all probes",
+              self.exec_seconds, kind="counter")
+        m.add("cnpgscope_probe_budget_tokens",
+              "Exec-seconds left in the per-minute probe budget", self.tokens)
+        for (ns, pod), e in self._inst.items():
+            m.add("cnpgscope_instance_probe_interval_seconds",
+                  "Current adaptive re-probe interval of the instance's df/du probe",
+                  e.interval, {"namespace": ns, "instance": pod})
+
+    def _prune(self, clusters: list[Cluster]) -> None:
+        """Forget deleted pods and clusters, so the state (and the per-instance
+        interval series) tracks the fleet instead of everything ever seen."""
+        pods = {(c.namespace, i.name) for c in clusters for i in c.instances}
+        for key in self._inst.keys() - pods:
+            del self._inst[key]
+        for key in self._prim.keys() - {c.key for c in clusters}:
+            del self._prim[key]
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.budget,
+                          self.tokens + (now - self._refilled) * self.budget / 60.0)
+        self._refilled = now
+
+    def _charge(self, prev: _Sched | None, took: float | None) -> float:
+        """Settle the budget with the measured cost; return the new EWMA."""
+        est = prev.cost if prev else PROBE_COST_GUESS
+        if took is None:
+            return est
+        self.exec_seconds += took
+        self.tokens += est - took         # plan() charged the estimate
+        return took if prev is None else 0.7 * prev.cost + 0.3 * took
+
+    def _interval(self, urgency: float) -> float:
+        u = min(1.0, max(0.0, urgency))
+        return self.max_interval * (self.min_interval / self.max_interval) ** u
+
+
+def _instance_urgency(c: Cluster, inst: Instance, prev: _Sched | None, now: float) -> float:
+    """0 = stable and far below every threshold, 1 = at one or moving fast."""
+    u = 0.0
+    pvc_warn = _warn_limit(c, "pvc")
+    if inst.pvc_pct is not None:
+        if pvc_warn is not None:
+            u = max(u, (inst.pvc_pct - (pvc_warn - 25.0)) / 25.0)
+        if prev is not None and prev.values[2] is not None and now > prev.taken:
+            pct_per_hour = abs(inst.pvc_pct - prev.values[2]) * 3600.0 / (now - prev.taken)
+            u = max(u, pct_per_hour / 5.0)      # >=5 points/hour: probe at the fastest rate
+    wf, wf_warn = inst.wal_frac, _warn_limit(c, "wal-frac")
+    if wf is not None and wf_warn is not None:
+        u = max(u, (wf - (wf_warn - 20.0)) / 20.0)
+    if inst.replay is not None:
+        u = max(u, (inst.replay.pending_bytes or 0) / LAG_WARN_BYTES,
+                _share(inst.replay.delay_secs, _warn_limit(c, "replay-delay")))
+    return u
+
+
+def _warn_limit(c: Cluster, rule: str) -> float | None:
+    warn = limits(c, rule)[0]
+    return float(warn) if isinstance(warn, (int, float)) and warn > 0 else None
+
+
+def _share(value: float | None, warn: float | None) -> float:
+    """How far `value` is toward its WARN limit (0 when either is unknown)."""
+    return (value or 0) / warn if warn else 0.0
+
+
+def _primary_urgency(c: Cluster, prev: _Sched | None) -> float:
+    u = 0.0
+    for s in c.slots:
+        if not s.active:
+            u = max(u, 0.5, _share(s.retained_bytes, _warn_limit(c, "slot")))
+    lag = max((lg.lag_bytes or 0 for lg in c.lags), default=0)
+    u = max(u, _share(lag, _warn_limit(c, "lag")))
+    if c.wal is not None:
+        u = max(u, _share(c.wal.backlog_bytes, _warn_limit(c, "archive-backlog")),
+                0.75 if c.wal.failing else 0.0)
+    if prev is not None:
+        prev_lag = max((_int_or_none(r.get("lag")) or 0 for r in prev.values.get("lag", [])),
+                       default=0)
+        if lag > prev_lag:
+            u = max(u, 0.75)                    # lag growing between probes
+    return u
+
+
+# ---------------------------------------------------------------------------
+# Exporter mode (--serve)
+# ---------------------------------------------------------------------------
+def _esc(v: object) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metrics:
+    """Prometheus text exposition, built by hand (cnpgscope is stdlib-only)."""
+
+    def __init__(self) -> None:
+        self._families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def add(self, name: str, help_: str, value: float | None,
+            labels: dict[str, object] | None = None, kind: str = "gauge") -> None:
+        if value is None:
+            return
+        fam = self._families.setdefault(name, (help_, kind, []))
+        lbl = ""
+        if labels:
+            lbl = "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in labels.items()) + "}"
+        num = str(int(value)) if isinstance(value, int) else repr(float(value))
+        fam[2].append(f"{name}{lbl} {num}")
+
+    def text(self) -> str:
+        out = []
+        for name, (help_, kind, samples) in self._families.items():
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(samples)
+        return "\n".join(out) + "\n"
+
+
+def render_metrics(clusters: list[Cluster], verdicts: dict[str, str]) -> str:
+    m = _Metrics()
+    for c in clusters:
+        cl = {"namespace": c.namespace, "cluster": c.name}
+        for v in (OK, WARN, CRIT, UNKNOWN):
+            m.add("cnpgscope_cluster_verdict",
+                  "1 for the cluster's current verdict (state set over OK/WARN/CRIT/UNKNOWN)",
+                  1 if verdicts[c.key] == v else 0, {**cl, "verdict": v})
+        m.add("cnpgscope_cluster_severity",
+              "Verdict as a number: 0 OK, 1 UNKNOWN, 2 WARN, 3 CRIT",
+              _SEV_RANK.get(verdicts[c.key], 0), cl)
+        m.add("cnpgscope_cluster_instances_desired", "spec.instances", c.desired, cl)
+        m.add("cnpgscope_cluster_instances_ready", "status.readyInstances", c.ready, cl)
+        m.add("cnpgscope_cluster_probe_ok",
+              "1 if every exec probe for the cluster succeeded on the last refresh",
+              1 if c.exec_ok else 0, cl)
+        m.add("cnpgscope_cluster_backup_age_seconds",
+              "Age of the last successful backup", c.last_backup_age, cl)
+        m.add("cnpgscope_cluster_continuous_archiving",
+              "ContinuousArchiving condition (1 True, 0 False; absent if unset)",
+              {"True": 1, "False": 0}.get(c.continuous_archiving or ""), cl)
+        for i in c.instances:
+            il = {**cl, "instance": i.name, "role": i.role}
+            m.add("cnpgscope_instance_ready", "1 if all instance containers are ready",
+                  1 if i.ready else 0, il)
+            m.add("cnpgscope_instance_pvc_used_percent", "Instance PVC used, percent",
+                  i.pvc_pct, il)
+            m.add("cnpgscope_instance_pvc_size_bytes", "Instance PVC size", i.pvc_size_bytes, il)
+            m.add("cnpgscope_instance_pvc_used_bytes", "Instance PVC used", i.pvc_used_bytes, il)
+            m.add("cnpgscope_instance_wal_bytes", "Size of pg_wal", i.wal_bytes, il)
+            m.add("cnpgscope_instance_wal_volume_percent",
+                  "pg_wal as a percentage of the instance PVC size", i.wal_frac, il)
+            m.add("cnpgscope_instance_pvc_growth_bytes_per_second",
+                  "Fitted PVC fill rate (--history)", i.pvc_rate, il)
+            m.add("cnpgscope_instance_pvc_time_to_full_seconds",
+                  "Time until the PVC is full at the fitted fill rate (--history)",
+                  i.pvc_ttf, il)
+        for sl in c.slots:
+            m.add("cnpgscope_slot_retained_bytes",
+                  "WAL retained by the replication slot (primary LSN - restart_lsn)",
+                  sl.retained_bytes,
+                  {**cl, "slot": sl.name, "active": str(sl.active).lower(),
+                   "wal_status": sl.wal_status})
+        for lag in c.lags:
+            m.add("cnpgscope_replica_lag_bytes",
+                  "Bytes a streaming replica's replay is behind the primary",
+                  lag.lag_bytes, {**cl, "replica": lag.app, "state": lag.state})
+        for i in c.instances:
+            if i.replay is None:
+                continue
+            rl = {**cl, "replica": i.name}
+            m.add("cnpgscope_replica_replay_delay_seconds",
+                  "Age of the last replayed commit while WAL is pending (0 = caught up)",
+                  i.replay.delay_secs, rl)
+            m.add("cnpgscope_replica_apply_pending_bytes",
+                  "WAL received by the replica but not yet replayed",
+                  i.replay.pending_bytes, rl)
+            m.add("cnpgscope_replica_receive_bytes_per_second",
+                  "WAL receive rate since an earlier scan (or over --sample-window)",
+                  i.replay.receive_rate, rl)
+            m.add("cnpgscope_replica_apply_bytes_per_second",
+                  "WAL replay rate since an earlier scan (or over --sample-window)",
+                  i.replay.apply_rate, rl)
+        if c.sql_ok:
+            m.add("cnpgscope_cluster_oldest_transaction_seconds",
+                  "Age of the oldest open client transaction (0 if none over 60s)",
+                  max((b.xact_age or 0 for b in c.xacts), default=0), cl)
+            m.add("cnpgscope_cluster_xid_age", "max age(datfrozenxid) over databases",
+                  c.xid_age, cl)
+        if c.checkpoints is not None:
+            for kind, n in (("timed", c.checkpoints.timed),
+                            ("requested", c.checkpoints.requested)):
+                m.add("cnpgscope_cluster_checkpoints_total",
+                      "Checkpoints since stats reset, by trigger", n,
+                      {**cl, "trigger": kind}, kind="counter")
+            m.add("cnpgscope_cluster_checkpoint_sync_seconds_total",
+                  "Time spent fsyncing checkpoint files since stats reset",
+                  c.checkpoints.sync_ms / 1000, cl, kind="counter")
+        if c.wal is not None:
+            m.add("cnpgscope_cluster_wal_generated_bytes_per_second",
+                  "WAL write rate on the primary since an earlier scan", c.wal.gen_rate, cl)
+            m.add("cnpgscope_cluster_wal_archived_bytes_per_second",
+                  "WAL archive rate (last archived segment) over at least 2m of scans",
+                  c.wal.archive_rate, cl)
+            m.add("cnpgscope_cluster_archive_backlog_bytes",
+                  "WAL segments waiting for archive_command (.ready)",
+                  c.wal.backlog_bytes, cl)
+            m.add("cnpgscope_cluster_archive_failed_total",
+                  "archive_command failures since stats reset", c.wal.failed_count, cl,
+                  kind="counter")
+        for t in c.dead_tuples:
+            m.add("cnpgscope_table_dead_tuple_ratio",
+                  "Dead / (live + dead) tuples for the worst tables in the app database",
+                  round(t.ratio, 4), {**cl, "table": t.table})
+    return m.text()
+
+
+class Exporter:
+    """Keeps the last fleet snapshot and its pre-rendered exposition.
+
+    A background thread refreshes on `interval`; a scrape only copies the
+    bytes of the last completed refresh, so it never triggers an exec and a
+    slow refresh never blocks Prometheus.
+    """
+
+    def __init__(self, refresh: Callable[[], tuple[list[Cluster], dict[str, str]]],
+                 interval: float, wake: threading.Event | None = None,
+                 collectors: list[Callable[[_Metrics], None]] | None = None):
+        self.refresh = refresh
+        self.interval = interval
+        self.wake = wake                  # set by watch events: refresh early
+        self.collectors = collectors or []
+        self.body = b""
+        self.last_success = 0.0
+        self._fleet_text = ""
+        self._failures = 0
+
+    def run_forever(self) -> None:
+        while True:
+            start = time.monotonic()
+            if self.wake is not None:
+                self.wake.clear()
+            ok = True
+            try:
+                clusters, verdicts = self.refresh()
+                self._fleet_text = render_metrics(clusters, verdicts)
+            except Exception as exc:  # noqa: BLE001 — keep serving the last snapshot
+                ok = False
+                self._failures += 1
+                log.warning("refresh failed: %s", exc)
+            took = time.monotonic() - start
+            if ok:
+                self.last_success = time.time()
+            self._publish(took, ok)
+            delay = max(0.0, self.interval - took)
+            if self.wake is None:
+                time.sleep(delay)
+            else:
+                # Churn pulls the next refresh forward; the floor debounces
+                # a burst of events (a rollout) into one refresh.
+                self.wake.wait(delay)
+                time.sleep(min(delay, REFRESH_DEBOUNCE))
+
+    def healthy(self) -> bool:
+        return time.time() - self.last_success < 3 * self.interval + 60
+
+    def _publish(self, took: float, ok: bool) -> None:
+        m = _Metrics()
+        m.add("cnpgscope_up", "1 if the last refresh succeeded", 1 if ok else 0)
+        m.add("cnpgscope_refresh_duration_seconds", "Wall time of the last refresh", took)
+        m.add("cnpgscope_last_refresh_success_timestamp_seconds",
+              "Unix time of the last successful refresh", self.last_success or None)
+        m.add("cnpgscope_refresh_failures_total", "Refreshes that raised",
+              self._failures, kind="counter")
+        for collect in self.collectors:
+            collect(m)
+        # One reference assignment: a concurrent scrape sees old or new, never half.
+        self.body = (self._fleet_text + m.text()).encode()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    # Set by serve() before the server starts.
+    exporter: Exporter = None  # type: ignore[assignment]
+
+    def do_GET(self):  # noqa: N802 - stdlib naming
+        if self.path == "/healthz":
+            ok = self.exporter.healthy()
+            self.send_response(200 if ok else 503)
+            self.send_header("Content-Type", "text/plain")
+            self.end_headers()
+            self.wfile.write(b"ok\n" if ok else b"no recent successful refresh\n")
+            return
+        if self.path.startswith("/metrics"):
+            body = self.exporter.body
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(404)
+        self.end_headers()
+
+    def log_message(self, *args):  # silence per-request logging
+        return
+
+
+def _refresher(kc: Kubectl | KubeAPI, args: argparse.Namespace,
+               history: History | None, thresholds: Thresholds
+               ) -> tuple[Callable[[], tuple[list[Cluster], dict[str, str]]],
+                          threading.Event | None, list[Callable[[_Metrics], None]]]:
+    """The background fleet refresh shared by --serve and --watch.
+
+    Returns (refresh, wake, collectors): `wake` is set by watch events so the
+    next refresh can be pulled forward (None with --list-only)."""
+
+    def list_refresh() -> tuple[list[Cluster], dict[str, str]]:
+        clusters = discover(kc, args.namespace, args.cluster)
+        thresholds.assign(clusters)
+        if PVC_SOURCE == "kubelet":
+            fill_pvc_from_kubelet(kc, clusters)
+        if not args.no_exec:
+            enrich(kc, clusters)
+        _track(clusters)
+        return clusters, evaluate_fleet(clusters, thresholds.rules)
+
+    rates = RateSamples()
+
+    def _track(clusters: list[Cluster]) -> None:
+        rates.prune(time.time())
+        for c in clusters:
+            rates.fill(c)
+        if history is not None:
+            history.record(clusters)
+            history.forecast(clusters)
+
+    if args.list_only:
+        return list_refresh, None, []
+    inv = Inventory(kc, args.namespace, args.cluster)
+    cache = ProbeScheduler(args.probe_min_interval, args.reprobe_after,
+                           args.exec_budget)
+    inv.start()
+
+    def watch_refresh() -> tuple[list[Cluster], dict[str, str]]:
+        if not inv.wait_synced(60):
+            raise RuntimeError("inventory not synced yet (initial list pending)")
+        clusters = inv.build(args.cluster)
+        thresholds.assign(clusters)
+        if not args.no_exec:
+            inst_jobs, prim_jobs = cache.plan(clusters, inv.fingerprint)
+        if PVC_SOURCE == "kubelet":
+            fill_pvc_from_kubelet(kc, clusters)
+        if not args.no_exec:
+            enrich(kc, clusters, inst_jobs, prim_jobs)
+            cache.store(inst_jobs, prim_jobs, inv.fingerprint)
+        _track(clusters)
+        return clusters, evaluate_fleet(clusters, thresholds.rules)
+
+    return watch_refresh, inv.changed, [inv.collect, cache.collect]
+
+
+def serve(kc: Kubectl | KubeAPI, args: argparse.Namespace,
+          history: History | None, thresholds: Thresholds) -> int:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+    refresh, wake, collectors = _refresher(kc, args, history, thresholds)
+    exporter = Exporter(refresh, args.interval, wake=wake, collectors=collectors)
+    MetricsHandler.exporter = exporter
+    httpd = ThreadingHTTPServer(("", args.listen_port), MetricsHandler)
+    threading.Thread(target=exporter.run_forever, daemon=True, name="refresh").start()
+    log.info("serving /metrics and /healthz on :%s (refresh every %ss)",
+             args.listen_port, args.interval)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Live view (--watch): a top-style terminal UI over the --serve refresh
+# ---------------------------------------------------------------------------
+# Row orders, cycled with `s`: worst first, the cluster key breaking ties.
+_WATCH_SORTS: dict[str, Callable[[Cluster, str], tuple]] = {
+    "verdict": lambda c, v: (-_SEV_RANK.get(v, 0), c.key),
+    "pvc": lambda c, v: (-max((i.pvc_pct or 0.0 for i in c.instances), default=0.0),
+                         c.key),
+    "slots": lambda c, v: (-max((s.retained_bytes or 0 for s in c.slots if not s.active),
+                                default=0), c.key),
+}
+
+
+def _clip(s: str, width: int) -> str:
+    """`s` cut to `width` visible columns, color codes kept."""
+    if _visible_len(s) <= width:
+        return s
+    out, n, i = [], 0, 0
+    while i < len(s) and n < width:
+        if s[i] == "\033":
+            j = s.find("m", i)
+            j = len(s) if j == -1 else j + 1
+            out.append(s[i:j])
+            i = j
+        else:
+            out.append(s[i])
+            n += 1
+            i += 1
+    return "".join(out) + (C.RESET if _USE_COLOR else "")
+
+
+class LiveView:
+    """The --watch screen: one process, the fleet refreshed by a background
+    thread (the same list+watch inventory and adaptive probe scheduler as
+    --serve), and the table repainted in place.
+
+    Each frame is rendered to lines (render_table, so cells read exactly as
+    in the one-shot report) and compared with what is on screen; only the
+    lines that differ are rewritten, by cursor address. A quiet fleet costs
+    one status line per refresh, not a screen of output. Warnings that
+    would go to stderr land in the footer instead.
+
+    Keys: s cycles the sort (verdict, PVC fill, slot retention), r
+    refreshes now, q quits.
+    """
+
+    def __init__(self, refresh: Callable[[], tuple[list[Cluster], dict[str, str]]],
+                 interval: float, wake: threading.Event | None, sort: str,
+                 out: IO[str] = sys.stdout):
+        self.refresh = refresh
+        self.interval = interval
+        self.wake = wake or threading.Event()
+        self.sort = sort
+        self.out = out
+        self.snapshot: tuple[list[Cluster], dict[str, str]] | None = None
+        self.stamp = ""
+        self.took = 0.0
+        self.status = ""
+        self.asked = False                             # `r`: refresh now, no debounce
+        self.dirty = threading.Event()
+        self._screen: list[str] = []
+        self._size: tuple[int, int] = (0, 0)
+
+    def run(self) -> int:
+        import termios  # POSIX-only, and only --watch needs them
+        import tty
+
+        fd = sys.stdin.fileno()
+        saved = termios.tcgetattr(fd)
+        self.out.write("\033[?1049h\033[?25l")       # alternate screen, hide cursor
+        try:
+            tty.setcbreak(fd)
+            with contextlib.redirect_stderr(self):    # type: ignore[type-var]
+                threading.Thread(target=self._refresh_forever, daemon=True,
+                                 name="refresh").start()
+                while True:
+                    ready, _, _ = select.select([fd], [], [], 0.2)
+                    key = os.read(fd, 1).decode(errors="replace") if ready else ""
+                    if key in ("q", "\x04"):
+                        break
+                    if key == "s":
+                        order = list(_WATCH_SORTS)
+                        self.sort = order[(order.index(self.sort) + 1) % len(order)]
+                    elif key == "r":
+                        self.asked = True
+                        self.wake.set()
+                    size = tuple(shutil.get_terminal_size())
+                    if key or self.dirty.is_set() or size != self._size:
+                        self.dirty.clear()
+                        self.paint(size)                # type: ignore[arg-type]
+        except KeyboardInterrupt:
+            pass
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+            self.out.write("\033[?25h\033[?1049l")
+            self.out.flush()
+        return 0
+
+    def write(self, text: str) -> int:
+        """stderr while the screen is up: keep the last line for the footer."""
+        lines = [ln for ln in text.splitlines() if ln.strip()]
+        if lines:
+            self.status = lines[-1].strip()
+            self.dirty.set()
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def _refresh_forever(self) -> None:
+        while True:
+            self.wake.clear()
+            start = time.monotonic()
+            try:
+                self.snapshot = self.refresh()
+                self.stamp = time.strftime("%H:%M:%S")
+            except Exception as exc:  # noqa: BLE001 — keep showing the last snapshot
+                self.status = f"refresh failed: {exc}"
+            self.took = time.monotonic() - start
+            self.dirty.set()
+            # Watch events pull the next refresh forward, debounced like
+            # --serve; a keypress doesn't wait.
+            delay = max(0.0, self.interval - self.took)
+            if self.wake.wait(delay) and not self.asked:
+                time.sleep(min(delay, REFRESH_DEBOUNCE))
+            self.asked = False
+
+    def frame(self, height: int) -> list[str]:
+        title = _c("cnpgscope", C.BOLD, C.CYAN)
+        keys = "  ".join(f"{_c(k, C.BOLD)} {what}" for k, what in
+                         (("s", f"sort: {self.sort}"), ("r", "refresh"), ("q", "quit")))
+        footer = keys + (f"   {_c(self.status, C.YELLOW)}" if self.status else "")
+        if self.snapshot is None:
+            return [f"{title} — waiting for the first refresh…", "", footer]
+        clusters, verdicts = self.snapshot
+        order = sorted(clusters, key=lambda c: _WATCH_SORTS[self.sort](c, verdicts[c.key]))
+        head = (f"{title} — {len(clusters)} clusters @ {self.stamp} "
+                f"(refresh {self.took:.1f}s, every {self.interval:g}s)")
+        table = render_table(order, verdicts).split("\n")
+        room = max(1, height - 5)                      # head, summary, blank, ..., footer
+        if len(table) > room:
+            hidden = len(table) - room + 1
+            table = table[:room - 1] + [_c(f"… {hidden} more", C.DIM)]
+        return [head, _fleet_summary(verdicts), "", *table, footer]
+
+    def paint(self, size: tuple[int, int]) -> None:
+        width, height = size
+        lines = [_clip(ln, width) for ln in self.frame(height)]
+        buf = []
+        if size != self._size:
+            self._screen = []
+            buf.append("\033[2J")
+        for i, line in enumerate(lines):
+            if i >= len(self._screen) or self._screen[i] != line:
+                buf.append(f"\033[{i + 1};1H{line}\033[K")
+        if len(lines) < len(self._screen):
+            buf.append(f"\033[{len(lines) + 1};1H\033[J")
+        self._screen, self._size = lines, size
+        self.out.write("".join(buf))
+        self.out.flush()
+
+
+def watch(kc: Kubectl | KubeAPI, args: argparse.Namespace,
+          history: History | None, thresholds: Thresholds) -> int:
+    refresh, wake, _ = _refresher(kc, args, history, thresholds)
+    return LiveView(refresh, args.interval, wake, args.sort).run()
+
+
 # ---------------------------------------------------------------------------
 # main
 # ---------------------------------------------------------------------------
 def main(argv: list[str] | None = None) -> int:
-    global _USE_COLOR, PVC_WARN, PVC_CRIT
+    global _USE_COLOR, WAL_PROBE, PVC_SOURCE, SQL_POOL
+    global EXEC_WORKERS, EXEC_PER_NODE, EXEC_PER_NAMESPACE, EXEC_TIMEOUT, SAMPLE_WINDOW
     ap = argparse.ArgumentParser(
         prog="cnpgscope",
         description="Read-only CloudNativePG fleet health at a glance.",
     )
     ap.add_argument("-n", "--namespace", help="limit to one namespace")
     ap.add_argument("--cluster", help="limit to one cluster by name")
-    ap.add_argument("--context", help="kube-context to target")
+    ap.add_argument("--context", action="append",
+                    help="kube-context to target; repeat to scan several in one "
+                         "run (default: the current context)")
+    ap.add_argument("--all-contexts", action="store_true",
+                    help="scan every context in the kubeconfig")
     ap.add_argument("--kubectl", default=os.environ.get("KUBECTL", "kubectl"),
                     help="kubectl binary (default: kubectl)")
+    ap.add_argument("--backend", choices=["kubectl", "api"],
+                    default=os.environ.get("CNPGSCOPE_BACKEND", "kubectl"),
+                    help="kubectl: fork kubectl per call (default); api: talk to "
+                         "the API server directly over pooled HTTPS + WebSocket exec")
     ap.add_argument("--no-exec", action="store_true",
                     help="skip pod exec (CRD-only, fast, low-privilege)")
-    ap.add_argument("-o", "--output", choices=["text", "json"], default="text")
+    ap.add_argument("--workers", type=int, default=EXEC_WORKERS,
+                    help=f"concurrent exec probes, fleet-wide (default: {EXEC_WORKERS})")
+    ap.add_argument("--per-node", type=int, default=EXEC_PER_NODE,
+                    help=f"concurrent exec probes per node (default: {EXEC_PER_NODE})")
+    ap.add_argument("--per-namespace", type=int, default=EXEC_PER_NAMESPACE,
+                    help="concurrent exec probes per namespace "
+                         f"(default: {EXEC_PER_NAMESPACE})")
+    ap.add_argument("--exec-timeout", type=float, default=EXEC_TIMEOUT,
+                    help=f"seconds per exec probe before it is cancelled "
+                         f"(default: {EXEC_TIMEOUT})")
+    ap.add_argument("--deadline", type=float, metavar="SECONDS",
+                    help="report after at most this long; clusters whose "
+                         "probes are still running are shown as UNKNOWN")
+    ap.add_argument("--stream", action=argparse.BooleanOptionalAction, default=None,
+                    help="print each cluster row as soon as its probes finish "
+                         "(default: on when stdout is a terminal)")
+    ap.add_argument("--cache-ttl", type=float,
+                    default=float(os.environ.get("CNPGSCOPE_CACHE_TTL", SNAPSHOT_TTL)),
+                    metavar="SECONDS",
+                    help="reuse the on-disk fleet snapshot and probe results "
+                         f"for this long; 0 disables (default: {SNAPSHOT_TTL:g})")
+    ap.add_argument("--refresh", action="store_true",
+                    help="ignore the snapshot cache for this run (still updates it)")
+    ap.add_argument("--profile", type=int, nargs="?", const=10, metavar="N",
+                    help="report wall time per phase (p50/p95/max), per node, "
+                         "and the N slowest probes (default N: 10); also in -o json")
+    ap.add_argument("--wal-probe", choices=["sql", "du"], default=WAL_PROBE,
+                    help="pg_wal size source: sql = pg_ls_waldir() with du as the "
+                         "fallback (default); du = always walk pg_wal with du")
+    ap.add_argument("--pvc-source", choices=["exec", "kubelet"],
+                    default=os.environ.get("CNPGSCOPE_PVC_SOURCE", PVC_SOURCE),
+                    help="PVC fill source: exec = df in each instance (default); "
+                         "kubelet = one /stats/summary per node via the API server, "
+                         "for instances df didn't cover (works with --no-exec)")
+    ap.add_argument("--sql-backend", choices=["exec", "direct"],
+                    default=os.environ.get("CNPGSCOPE_SQL_BACKEND", "exec"),
+                    help="primary SQL probes: exec = psql via pod exec (default); "
+                         "direct = pooled read-only libpq connections (needs psycopg; "
+                         "credentials from PGUSER/PGPASSWORD/PGPASSFILE)")
+    ap.add_argument("--sql-dsn", default=os.environ.get("CNPGSCOPE_SQL_DSN", SQL_DSN),
+                    help="--sql-backend direct: libpq conninfo template with {cluster} "
+                         "{namespace} {database} {pod} {pod_ip} "
+                         f"(default: {SQL_DSN!r})")
+    ap.add_argument("--sample-window", type=float, default=SAMPLE_WINDOW, metavar="SECONDS",
+                    help="also sample the replica replay / primary WAL position a "
+                         "second time this many seconds later in each probe session, "
+                         "for rates within one scan; each exec holds its slot that long "
+                         f"(default: {SAMPLE_WINDOW:g}: rates come from successive "
+                         "scans, via the snapshot cache or the --serve/--watch loop)")
+    ap.add_argument("-o", "--output", choices=["text", "json", "ndjson"], default="text",
+                    help="ndjson: one compact record per cluster as it settles, "
+                         "then a summary record (default: text)")
+    ap.add_argument("--diff", metavar="FILE",
+                    help="compare against a saved -o json / -o ndjson scan: the "
+                         "text report shows only clusters whose verdict, notes or "
+                         "key metrics moved, plus a changelog; JSON gains `changes`")
     ap.add_argument("--no-color", action="store_true")
     ap.add_argument("--details", action="store_true",
                     help="always show per-cluster detail (default: non-OK only)")
-    ap.add_argument("--pvc-warn", type=float, default=PVC_WARN)
-    ap.add_argument("--pvc-crit", type=float, default=PVC_CRIT)
+    ap.add_argument("--pvc-warn", type=float,
+                    help=f"PVC used %% for WARN (default: {PVC_WARN:g}; beats --thresholds "
+                         "defaults, not its namespace/cluster entries)")
+    ap.add_argument("--pvc-crit", type=float,
+                    help=f"PVC used %% for CRITICAL (default: {PVC_CRIT:g})")
+    ap.add_argument("--thresholds", metavar="FILE",
+                    default=os.environ.get("CNPGSCOPE_THRESHOLDS") or None,
+                    help="JSON rule limits: defaults, per-namespace and per-cluster "
+                         "overrides, extra rules (see README)")
     ap.add_argument("--exit-zero", action="store_true",
                     help="always exit 0 (default: exit worst verdict)")
+    ap.add_argument("--history", metavar="DIR",
+                    default=os.environ.get("CNPGSCOPE_HISTORY") or None,
+                    help="record each scan under DIR and forecast PVC/WAL/slot "
+                         "growth + time-to-full from it (default: off)")
+    ap.add_argument("--history-retention", type=float, default=14.0, metavar="DAYS",
+                    help="--history: days of (downsampled) history kept (default: 14)")
+    ap.add_argument("--serve", action="store_true",
+                    help="run as a Prometheus exporter instead of printing once")
+    ap.add_argument("--watch", action="store_true",
+                    help="live, top-style view: refresh in the background and "
+                         "repaint only the rows that changed (keys: s sort, "
+                         "r refresh, q quit)")
+    ap.add_argument("--sort", choices=list(_WATCH_SORTS), default="verdict",
+                    help="--watch: initial row order, worst first (default: verdict)")
+    ap.add_argument("--listen-port", type=int,
+                    default=int(os.environ.get("LISTEN_PORT", "9108")),
+                    help="--serve: /metrics + /healthz port (default: 9108)")
+    ap.add_argument("--interval", type=float,
+                    help="--serve/--watch: seconds between fleet refreshes "
+                         "(default: 60, or 5 with --watch)")
+    ap.add_argument("--reprobe-after", type=float, default=600.0,
+                    help="--serve: longest re-probe interval, for stable instances "
+                         "far from every threshold (default: 600; changed pods "
+                         "are probed at once)")
+    ap.add_argument("--probe-min-interval", type=float, default=30.0,
+                    help="--serve: shortest re-probe interval, for instances at or "
+                         "near a threshold or moving fast (default: 30)")
+    ap.add_argument("--exec-budget", type=float, default=120.0,
+                    help="--serve: exec-seconds per minute available to "
+                         "interval-driven re-probes (default: 120)")
+    ap.add_argument("--list-only", action="store_true",
+                    help="--serve/--watch: re-list the whole fleet every refresh "
+                         "instead of list+watch")
     args = ap.parse_args(argv)
+    if args.interval is None:
+        args.interval = 5.0 if args.watch else 60.0
 
     _USE_COLOR = (not args.no_color and sys.stdout.isatty()
                   and os.environ.get("NO_COLOR") is None)
-    PVC_WARN, PVC_CRIT = args.pvc_warn, args.pvc_crit
+    WAL_PROBE, PVC_SOURCE = args.wal_probe, args.pvc_source
+    EXEC_WORKERS, EXEC_PER_NODE = args.workers, args.per_node
+    EXEC_PER_NAMESPACE, EXEC_TIMEOUT = args.per_namespace, args.exec_timeout
+    SAMPLE_WINDOW = max(0.0, args.sample_window)
+    if args.sql_backend == "direct":
+        if psycopg is None:
+            print("error: --sql-backend direct needs psycopg "
+                  "(pip install 'psycopg[binary]')", file=sys.stderr)
+            return 2
+        try:
+            args.sql_dsn.format(cluster="", namespace="", database="", pod="", pod_ip="")
+        except (KeyError, IndexError, ValueError) as exc:
+            print(f"error: --sql-dsn: bad template ({exc!r})", file=sys.stderr)
+            return 2
+        SQL_POOL = SqlPool(args.sql_dsn)
 
-    kc = Kubectl(args.kubectl, args.context)
+    deadline = time.monotonic() + args.deadline if args.deadline else None
+    baseline: tuple[str, dict[str, dict]] | None = None
+    if args.diff:
+        try:
+            baseline = load_baseline(args.diff)
+        except (OSError, ValueError) as exc:
+            print(f"error: --diff {args.diff}: {exc}", file=sys.stderr)
+            return 2
+    pvc = {k: v for k, v in (("warn", args.pvc_warn), ("crit", args.pvc_crit))
+           if v is not None}
+    flags = {"pvc": pvc} if pvc else None
     try:
-        clusters = discover(kc, args.namespace, args.cluster)
-    except FileNotFoundError:
-        print(f"error: kubectl binary not found: {args.kubectl}", file=sys.stderr)
-        return 2
-    except subprocess.CalledProcessError as exc:
-        print(f"error: kubectl failed: {exc.stderr or exc}", file=sys.stderr)
+        thresholds = (Thresholds.load(args.thresholds, flags) if args.thresholds
+                      else Thresholds(None, flags))
+    except (OSError, ValueError) as exc:
+        print(f"error: --thresholds {args.thresholds}: {exc}", file=sys.stderr)
         return 2
-    except json.JSONDecodeError:
-        print("error: could not parse kubectl JSON output", file=sys.stderr)
+    if args.watch:
+        clash = ("--serve" if args.serve else "-o " + args.output if args.output != "text"
+                 else "--diff" if args.diff else None)
+        if clash:
+            print(f"error: --watch and {clash} don't mix", file=sys.stderr)
+            return 2
+        if not (sys.stdin.isatty() and sys.stdout.isatty()):
+            print("error: --watch needs a terminal", file=sys.stderr)
+            return 2
+    PROFILE.enabled = bool(args.profile) and not (args.serve or args.watch)
+
+    def backend(ctx: str | None) -> Kubectl | KubeAPI:
+        return (KubeAPI(args.kubectl, ctx) if args.backend == "api"
+                else Kubectl(args.kubectl, ctx))
+
+    contexts: list[str | None] = list(args.context or [None])
+    failed: dict[str, str] = {}
+    try:
+        if args.all_contexts:
+            contexts = list(kube_contexts(args.kubectl))
+            if not contexts:
+                print("error: no contexts in the kubeconfig", file=sys.stderr)
+                return 2
+        # De-dup, keep order: the same context twice would double-probe it.
+        contexts = list(dict.fromkeys(contexts))
+        multi = len(contexts) > 1
+        if multi and (args.serve or args.watch):
+            print(f"error: {'--serve' if args.serve else '--watch'} scans a single context",
+                  file=sys.stderr)
+            return 2
+        # Series are keyed by context name, never "whatever is current": a
+        # `kubectl config use-context` must not splice two clusters' series.
+        history = (History(args.history, None if multi else
+                           contexts[0] or kube_current_context(args.kubectl),
+                           args.history_retention * 86400)
+                   if args.history else None)
+        # Snapshot caches, keyed like Cluster.context ("" when single-context).
+        caches: dict[str, SnapshotCache] = {}
+        if args.cache_ttl > 0 and not (args.serve or args.watch):
+            for ctx in contexts:
+                caches[ctx if multi else ""] = SnapshotCache(
+                    cache_dir(), ctx or kube_current_context(args.kubectl),
+                    args.cache_ttl, args.refresh)
+        if multi:
+            # Contexts are discovered in parallel and probed by one engine,
+            # so the run takes as long as the slowest cluster, not the sum.
+            kc, clusters, failed = discover_contexts(
+                {ctx: functools.partial(backend, ctx) for ctx in contexts},
+                args.namespace, args.cluster, caches)
+        else:
+            kc = backend(contexts[0])
+            if args.serve:
+                return serve(kc, args, history, thresholds)
+            if args.watch:
+                return watch(kc, args, history, thresholds)
+            clusters = (caches[""].discover(kc, args.namespace, args.cluster)
+                        if caches else discover(kc, args.namespace, args.cluster))
+    except (subprocess.CalledProcessError, KubeAPIError, OSError,
+            json.JSONDecodeError) as exc:
+        print(f"error: {describe_error(exc)}", file=sys.stderr)
         return 2
 
+    if not clusters and failed:
+        return 2
     if not clusters:
         print("No CloudNativePG clusters found.", file=sys.stderr)
         return 0
+    thresholds.assign(clusters)
+
+    verdicts: dict[str, str] = {}
+
+    def settle(c: Cluster) -> None:
+        if c.context in caches:
+            caches[c.context].rates.fill(c)
+        if history is not None:
+            history.record([c])
+            history.forecast([c])
+        with PROFILE.span("evaluate"):
+            verdicts[c.key] = evaluate(c, thresholds.rules)
+
+    stream = args.stream
+    if stream is None:
+        stream = sys.stdout.isatty()
+    stream = stream and baseline is None      # --diff needs the whole fleet first
+    if args.output == "ndjson":
+        # Always streamed: one line per cluster as it settles, nothing held
+        # back but the verdicts for the trailing summary.
+        for ctx, err in failed.items():
+            print(ndjson_line({"record": "error", "context": ctx, "error": err}), flush=True)
 
-    if not args.no_exec:
-        enrich(kc, clusters)
+        def on_done(c: Cluster) -> None:
+            settle(c)
+            print(ndjson_line({"record": "cluster", **to_dict(c, verdicts[c.key])}),
+                  flush=True)
+    elif args.output == "text" and stream:
+        # Progressive: the header goes out right after discovery and each row
+        # as its cluster settles, so a hung pod delays only its own row.
+        table = StreamTable(clusters, forecast=history is not None)
+        print(table.header(len(clusters)), flush=True)
+
+        def on_done(c: Cluster) -> None:
+            settle(c)
+            with PROFILE.span("render"):
+                row = table.row(c, verdicts[c.key])
+            print(row, flush=True)
+    else:
+        on_done = settle
+        stream = False
+
+    inst_jobs: list[tuple[Cluster, Instance]] | None = None
+    prim_jobs: list[Cluster] | None = None
+    if caches and not args.no_exec:
+        inst_jobs, prim_jobs = [], []
+        for key, cache in caches.items():
+            ij, pj = cache.reuse([c for c in clusters if c.context == key])
+            inst_jobs += ij
+            prim_jobs += pj
+    if args.pvc_source == "kubelet":
+        fill_pvc_from_kubelet(kc, clusters)
+    if args.no_exec:
+        for c in clusters:
+            on_done(c)
+    else:
+        enrich(kc, clusters, inst_jobs, prim_jobs, deadline=deadline, on_done=on_done)
+    for key, cache in caches.items():
+        if key not in failed:
+            cache.store([c for c in clusters if c.context == key])
+    ages = [cache.age for cache in caches.values() if cache.age is not None]
+    reused = sum(cache.reused for cache in caches.values())
+    if ages or reused:
+        what = [f"fleet list {human_age(max(ages))} old"] if ages else []
+        what += [f"{reused} probe result(s) reused"] if reused else []
+        print(f"note: answered from the snapshot cache ({', '.join(what)}) — "
+              "--refresh to re-probe", file=sys.stderr)
 
-    verdicts = {c.key: evaluate(c) for c in clusters}
+    changes: list[Change] = []
+    if baseline is not None:
+        changes = diff_fleet(baseline[1], {c.key: to_dict(c, verdicts[c.key])
+                                           for c in clusters})
 
     if args.output == "json":
-        payload = {
+        def records(ctx: str | None = None) -> Iterator[dict]:
+            # Lazy: write_json builds and writes one cluster's record at a time.
+            return (to_dict(c, verdicts[c.key]) for c in clusters
+                    if ctx is None or c.context == ctx)
+
+        payload: dict = {
             "generated": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
             "clusterCount": len(clusters),
-            "clusters": [to_dict(c, verdicts[c.key]) for c in clusters],
         }
-        print(json.dumps(payload, indent=2))
+        if multi:
+            # One document, keyed by context; a failed context carries its error.
+            payload["contexts"] = {
+                ctx: {"clusterCount": sum(c.context == ctx for c in clusters),
+                      "clusters": records(ctx),
+                      **({"error": failed[ctx]} if ctx in failed else {})}
+                for ctx in contexts
+            }
+        else:
+            payload["clusters"] = records()
+        if baseline is not None:
+            payload["diffSince"] = baseline[0] or None
+            payload["changes"] = [ch.to_dict() for ch in changes]
+        if args.profile:
+            payload["profile"] = PROFILE.report(args.profile)
+        write_json(payload, sys.stdout)
+        print()
+    elif args.output == "ndjson":
+        summary: dict = {
+            "record": "summary",
+            "generated": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "clusterCount": len(clusters),
+            "verdict": worst(*verdicts.values(), *(UNKNOWN for _ in failed)),
+            "counts": {sev: sum(v == sev for v in verdicts.values())
+                       for sev in (CRIT, WARN, UNKNOWN, OK)},
+        }
+        if failed:
+            summary["failedContexts"] = sorted(failed)
+        if baseline is not None:
+            summary["diffSince"] = baseline[0] or None
+            summary["changes"] = [ch.to_dict() for ch in changes]
+        if args.profile:
+            summary["profile"] = PROFILE.report(args.profile)
+        print(ndjson_line(summary))
     else:
-        print(render(clusters, verdicts, args.details))
+        with PROFILE.span("render"):
+            if baseline is not None:
+                text = render_diff(clusters, verdicts, changes, baseline[0])
+            else:
+                text = render(clusters, verdicts, args.details, table=not stream)
+        print(text)
+        if args.profile:
+            print()
+            print(render_profile(PROFILE.report(args.profile)))
 
     if args.exit_zero:
         return 0
-    overall = worst(*verdicts.values())
+    # A context we couldn't even list counts as UNKNOWN, never as healthy.
+    overall = worst(*verdicts.values(), *(UNKNOWN for _ in failed))
     # UNKNOWN → 1 (not 0): a fleet we couldn't actually probe must NOT pass a CI
     # or cron gate as if it were healthy. --exit-zero is the explicit opt-out.
     return {OK: 0, UNKNOWN: 1, WARN: 1, CRIT: 2}.get(overall, 0)
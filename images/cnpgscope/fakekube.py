@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""fakekube — a fake `kubectl` serving a synthetic CNPG fleet.
+
+Answers the calls cnpgscope makes (Cluster CR and pod lists, df/psql execs,
+the kubelet /stats/summary behind --pvc-source kubelet) from a generated
+fleet instead of a cluster: each exec sleeps a simulated latency (lognormal
+around a median), and a seeded fraction of them fail or hang, so timeouts
+and failures land on the same pods every run. Stdlib only, and it
+deliberately does not import cnpgscope: it is forked once per call, like
+the real kubectl.
+
+The fleet comes from $CNPGSCOPE_FAKE_FLEET, a JSON object of Fleet fields
+(default: {"instances": 100}).
+
+Usage:
+  CNPGSCOPE_FAKE_FLEET='{"instances": 500, "fail_rate": 0.01}' \\
+      ./cnpgscope.py --kubectl ./fakekube.py
+  ./bench.py --backend kubectl      # the benchmark harness, forking this
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+FLEET_ENV = "CNPGSCOPE_FAKE_FLEET"
+# cnpgscope._POD_LABELS, in its _POD_JSONPATH column order.
+_POD_LABELS = ("cnpg.io/cluster", "cnpg.io/instanceRole", "role")
+
+
+@dataclass
+class Fleet:
+    """A deterministic fleet: `instances` pods in 3-instance clusters, two
+    clusters per namespace, ~25 pods per node, plus the exec simulation."""
+    instances: int
+    seed: int = 1
+    latency: float = 0.05         # median exec latency, seconds
+    sigma: float = 0.5            # lognormal spread of the latency
+    fail_rate: float = 0.0        # exec exits non-zero
+    hang_rate: float = 0.0        # exec never returns (cut off by --exec-timeout)
+    down_rate: float = 0.02       # pod CrashLooping (not probed at all)
+    troubled_rate: float = 0.05   # cluster with a stale slot, lag and a full PVC
+
+    @classmethod
+    def from_env(cls) -> Fleet:
+        return cls(**json.loads(os.environ.get(FLEET_ENV) or '{"instances": 100}'))
+
+    def rng(self, *key: object) -> random.Random:
+        return random.Random(":".join(map(str, (self.seed, *key))))
+
+    @property
+    def nodes(self) -> int:
+        return max(3, self.instances // 25)
+
+    def layout(self) -> Iterator[tuple[str, str, int]]:
+        """(namespace, cluster, instances) for every cluster."""
+        left, k = self.instances, 0
+        while left > 0:
+            n = min(3, left)
+            yield f"app{k // 2:04d}-prod", f"app{k:04d}-db", n
+            left -= n
+            k += 1
+
+    def troubled(self, cluster: str) -> bool:
+        return self.rng(cluster, "troubled").random() < self.troubled_rate
+
+    def down(self, pod: str) -> bool:
+        return self.rng(pod, "down").random() < self.down_rate
+
+    def clusters(self) -> Iterator[dict]:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - 3600))
+        for ns, name, n in self.layout():
+            down = sum(self.down(f"{name}-{i}") for i in range(1, n + 1))
+            yield {
+                "metadata": {"namespace": ns, "name": name, "resourceVersion": "1"},
+                "spec": {"instances": n, "storage": {"size": "10Gi"},
+                         "backup": {"barmanObjectStore": {}},
+                         "bootstrap": {"initdb": {"database": "app"}}},
+                "status": {"readyInstances": n - down, "currentPrimary": f"{name}-1",
+                           "phase": "Cluster in healthy state",
+                           "lastSuccessfulBackup": stamp,
+                           "conditions": [{"type": "ContinuousArchiving",
+                                           "status": "True"}]},
+            }
+
+    def pods(self) -> Iterator[dict]:
+        k = 0
+        for ns, name, n in self.layout():
+            for i in range(1, n + 1):
+                pod = f"{name}-{i}"
+                down = self.down(pod)
+                yield {
+                    "metadata": {"namespace": ns, "name": pod, "uid": f"uid-{pod}",
+                                 "resourceVersion": "1",
+                                 "labels": {"cnpg.io/cluster": name,
+                                            "cnpg.io/instanceRole":
+                                                "primary" if i == 1 else "replica"}},
+                    "spec": {"nodeName": f"node{k % self.nodes:03d}",
+                             "volumes": [{"persistentVolumeClaim": {"claimName": pod}}]},
+                    "status": {
+                        "phase": "Running",
+                        "podIP": f"10.{k >> 16 & 255}.{k >> 8 & 255}.{k & 255}",
+                        "containerStatuses": [{
+                            "name": "postgres", "ready": not down,
+                            "restartCount": 7 if down else 0,
+                            "state": ({"waiting": {"reason": "CrashLoopBackOff"}} if down
+                                      else {"running": {}})}]},
+                }
+                k += 1
+
+    def stats_summary(self, node: str) -> dict:
+        """The kubelet's /stats/summary for one node: its pods' PVC usage."""
+        pods = []
+        for p in self.pods():
+            m = p["metadata"]
+            if p["spec"]["nodeName"] != node:
+                continue
+            size, used, _ = self.df_output(m["name"], "").split("\n")[0].split()
+            ref = {"name": m["name"], "namespace": m["namespace"]}
+            pods.append({"podRef": ref, "volume": [
+                {"name": "pgdata", "capacityBytes": int(size), "usedBytes": int(used),
+                 "pvcRef": ref}]})
+        return {"node": {"nodeName": node}, "pods": pods}
+
+    # -- exec simulation ------------------------------------------------------
+    def outcome(self, pod: str, kind: str) -> tuple[str, float]:
+        """("ok" | "fail" | "hang", latency seconds) for one exec."""
+        r = self.rng(pod, kind)
+        secs = self.latency * math.exp(r.gauss(0.0, self.sigma)) if self.latency > 0 else 0.0
+        x = r.random()
+        if x < self.hang_rate:
+            return "hang", secs
+        if x < self.hang_rate + self.fail_rate:
+            return "fail", secs
+        return "ok", secs
+
+    def df_output(self, pod: str, script: str) -> str:
+        """The per-instance probe's stdout: df line, pg_wal line, replay samples."""
+        r = self.rng(pod, "df")
+        cluster = pod.rsplit("-", 1)[0]
+        pct = r.uniform(80, 92) if self.troubled(cluster) else r.uniform(10, 70)
+        size = 10 * 1024**3
+        dfline = (f"{size} {int(size * pct / 100)} {pct:.0f}%"
+                  if not script.startswith("echo -") else "-")   # --pvc-source kubelet
+        out = f"{dfline}\n{int(size * r.uniform(0.01, 0.3))}\n"
+        if "'replay'" in script:
+            t = time.time()
+            behind = 256 * 1024**2 if self.troubled(cluster) else 0
+            for dt, moved in ((1.0, 0), (0.0, 4 * 1024**2)):
+                recv = 0x30000000 + moved + behind
+                out += (f"replay {lsn(recv)} {lsn(recv - behind)} "
+                        f"{900.0 if behind else 3.0} {t - dt}\n")
+        return out
+
+    def psql_output(self, pod: str, sql: str) -> str:
+        """The primary batch's stdout: `<tag>|<json>` rows for every tag asked for."""
+        cluster = pod.rsplit("-", 1)[0]
+        bad = self.troubled(cluster)
+        r = self.rng(pod, "psql")
+        rows: dict[str, list[dict]] = {
+            "slots": [{"name": f"_cnpg_{cluster}_2", "active": True,
+                       "retained": 4096, "wal_status": "reserved"}]
+                     + ([{"name": "stale", "active": False, "retained": 3 * 1024**3,
+                          "wal_status": "extended"}] if bad else []),
+            "lag": [{"app": f"{cluster}-2", "state": "streaming",
+                     "lag": 600 * 1024**2 if bad else 0}],
+            "xid": [{"db": "app", "age": r.randrange(10**6, 4 * 10**8)}],
+            "ckpt": [{"stats": json.dumps({"timed": 500, "requested": 20, "write_ms": 9e4,
+                                           "sync_ms": 4e3, "buffers": 10**5})}],
+        }
+        out = []
+        t0 = time.time()
+        for n, tag in enumerate(re.findall(r"SELECT '([a-z_]+)', row_to_json", sql)):
+            if tag == "wal":      # sampled twice: move the LSN and the clock
+                rows["wal"] = [{"lsn": lsn(0x50000000 + n * 2 * 1024**2), "t": t0 + n,
+                                "seg": 16 * 1024**2, "archived": 100 + n, "failed": 0,
+                                "failing": False, "archived_age": 20.0,
+                                "ready": 40 if bad else 0}]
+            out += [f"{tag}|{json.dumps(row)}" for row in rows.get(tag, [])]
+        return "\n".join(out) + "\n"
+
+
+def lsn(pos: int) -> str:
+    return f"{pos >> 32:X}/{pos & 0xFFFFFFFF:X}"
+
+
+def jsonpath_line(p: dict) -> str:
+    """A pod as kubectl prints it through cnpgscope's _POD_JSONPATH."""
+    m, sp, st = p["metadata"], p["spec"], p["status"]
+    labels = m.get("labels", {})
+    statuses = "".join(
+        f"{str(cs['ready']).lower()},{cs['restartCount']},"
+        f"{(cs['state'].get('waiting') or {}).get('reason', '')};"
+        for cs in st["containerStatuses"])
+    claims = "".join(f"{v['persistentVolumeClaim']['claimName']}," for v in sp["volumes"])
+    return "\t".join([m["namespace"], m["name"], m["uid"], m["resourceVersion"],
+                      *(labels.get(k, "") for k in _POD_LABELS),
+                      st["phase"], sp["nodeName"], st["podIP"], statuses, claims]) + "\n"
+
+
+def _opt(argv: list[str], flag: str) -> str | None:
+    return argv[argv.index(flag) + 1] if flag in argv else None
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if "--context" in argv:
+        i = argv.index("--context")
+        argv = argv[:i] + argv[i + 2:]
+    fleet = Fleet.from_env()
+    if argv[:2] == ["config", "current-context"]:
+        print("fakekube")
+        return 0
+    if argv[:2] == ["config", "get-contexts"]:
+        print("fakekube")
+        return 0
+    if argv[:2] == ["get", "--raw"] and argv[2].endswith("/proxy/stats/summary"):
+        time.sleep(fleet.outcome(argv[2], "kubelet")[1])
+        print(json.dumps(fleet.stats_summary(argv[2].split("/")[4])))
+        return 0
+    if argv[:1] == ["get"] and len(argv) > 1:
+        ns, name = _opt(argv, "-n"), (_opt(argv, "--field-selector") or "").partition("=")[2]
+        selector = _opt(argv, "-l") or ""
+        if argv[1].startswith("clusters"):
+            items = [c for c in fleet.clusters()
+                     if (not ns or c["metadata"]["namespace"] == ns)
+                     and (not name or c["metadata"]["name"] == name)]
+            print(json.dumps({"kind": "List", "items": items}))
+            return 0
+        if argv[1] == "pods":
+            want = selector.partition("=")[2]
+            sys.stdout.write("".join(
+                jsonpath_line(p) for p in fleet.pods()
+                if (not ns or p["metadata"]["namespace"] == ns)
+                and (not want or p["metadata"]["labels"]["cnpg.io/cluster"] == want)))
+            return 0
+    if argv[:1] == ["exec"] and "--" in argv:
+        pod, cmd = argv[3], argv[argv.index("--") + 1:]
+        kind = "exec" if cmd[0] == "bash" else "psql"
+        result, secs = fleet.outcome(pod, kind)
+        text = " ".join(cmd)
+        window = re.search(r"pg_sleep\(([\d.]+)\)", text)
+        if window:
+            secs += float(window.group(1))
+        time.sleep(3600 if result == "hang" else secs)
+        if result == "fail":
+            print("command terminated with exit code 2", file=sys.stderr)
+            return 2
+        sys.stdout.write(fleet.df_output(pod, cmd[-1]) if kind == "exec"
+                         else fleet.psql_output(pod, text))
+        return 0
+    print(f"fakekube: unsupported: kubectl {' '.join(argv)}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,13 @@ as netscope (eBPF network) and thermalscope (thermal/RAPL). It does two things:
      `mqtt_probe_latency_seconds`. This is the "is MQTT laggy right now" signal
      that $SYS counters can't give you (they show volume, not latency).
 
+  3. Optionally (MQTT_TOPIC_STATS set) subscribes to a wildcard filter and
+     counts messages and payload bytes per topic prefix (the first
+     MQTT_TOPIC_DEPTH levels), so you can see *which* subtree is generating
+     the load $SYS only totals. Only the MQTT_TOPIC_TOPK heaviest prefixes
+     are tracked (space-saving top-K), so series count stays bounded however
+     many topics a chatty bridge invents.
+
 Config (all via env):
   MQTT_HOST            broker host                (default: mosquitto.mosquitto.svc.cluster.local)
   MQTT_PORT            broker port                (default: 1883)
@@ -25,6 +32,9 @@ Config (all via env):
   MQTT_PROBE_TIMEOUT   seconds to await an echo   (default: 10)
   MQTT_PROBE_QOS       probe QoS (0|1|2)          (default: 1)
   MQTT_SYS_TOPIC       $SYS subtree to subscribe  (default: $SYS/#)
+  MQTT_TOPIC_STATS     per-topic-prefix accounting filter, e.g. # (default: unset -> off)
+  MQTT_TOPIC_DEPTH     topic levels per prefix    (default: 2, e.g. zigbee2mqtt/kitchen_plug)
+  MQTT_TOPIC_TOPK      prefixes tracked at once   (default: 50)
   LISTEN_PORT          metrics/healthz HTTP port  (default: 9103)
 """
 
@@ -40,10 +50,12 @@ from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import paho.mqtt.client as mqtt
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
+    REGISTRY,
     Counter,
     Gauge,
     generate_latest,
 )
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
 log = logging.getLogger("mqttscope")
 
@@ -62,6 +74,9 @@ PROBE_INTERVAL = float(_env("MQTT_PROBE_INTERVAL", "15"))
 PROBE_TIMEOUT = float(_env("MQTT_PROBE_TIMEOUT", "10"))
 PROBE_QOS = int(_env("MQTT_PROBE_QOS", "1"))
 SYS_TOPIC = _env("MQTT_SYS_TOPIC", "$SYS/#")
+TOPIC_STATS = os.environ.get("MQTT_TOPIC_STATS") or None
+TOPIC_DEPTH = int(_env("MQTT_TOPIC_DEPTH", "2"))
+TOPIC_TOPK = int(_env("MQTT_TOPIC_TOPK", "50"))
 LISTEN_PORT = int(_env("LISTEN_PORT", "9103"))
 
 # ---------------------------------------------------------------------------
@@ -132,6 +147,106 @@ SYS_MAP = {
     "$SYS/broker/publish/messages/dropped": mqtt_messages_dropped,
 }
 
+# ---------------------------------------------------------------------------
+# Per-topic-prefix accounting (MQTT_TOPIC_STATS)
+# ---------------------------------------------------------------------------
+def topic_prefix(topic: str, depth: int) -> str:
+    """The first `depth` levels of a topic: zigbee2mqtt/plug/set -> zigbee2mqtt/plug."""
+    return "/".join(topic.split("/", depth)[:depth])
+
+
+class TopicStats:
+    """Messages and payload bytes per topic prefix, for the top-K prefixes.
+
+    Space-saving (Metwally et al.): at most `capacity` counters. A prefix
+    already tracked just counts up. A new prefix takes a free slot, or
+    evicts the prefix with the fewest messages and inherits its counts (plus
+    that count as its error bound). Any prefix whose true share of traffic
+    is above 1/capacity is guaranteed a slot, so the flooding device always
+    shows up while a long tail of one-off topics can't grow the series
+    count. The estimate over-counts by at most `error`.
+
+    The estimate is not a counter: a prefix admitted by eviction jumps to
+    the victim's count, and one evicted and readmitted restarts from
+    whatever it inherits. So the exported counters only add what was
+    actually seen while the prefix held a slot: they are monotonic and
+    exact while it is tracked, and restart from zero on readmission, which
+    rate() reads as a reset. Traffic during an untracked gap is lost, so a
+    tail prefix's rate is a lower bound; a heavy hitter never leaves.
+
+    Updated from the paho network thread, read at scrape time; the eviction
+    scan is O(capacity), cheap at the sizes a dashboard wants.
+    """
+
+    def __init__(self, capacity: int, depth: int):
+        self.capacity = max(1, capacity)
+        self.depth = max(1, depth)
+        # prefix -> [estimated messages, error, messages seen, bytes seen]
+        self._counts: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+        self.evictions = 0
+
+    def add(self, topic: str, size: int) -> None:
+        prefix = topic_prefix(topic, self.depth)
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+            entry = self._counts.get(prefix)
+            if entry is None:
+                if len(self._counts) < self.capacity:
+                    entry = self._counts[prefix] = [0, 0, 0, 0]
+                else:
+                    victim = min(self._counts, key=lambda k: self._counts[k][0])
+                    msgs = self._counts.pop(victim)[0]
+                    entry = self._counts[prefix] = [msgs, msgs, 0, 0]
+                    self.evictions += 1
+            entry[0] += 1
+            entry[2] += 1
+            entry[3] += size
+
+    def collect(self):
+        with self._lock:
+            snapshot = {k: tuple(v) for k, v in self._counts.items()}
+            totals = (self.messages, self.bytes, self.evictions)
+        msgs = CounterMetricFamily(
+            "mqtt_topic_messages", "Messages seen per topic prefix while it is in the top-K",
+            labels=["prefix"])
+        nbytes = CounterMetricFamily(
+            "mqtt_topic_payload_bytes",
+            "Payload bytes seen per topic prefix while it is in the top-K", labels=["prefix"])
+        estimate = GaugeMetricFamily(
+            "mqtt_topic_messages_estimate",
+            "Space-saving estimate of all messages per topic prefix (over-counts by at most "
+            "mqtt_topic_messages_error)", labels=["prefix"])
+        error = GaugeMetricFamily(
+            "mqtt_topic_messages_error",
+            "Upper bound on the over-count in mqtt_topic_messages_estimate for the prefix",
+            labels=["prefix"])
+        for prefix, (est, e, m, b) in snapshot.items():
+            msgs.add_metric([prefix], m)
+            nbytes.add_metric([prefix], b)
+            estimate.add_metric([prefix], est)
+            error.add_metric([prefix], e)
+        yield msgs
+        yield nbytes
+        yield estimate
+        yield error
+        yield CounterMetricFamily("mqtt_topic_stats_messages",
+                                  "All messages seen on MQTT_TOPIC_STATS", value=totals[0])
+        yield CounterMetricFamily("mqtt_topic_stats_payload_bytes",
+                                  "All payload bytes seen on MQTT_TOPIC_STATS", value=totals[1])
+        yield CounterMetricFamily("mqtt_topic_stats_evictions",
+                                  "Prefixes evicted from the top-K to admit a new one",
+                                  value=totals[2])
+        yield GaugeMetricFamily("mqtt_topic_stats_tracked", "Topic prefixes currently tracked",
+                                value=len(snapshot))
+
+
+# Set in main() when MQTT_TOPIC_STATS is configured.
+topic_stats: TopicStats | None = None
+
 # nonce -> monotonic send time for in-flight probes. Guarded by _probe_lock.
 _inflight: dict[str, float] = {}
 _probe_lock = threading.Lock()
@@ -164,7 +279,11 @@ def on_connect(client, userdata, flags, reason_code, properties):
     log.info("connected to %s:%s", HOST, PORT)
     # Subscribe to the $SYS tree (retained values arrive immediately) and to
     # our own probe topic so published probes loop back to us.
-    client.subscribe([(SYS_TOPIC, 0), (PROBE_TOPIC, PROBE_QOS)])
+    subs = [(SYS_TOPIC, 0), (PROBE_TOPIC, PROBE_QOS)]
+    if topic_stats is not None:
+        # QoS 0: we only count, so the broker never queues for us.
+        subs.append((TOPIC_STATS, 0))
+    client.subscribe(subs)
 
 
 def on_disconnect(client, userdata, flags, reason_code, properties):
@@ -174,6 +293,9 @@ def on_disconnect(client, userdata, flags, reason_code, properties):
 
 def on_message(client, userdata, msg):
     topic = msg.topic
+    if topic_stats is not None and not topic.startswith("$SYS/") and not msg.retain:
+        # Retained messages replayed on (re)subscribe are old traffic.
+        topic_stats.add(topic, len(msg.payload))
     if topic == PROBE_TOPIC:
         _handle_probe_echo(msg.payload)
         return
@@ -269,10 +391,16 @@ class Handler(BaseHTTPRequestHandler):
 
 
 def main() -> None:
+    global topic_stats
     logging.basicConfig(
         level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
     )
     mqtt_up.set(0)
+    if TOPIC_STATS:
+        topic_stats = TopicStats(TOPIC_TOPK, TOPIC_DEPTH)
+        REGISTRY.register(topic_stats)
+        log.info("per-topic accounting on %s (depth %s, top %s)",
+                 TOPIC_STATS, TOPIC_DEPTH, TOPIC_TOPK)
 
     client = mqtt.Client(
         callback_api_version=mqtt.CallbackAPIVersion.VERSION2,